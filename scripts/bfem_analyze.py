@@ -14,25 +14,70 @@ Notes / limitations
 - Length is for the helix geometry only (not cage/connectors/exit wires).
 - Self-resonance in real coils is distributed; the required-C estimate is a
   rough feasibility calculator: f0 ≈ 1 / (2π sqrt(L C)).
+- Generator reports are cached on disk (see scripts/bfem_cache.py); pass
+  `--no-cache` to force a fresh generator run.
+- `--profile PATH` writes a per-stage timing report (scripts/bfem_profile.py).
 
 Example:
   ./scripts/bfem_analyze.py --numPairs 10 --vertTurns 15 --wireWidth 1.0 --wireGap 0.2 \
     --innerDiam 6.0 --rho 1.724e-8 --target-f0-hz 10000 --assumed-L-h 1e-3
+
+Sweep example (streams the variants through 8 `--batch` generator processes;
+pass `--no-batch` to start one generator process per variant instead):
+  ./scripts/bfem_analyze.py --sweep --sweep-numPairs 6,8,10 --sweep-wireGap 0.1,0.2,0.3 -j 8
+
+Both modes accept `--surrogate` to score variants with the closed-form helix
+metrics in scripts/bfem_surrogate.py instead of the generator; only the final
+top N are then run through the generator. `--verify-every N` additionally
+spot-checks every Nth surrogate variant against the real `--report` output
+and prints the drift:
+  ./scripts/bfem_analyze.py --sweep --surrogate --verify-every 50 \
+    --sweep-numPairs 4,6,8,10,12,14,16 --sweep-vertTurns 10,12,14,16,18,20 \
+    --sweep-wireWidth 0.6,0.8,1.0,1.2 --sweep-wireGap 0.1,0.15,0.2,0.25,0.3
+
+Long sweeps can stream their rows to disk and be restarted where they stopped
+(see scripts/bfem_sweep_store.py):
+  ./scripts/bfem_analyze.py --sweep --sweep-numPairs 4,6,8,10,12 --sweep-vertTurns 10,15,20 \
+    --store /tmp/bfem-sweep.csv --resume -j 8
+
+Optimize example (coarse grid, then refinement around the C_proxy/Rdc Pareto
+front; see scripts/bfem_optimize.py):
+  ./scripts/bfem_analyze.py --optimize --opt-numPairs 6:16 --opt-wireGap 0.1:0.4 \
+    --opt-wireWidth 0.6:1.4 --opt-budget 120 -j 8
 """
 
 from __future__ import annotations
 
 import argparse
 import math
-import re
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
-
-
-_REPORT_RE = re.compile(r"^bfem:report:(?P<key>[^=]+)=(?P<value>.*)$")
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from bfem_cache import (
+    REPORT_PARAM_NAMES,
+    ResultCache,
+    add_cache_args,
+    cache_from_args,
+    params_from_args,
+    source_fingerprint,
+)
+from bfem_generator import (
+    BatchItemError,
+    BfemRunError,
+    GeneratorLauncher,
+    add_launcher_args,
+    generate_report,
+    generate_reports,
+    launcher_from_args,
+    repo_root,
+)
+from bfem_optimize import Dimension, OptimizeResult, Point, optimize, parse_bounds
+from bfem_profile import add_profile_args, count, profiler_from_args, stage
+from bfem_surrogate import SurrogateDrift, helix_metrics_for
+from bfem_sweep_store import SweepStore, TopN, row_key
 
 
 @dataclass(frozen=True)
@@ -54,62 +99,7 @@ class BfemReport:
     exit_rdc_est_ohm: Optional[float] = None
 
 
-def _repo_root() -> Path:
-    # scripts/ -> repo root
-    return Path(__file__).resolve().parents[1]
-
-
-def run_bfem_report(args: argparse.Namespace) -> BfemReport:
-    repo = _repo_root()
-
-    cmd = [
-        "moon",
-        "run",
-        "--target",
-        "native",
-        "examples/12-bifilar-electromagnet",
-        "--",
-        "--report",
-        "--nocoil" if args.nocoil else "",
-        "--nocage" if args.nocage else "",
-        "--nowires" if args.nowires else "",
-        "--nosupport" if args.nosupport else "",
-        "--numPairs",
-        str(args.numPairs),
-        "--vertTurns",
-        str(args.vertTurns),
-        "--wireWidth",
-        str(args.wireWidth),
-        "--wireGap",
-        str(args.wireGap),
-        "--innerDiam",
-        str(args.innerDiam),
-        "--numSegs",
-        str(args.numSegs),
-        "--rho",
-        str(args.rho),
-    ]
-    cmd = [c for c in cmd if c]
-
-    proc = subprocess.run(
-        cmd,
-        cwd=str(repo),
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=False,
-    )
-    if proc.returncode != 0:
-        sys.stderr.write(proc.stderr)
-        raise SystemExit(proc.returncode)
-
-    kv: Dict[str, str] = {}
-    for line in proc.stderr.splitlines():
-        m = _REPORT_RE.match(line.strip())
-        if not m:
-            continue
-        kv[m.group("key")] = m.group("value")
-
+def report_from_kv(kv: Dict[str, str]) -> BfemReport:
     missing = [
         k
         for k in [
@@ -151,6 +141,20 @@ def run_bfem_report(args: argparse.Namespace) -> BfemReport:
     )
 
 
+def run_bfem_report(
+    args: argparse.Namespace,
+    launcher: GeneratorLauncher,
+    cache: Optional[ResultCache] = None,
+) -> BfemReport:
+    params = params_from_args(args, REPORT_PARAM_NAMES)
+    cached = cache.get_report(params) if cache is not None else None
+    kv = cached if cached is not None else generate_report(launcher, params)
+    report = report_from_kv(kv)
+    if cached is None and cache is not None:
+        cache.put_report(params, kv)
+    return report
+
+
 def required_capacitance_f0(assumed_L_h: float, target_f0_hz: float) -> float:
     # C = 1 / ((2π f)^2 L)
     return 1.0 / (((2.0 * math.pi * target_f0_hz) ** 2) * assumed_L_h)
@@ -244,6 +248,86 @@ def build_parser() -> argparse.ArgumentParser:
         default=10,
         help="Show top N sweep results (default: 10).",
     )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of generator processes to run concurrently (default: 1).",
+    )
+    p.add_argument(
+        "--no-batch",
+        action="store_true",
+        help="Start one generator process per sweep variant instead of streaming variants through --batch.",
+    )
+
+    p.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Coarse-to-fine search of the C_proxy vs Rdc Pareto front within the --opt-* bounds.",
+    )
+    for name, example in [
+        ("numPairs", "6:16"),
+        ("vertTurns", "10:20"),
+        ("wireWidth", "0.6:1.4"),
+        ("wireGap", "0.1:0.4"),
+    ]:
+        p.add_argument(
+            f"--opt-{name}",
+            type=str,
+            default=None,
+            help=f"Search bounds lo:hi, e.g. '{example}'. Defaults to the fixed value of --{name}.",
+        )
+    p.add_argument(
+        "--opt-levels",
+        type=int,
+        default=3,
+        help="Coarse grid points per searched parameter (default: 3).",
+    )
+    p.add_argument(
+        "--opt-budget",
+        type=int,
+        default=200,
+        help="Maximum number of variants to evaluate (default: 200).",
+    )
+    p.add_argument(
+        "--opt-tol",
+        type=float,
+        default=0.02,
+        help="Smallest refinement step as a fraction of each range (default: 0.02).",
+    )
+    p.add_argument(
+        "--surrogate",
+        action="store_true",
+        help=(
+            "Score --sweep/--optimize variants with the closed-form helix surrogate "
+            "(scripts/bfem_surrogate.py); only the final top N are run through the generator."
+        ),
+    )
+    p.add_argument(
+        "--verify-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --surrogate, also run every Nth variant through the generator and report the drift.",
+    )
+    p.add_argument(
+        "--store",
+        type=Path,
+        default=None,
+        help=(
+            "Append each --sweep/--optimize result to this file as soon as it finishes "
+            "(.csv, .jsonl or .bin; see scripts/bfem_sweep_store.py)."
+        ),
+    )
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep the rows already in --store and skip those variants instead of starting a new store.",
+    )
+    add_cache_args(p)
+    add_launcher_args(p)
+    add_profile_args(p, hot_stage="evaluate")
 
     return p
 
@@ -267,20 +351,381 @@ def capacitance_proxy(helix_length_mm: float, wire_width_mm: float, wire_gap_mm:
     return helix_length_mm * wire_width_mm / max(wire_gap_mm, eps)
 
 
-def print_sweep_results(rows: list[dict], top_n: int) -> None:
+def sweep_variants(
+    args: argparse.Namespace,
+    num_pairs_list: List[int],
+    vert_turns_list: List[float],
+    wire_width_list: List[float],
+    wire_gap_list: List[float],
+) -> List[argparse.Namespace]:
+    """Expand the sweep lists into one Namespace per variant (Cartesian order)."""
+    variants: List[argparse.Namespace] = []
+    for np in num_pairs_list:
+        for vt in vert_turns_list:
+            for ww in wire_width_list:
+                for wg in wire_gap_list:
+                    v = argparse.Namespace(**vars(args))
+                    v.numPairs = np
+                    v.vertTurns = vt
+                    v.wireWidth = ww
+                    v.wireGap = wg
+                    variants.append(v)
+    return variants
+
+
+SweepResult = Tuple[argparse.Namespace, Union[BfemReport, Exception]]
+
+# Called (possibly from worker threads) as soon as one variant finishes.
+OnResult = Callable[[argparse.Namespace, Union[BfemReport, Exception]], None]
+
+
+def _run_variant(
+    variant: argparse.Namespace,
+    launcher: GeneratorLauncher,
+    cache: Optional[ResultCache],
+    on_result: Optional[OnResult] = None,
+) -> Union[BfemReport, Exception]:
+    result: Union[BfemReport, Exception]
+    try:
+        result = run_bfem_report(variant, launcher, cache)
+    except (RuntimeError, ValueError, OSError) as e:
+        result = e
+    if on_result is not None:
+        on_result(variant, result)
+    return result
+
+
+def _run_sweep_per_process(
+    variants: List[argparse.Namespace],
+    jobs: int,
+    launcher: GeneratorLauncher,
+    cache: Optional[ResultCache],
+    on_result: Optional[OnResult],
+) -> List[SweepResult]:
+    if jobs <= 1 or len(variants) <= 1:
+        return [(v, _run_variant(v, launcher, cache, on_result)) for v in variants]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(lambda v: _run_variant(v, launcher, cache, on_result), variants)
+        return list(zip(variants, results))
+
+
+def _run_sweep_batched(
+    variants: List[argparse.Namespace],
+    jobs: int,
+    launcher: GeneratorLauncher,
+    cache: Optional[ResultCache],
+    on_result: Optional[OnResult],
+) -> List[SweepResult]:
+    params = [params_from_args(v, REPORT_PARAM_NAMES) for v in variants]
+    results: List[Union[BfemReport, Exception]] = [BatchItemError("not evaluated") for _ in variants]
+
+    def settle(i: int, kv: Union[Dict[str, str], Exception], fresh: bool) -> None:
+        if isinstance(kv, Exception):
+            results[i] = kv
+        else:
+            try:
+                results[i] = report_from_kv(kv)
+            except (RuntimeError, ValueError) as e:
+                results[i] = e
+            else:
+                if fresh and cache is not None:
+                    cache.put_report(params[i], kv)
+        if on_result is not None:
+            on_result(variants[i], results[i])
+
+    pending: List[int] = []
+    for i, p in enumerate(params):
+        kv = cache.get_report(p) if cache is not None else None
+        if kv is None:
+            pending.append(i)
+        else:
+            settle(i, kv, fresh=False)
+
+    # Round-robin so expensive (large numPairs/vertTurns) variants spread
+    # evenly across the generator processes.
+    n_chunks = max(1, min(jobs, len(pending)))
+    chunks = [pending[k::n_chunks] for k in range(n_chunks) if pending[k::n_chunks]]
+
+    def run_chunk(idx: List[int]) -> None:
+        answered = set()
+
+        def on_kv(j: int, kv: Union[Dict[str, str], Exception]) -> None:
+            answered.add(j)
+            settle(idx[j], kv, fresh=True)
+
+        try:
+            kvs = generate_reports(launcher, [params[i] for i in idx], on_result=on_kv)
+        except (BfemRunError, OSError, ValueError) as e:
+            kvs = [e for _ in idx]
+        # Requests the process never answered (e.g. it died mid-batch).
+        for j, kv in enumerate(kvs):
+            if j not in answered:
+                settle(idx[j], kv, fresh=True)
+
+    if len(chunks) <= 1:
+        for idx in chunks:
+            run_chunk(idx)
+    else:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            list(pool.map(run_chunk, chunks))
+    return list(zip(variants, results))
+
+
+def run_sweep(
+    variants: List[argparse.Namespace],
+    jobs: int,
+    launcher: GeneratorLauncher,
+    cache: Optional[ResultCache] = None,
+    batch: bool = True,
+    on_result: Optional[OnResult] = None,
+) -> List[SweepResult]:
+    """Run every variant on up to `jobs` generator processes, in variant order.
+
+    By default the variants are streamed through `jobs` long-lived `--batch`
+    generator processes; with `batch=False` each variant gets its own process.
+    Either way a failing variant yields its exception in place of a report
+    rather than aborting the whole sweep. `on_result` sees each variant as
+    soon as it finishes, in completion order.
+    """
+    if batch:
+        return _run_sweep_batched(variants, jobs, launcher, cache, on_result)
+    return _run_sweep_per_process(variants, jobs, launcher, cache, on_result)
+
+
+def surrogate_reports(variants: List[argparse.Namespace]) -> List[BfemReport]:
+    with stage("surrogate"):
+        metrics = helix_metrics_for([params_from_args(v, REPORT_PARAM_NAMES) for v in variants])
+    count("surrogate variants", len(variants))
+    return [BfemReport(**m) for m in metrics]
+
+
+class VariantEvaluator:
+    """Evaluates sweep variants with the generator or the helix surrogate.
+
+    In surrogate mode every `verify_every`-th variant is additionally run
+    through the generator, and the surrogate/generator differences are
+    accumulated in `drift`.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        jobs: int,
+        launcher: GeneratorLauncher,
+        cache: Optional[ResultCache],
+    ) -> None:
+        self.jobs = jobs
+        self.launcher = launcher
+        self.cache = cache
+        self.batch = not args.no_batch
+        self.surrogate = args.surrogate
+        self.verify_every = max(0, args.verify_every)
+        self.drift = SurrogateDrift()
+        self.verify_failures: List[SweepResult] = []
+        self._seen = 0
+
+    def generator(
+        self,
+        variants: List[argparse.Namespace],
+        on_result: Optional[OnResult] = None,
+    ) -> List[SweepResult]:
+        count("generator variants", len(variants))
+        return run_sweep(
+            variants, self.jobs, self.launcher, self.cache, batch=self.batch, on_result=on_result
+        )
+
+    def __call__(
+        self,
+        variants: List[argparse.Namespace],
+        on_result: Optional[OnResult] = None,
+    ) -> List[SweepResult]:
+        with stage("evaluate"):
+            return self._evaluate(variants, on_result)
+
+    def _evaluate(
+        self,
+        variants: List[argparse.Namespace],
+        on_result: Optional[OnResult],
+    ) -> List[SweepResult]:
+        if not self.surrogate:
+            return self.generator(variants, on_result)
+        reports = surrogate_reports(variants)
+        if self.verify_every:
+            picks = [
+                i for i in range(len(variants)) if (self._seen + i) % self.verify_every == 0
+            ]
+            for i, (variant, real) in zip(picks, self.generator([variants[i] for i in picks])):
+                if isinstance(real, Exception):
+                    self.verify_failures.append((variant, real))
+                else:
+                    self.drift.add(vars(reports[i]), vars(real))
+        self._seen += len(variants)
+        if on_result is not None:
+            for variant, report in zip(variants, reports):
+                on_result(variant, report)
+        return list(zip(variants, reports))
+
+    def print_drift(self) -> None:
+        if not (self.surrogate and self.verify_every):
+            return
+        d = self.drift
+        detail = ", ".join(f"{k}={v:.2e}" for k, v in d.max_rel.items())
+        print(f"\nsurrogate drift ({d.checked} variants checked against the generator): max rel {detail}")
+        if d.worst() > 1e-6:
+            print("bfem_analyze: warning: surrogate drift exceeds 1e-6; the generator geometry may have changed", file=sys.stderr)
+        for variant, err in self.verify_failures:
+            _report_sweep_failure(variant, err)
+
+
+def shortlist_with_generator(
+    args: argparse.Namespace,
+    rows: List[dict],
+    evaluator: VariantEvaluator,
+) -> Tuple[List[dict], List[SweepResult]]:
+    """Re-run the top `args.top` surrogate rows through the generator."""
+    top = sorted(rows, key=sweep_rank_key)[: max(1, args.top)]
+    variants = []
+    for r in top:
+        v = argparse.Namespace(**vars(args))
+        for name in OPT_PARAMS:
+            setattr(v, name, r[name])
+        variants.append(v)
+    final: List[dict] = []
+    failed: List[SweepResult] = []
+    for variant, result in evaluator.generator(variants):
+        if isinstance(result, Exception):
+            failed.append((variant, result))
+        else:
+            final.append(sweep_row(variant, result))
+    return final, failed
+
+
+def sweep_row(variant: argparse.Namespace, report: BfemReport) -> dict:
+    return {
+        "numPairs": variant.numPairs,
+        "vertTurns": variant.vertTurns,
+        "wireWidth": variant.wireWidth,
+        "wireGap": variant.wireGap,
+        "helix_length_m": report.helix_length_m,
+        "rdc_ohm": report.rdc_est_ohm,
+        "c_proxy": capacitance_proxy(report.helix_length_mm, report.wire_width_mm, variant.wireGap),
+        "cage_rdc_ohm": float(report.cage_rdc_est_ohm or 0.0),
+        "exit_rdc_ohm": float(report.exit_rdc_est_ohm or 0.0),
+    }
+
+
+OPT_PARAMS = ("numPairs", "vertTurns", "wireWidth", "wireGap")
+
+
+def optimize_dimensions(args: argparse.Namespace) -> List[Dimension]:
+    dims: List[Dimension] = []
+    for name in OPT_PARAMS:
+        integer = name == "numPairs"
+        lo, hi = parse_bounds(getattr(args, f"opt_{name}"), getattr(args, name), integer)
+        dims.append(Dimension(name, lo, hi, integer))
+    return dims
+
+
+def variant_at(args: argparse.Namespace, dims: List[Dimension], point: Point) -> argparse.Namespace:
+    v = argparse.Namespace(**vars(args))
+    for d, x in zip(dims, point):
+        setattr(v, d.name, int(x) if d.integer else x)
+    return v
+
+
+def run_optimize(
+    args: argparse.Namespace,
+    dims: List[Dimension],
+    evaluator: VariantEvaluator,
+    store: Optional[SweepStore] = None,
+) -> Tuple[OptimizeResult, List[dict], List[SweepResult]]:
+    """Run the Pareto search, evaluating each round as one (parallel) sweep.
+
+    Variants already in a resumed `store` are taken from it instead of being
+    re-evaluated; new ones are appended to it as they finish.
+    """
+    rows: List[dict] = []
+    failed: List[SweepResult] = []
+    recorded = store.recorded() if store is not None else {}
+
+    def record(variant: argparse.Namespace, result: Union[BfemReport, Exception]) -> None:
+        if store is not None and not isinstance(result, Exception):
+            store.append(sweep_row(variant, result))
+
+    def evaluate(points: List[Point]) -> List[Optional[Tuple[float, float]]]:
+        variants = [variant_at(args, dims, p) for p in points]
+        out: List[Optional[Tuple[float, float]]] = [None] * len(variants)
+        todo: List[int] = []
+        for i, variant in enumerate(variants):
+            row = recorded.get(row_key(vars(variant)))
+            if row is None:
+                todo.append(i)
+                continue
+            rows.append(row)
+            out[i] = (row["c_proxy"], row["rdc_ohm"])
+        for i, (variant, result) in zip(todo, evaluator([variants[i] for i in todo], record)):
+            if isinstance(result, Exception):
+                failed.append((variant, result))
+                continue
+            row = sweep_row(variant, result)
+            rows.append(row)
+            out[i] = (row["c_proxy"], row["rdc_ohm"])
+        return out
+
+    def on_round(n: int, added: int, res: OptimizeResult) -> None:
+        print(
+            f"bfem_analyze: optimize round {n}: +{added} variants "
+            f"(total {len(res.evaluated)}/{args.opt_budget}, front={len(res.front())})"
+        )
+
+    result = optimize(
+        dims,
+        evaluate,
+        budget=max(1, args.opt_budget),
+        levels=args.opt_levels,
+        keep=args.top,
+        tol=args.opt_tol,
+        on_round=on_round,
+    )
+    return result, rows, failed
+
+
+def print_pareto_front(rows: List[dict], front: List[Point], dims: List[Dimension]) -> None:
+    keys = {tuple(float(r[d.name]) for d in dims): r for r in rows}
+    front_rows = sorted((keys[p] for p in front if p in keys), key=lambda r: -r["c_proxy"])
+    print(f"\nPareto front (C_proxy vs Rdc, {len(front_rows)} variants)")
+    for r in front_rows:
+        print(
+            "  "
+            f"{r['numPairs']:>7} {r['vertTurns']:>8.3g} {r['wireWidth']:>8.3g} {r['wireGap']:>7.3g}"
+            " | "
+            f"{r['helix_length_m']:>6.3f} {r['rdc_ohm']:>8.4f} {r['c_proxy']:>7.3g}"
+        )
+
+
+def _report_sweep_failure(variant: argparse.Namespace, err: Exception) -> None:
+    label = (
+        f"numPairs={variant.numPairs} vertTurns={variant.vertTurns:g} "
+        f"wireWidth={variant.wireWidth:g} wireGap={variant.wireGap:g}"
+    )
+    sys.stderr.write(f"bfem_analyze: variant failed ({label}): {err}\n")
+    if isinstance(err, BfemRunError) and err.stderr:
+        # Only the tail is useful; full generator logs would drown the sweep output.
+        for line in err.stderr.strip().splitlines()[-5:]:
+            sys.stderr.write(f"  {line}\n")
+
+
+def sweep_rank_key(r: dict) -> Tuple[float, float, float]:
+    return (-r["c_proxy"], r["rdc_ohm"], r["helix_length_m"])
+
+
+def print_sweep_results(rows: list[dict], top_n: int, title: str = "sweep ranking") -> None:
     if not rows:
         print("no sweep results")
         return
 
-    rows_sorted = sorted(
-        rows,
-        key=lambda r: (
-            -r["c_proxy"],
-            r["rdc_ohm"],
-            r["helix_length_m"],
-        ),
-    )
-    print("\nsweep ranking (higher C_proxy better; lower Rdc better)")
+    rows_sorted = sorted(rows, key=sweep_rank_key)
+    print(f"\n{title} (higher C_proxy better; lower Rdc better)")
     header = (
         "  numPairs vertTurns wireWidth wireGap | helix_m  Rdc_ohm  C_proxy | cage_Rdc exit_Rdc"
     )
@@ -297,9 +742,89 @@ def print_sweep_results(rows: list[dict], top_n: int) -> None:
         )
 
 
+def open_sweep_store(args: argparse.Namespace, repo: Path) -> Optional[SweepStore]:
+    if args.store is None:
+        return None
+    context = {name: getattr(args, name) for name in REPORT_PARAM_NAMES if name not in OPT_PARAMS}
+    context["evaluator"] = "surrogate" if args.surrogate else "generator"
+    context["source"] = source_fingerprint(repo)
+    return SweepStore(args.store, context, resume=args.resume)
+
+
+def finish_ranking(
+    args: argparse.Namespace,
+    rows: List[dict],
+    failed: List[SweepResult],
+    evaluated: int,
+    evaluator: VariantEvaluator,
+) -> int:
+    """Print the ranking (shortlisting surrogate rows first) and return the exit status."""
+    for variant, err in failed:
+        _report_sweep_failure(variant, err)
+    title = "sweep ranking"
+    if evaluator.surrogate and rows:
+        with stage("shortlist"):
+            rows, short_failed = shortlist_with_generator(args, rows, evaluator)
+        for variant, err in short_failed:
+            _report_sweep_failure(variant, err)
+        failed = failed + short_failed
+        title = "sweep ranking, surrogate shortlist re-run through the generator"
+    print_sweep_results(rows, args.top, title)
+    evaluator.print_drift()
+    if failed:
+        print(f"bfem_analyze: {len(failed)} of {evaluated} variants failed", file=sys.stderr)
+        return 1
+    return 0
+
+
 def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
+    with profiler_from_args(args, "bfem_analyze"):
+        return run(parser, args)
+
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    repo = repo_root()
+    cache = cache_from_args(args, repo)
+    launcher = launcher_from_args(args, repo)
+
+    if args.sweep and args.optimize:
+        parser.error("--sweep and --optimize are mutually exclusive")
+    if args.resume and args.store is None:
+        parser.error("--resume requires --store")
+
+    jobs = max(1, args.jobs)
+    evaluator = VariantEvaluator(args, jobs, launcher, cache)
+    how = (
+        "scored by the helix surrogate; the top N are re-run through the generator"
+        if args.surrogate
+        else "variants are streamed through up to `jobs` generator processes; first run may be slower"
+    )
+
+    if args.optimize:
+        try:
+            dims = optimize_dimensions(args)
+        except ValueError as e:
+            parser.error(str(e))
+        free = [d.name for d in dims if d.free]
+        print(
+            f"bfem_analyze: optimize over {', '.join(free) or 'nothing (all bounds fixed)'} "
+            f"budget={args.opt_budget} jobs={jobs} ({how})"
+        )
+        try:
+            store = open_sweep_store(args, repo)
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            result, rows, failed = run_optimize(args, dims, evaluator, store)
+        except ValueError as e:
+            parser.error(str(e))
+        finally:
+            if store is not None:
+                store.close()
+        print_pareto_front(rows, result.front(), dims)
+        return finish_ranking(args, rows, failed, len(result.evaluated), evaluator)
 
     if args.sweep:
         num_pairs_list = _parse_csv_ints(args.sweep_numPairs, args.numPairs)
@@ -307,48 +832,52 @@ def main() -> int:
         wire_width_list = _parse_csv_floats(args.sweep_wireWidth, args.wireWidth)
         wire_gap_list = _parse_csv_floats(args.sweep_wireGap, args.wireGap)
 
-        rows: list[dict] = []
-        total = (
-            len(num_pairs_list)
-            * len(vert_turns_list)
-            * len(wire_width_list)
-            * len(wire_gap_list)
-        )
-        print(
-            f"bfem_analyze: sweep variants={total} (this runs moon for each variant; first run may be slower)"
+        variants = sweep_variants(
+            args, num_pairs_list, vert_turns_list, wire_width_list, wire_gap_list
         )
-
-        # Reuse the same argparse.Namespace object to avoid re-building.
-        for np in num_pairs_list:
-            for vt in vert_turns_list:
-                for ww in wire_width_list:
-                    for wg in wire_gap_list:
-                        args.numPairs = np
-                        args.vertTurns = vt
-                        args.wireWidth = ww
-                        args.wireGap = wg
-                        report = run_bfem_report(args)
-                        c_proxy = capacitance_proxy(
-                            report.helix_length_mm, report.wire_width_mm, wg
-                        )
-                        rows.append(
-                            {
-                                "numPairs": np,
-                                "vertTurns": vt,
-                                "wireWidth": ww,
-                                "wireGap": wg,
-                                "helix_length_m": report.helix_length_m,
-                                "rdc_ohm": report.rdc_est_ohm,
-                                "c_proxy": c_proxy,
-                                "cage_rdc_ohm": float(report.cage_rdc_est_ohm or 0.0),
-                                "exit_rdc_ohm": float(report.exit_rdc_est_ohm or 0.0),
-                            }
-                        )
-
-        print_sweep_results(rows, args.top)
-        return 0
-
-    report = run_bfem_report(args)
+        try:
+            store = open_sweep_store(args, repo)
+        except ValueError as e:
+            parser.error(str(e))
+        # Only the best rows are kept in memory; the store has the rest.
+        top: TopN[dict] = TopN(max(1, args.top), sweep_rank_key)
+        todo = variants
+        if store is not None:
+            recorded = store.recorded()
+            todo = []
+            for v in variants:
+                row = recorded.get(row_key(vars(v)))
+                if row is None:
+                    todo.append(v)
+                else:
+                    top.push(row)
+        resumed = f", {len(variants) - len(todo)} already in {args.store}" if len(todo) < len(variants) else ""
+        print(f"bfem_analyze: sweep variants={len(variants)}{resumed} jobs={jobs} ({how})")
+
+        failed: List[SweepResult] = []
+
+        def on_result(variant: argparse.Namespace, result: Union[BfemReport, Exception]) -> None:
+            if isinstance(result, Exception):
+                failed.append((variant, result))
+                return
+            row = sweep_row(variant, result)
+            if store is not None:
+                store.append(row)
+            top.push(row)
+
+        try:
+            evaluator(todo, on_result)
+        finally:
+            if store is not None:
+                store.close()
+        return finish_ranking(args, top.items(), failed, len(variants), evaluator)
+
+    try:
+        with stage("evaluate"):
+            report = run_bfem_report(args, launcher, cache)
+    except BfemRunError as e:
+        sys.stderr.write(e.stderr)
+        return e.returncode
 
     print("bfem_analyze: helix-only geometry")
     print(f"  helix length: {report.helix_length_mm:.6g} mm ({fmt_si(report.helix_length_m, 'm')})")
@@ -0,0 +1,598 @@
+"""Boundary-element (method of moments) capacitance solver for BFEM conductors.
+
+The square-section conductor around the `bfem:conductor-network:v1` centerline
+is covered with flat rectangular panels: the four side faces of every
+centerline segment, split along the segment so no panel is longer than
+`max_panel_m`. Each panel carries a uniform surface charge density, and the
+potential is matched at every panel centroid (collocation):
+
+    V(x_p) = sum_q  sigma_q / (4 pi eps0) * integral_{panel q} dA / |x_p - y|
+
+Near interactions (self terms, neighbouring panels) use the closed-form
+integral of 1/r over a rectangle; everything else treats the source panel as a
+point charge.
+
+The dense system would need (4N)^2 entries for N segments, so the matrix is
+stored hierarchically: panels are sorted into a bisection cluster tree, blocks
+between well-separated clusters are compressed to low rank with adaptive
+cross approximation (ACA, which only samples a few rows and columns of each
+block) and then recompressed by SVD, and only nearby blocks are kept dense.
+A block is compressed as soon as the smaller cluster's diameter is at most
+`eta` = 4 times the cluster distance; the recompression keeps ranks low even
+for such close blocks. All blocks are stored in float32. A tightly wound coil
+packs a lot of wire surface into a small volume, so the dense near field
+stays a few percent of the full matrix; the default coil (~90k panels) takes
+about two minutes on one core.
+
+All right-hand sides are solved together by restarted GMRES (one H-matrix
+product per step for the whole batch), preconditioned by a two-level scheme:
+a coarse correction with one constant charge density per cluster of about
+512 panels, followed by the inverted diagonal blocks of those clusters.
+
+`solve_capacitance` returns
+
+- the Maxwell capacitance matrix between the nets of the network,
+- the Maxwell capacitance matrix between `groups` consecutive runs of the
+  series conductor (equal arclength slices), and
+- `c_eff_F`, the two-terminal capacitance under the same linear-voltage
+  assumption as scripts/bfem_capacitance_air.py, but with the potential
+  varying continuously along the conductor: the coil floats (net charge zero)
+  with potential s - const at normalized arclength s, any other nets float
+  at constant potentials, and C_eff = 2 W / V^2.
+
+Only NumPy is required.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Callable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+from bfem_segments import SegmentTable, dot3, norm3
+
+EPS0_F_PER_M = 8.8541878128e-12
+COULOMB_K = 1.0 / (4.0 * np.pi * EPS0_F_PER_M)
+
+# Source panels closer than this many panel diagonals are integrated exactly.
+NEAR_DIAGONALS = 3.0
+
+# Cluster size of the block-Jacobi / coarse-correction preconditioner.
+PRECOND_SIZE = 512
+
+Index = Union[np.ndarray, slice]
+
+
+@dataclass(frozen=True)
+class Panels:
+    """Struct-of-arrays rectangular panels (one row per panel)."""
+
+    center: np.ndarray  # (P, 3) centroid, meters
+    u: np.ndarray  # (P, 3) unit axis along the segment
+    v: np.ndarray  # (P, 3) unit axis across the face
+    n: np.ndarray  # (P, 3) unit outward normal
+    half_u: np.ndarray  # (P,) half length along u, meters
+    half_v: np.ndarray  # (P,) half width along v, meters
+    area: np.ndarray  # (P,) m^2
+    diagonal: np.ndarray  # (P,) meters
+    segment: np.ndarray  # (P,) int32 index of the owning segment
+    s: np.ndarray  # (P,) normalized arclength of the centroid
+
+    def __len__(self) -> int:
+        return int(self.half_u.shape[0])
+
+
+def _unit(a: np.ndarray) -> np.ndarray:
+    return a / norm3(a)[:, None]
+
+
+def panelize(table: SegmentTable, width_m: float, max_panel_m: Optional[float] = None) -> Panels:
+    """Cover the square conductor of side `width_m` around `table` with panels.
+
+    The cross-section is oriented with one pair of faces normal to
+    direction x z (radial on a vertical helix). Segments longer than
+    `max_panel_m` (default: `width_m`) are split into equal pieces.
+    """
+    if not width_m > 0:
+        raise ValueError(f"wire width must be positive, got {width_m}")
+    max_panel = float(max_panel_m) if max_panel_m else float(width_m)
+    t = table.dir
+    # First cross-section axis: t x z, or t x x where t is (nearly) vertical.
+    n1 = np.cross(t, np.array([0.0, 0.0, 1.0]))
+    vertical = norm3(n1) < 1e-6
+    n1[vertical] = np.cross(t[vertical], np.array([1.0, 0.0, 0.0]))
+    n1 = _unit(n1)
+    n2 = np.cross(t, n1)
+
+    # The relative slack keeps a segment of exactly `max_panel` in one piece despite rounding.
+    pieces = np.maximum(1, np.ceil(table.length / max_panel * (1.0 - 1e-9))).astype(np.int64)
+    seg = np.repeat(np.arange(len(table), dtype=np.int32), pieces)
+    # Piece k of m sits at fraction (k + 0.5) / m along its segment.
+    first = np.repeat(np.cumsum(pieces) - pieces, pieces)
+    frac = (np.arange(int(pieces.sum())) - first + 0.5) / pieces[seg]
+    piece_len = table.length[seg] / pieces[seg]
+    mid = table.a[seg] + (table.b[seg] - table.a[seg]) * frac[:, None]
+    s = table.s_mid[seg] + (frac - 0.5) * table.length[seg] / table.net_length[table.net[seg]]
+
+    half_w = 0.5 * width_m
+    half_u = np.tile(0.5 * piece_len, 4)
+    half_v = np.full(len(half_u), half_w)
+    centers, vs, ns = [], [], []
+    for normal, across in ((n1[seg], n2[seg]), (-n1[seg], n2[seg]), (n2[seg], n1[seg]), (-n2[seg], n1[seg])):
+        centers.append(mid + normal * half_w)
+        vs.append(across)
+        ns.append(normal)
+    return Panels(
+        center=np.concatenate(centers),
+        u=np.tile(t[seg], (4, 1)),
+        v=np.concatenate(vs),
+        n=np.concatenate(ns),
+        half_u=half_u,
+        half_v=half_v,
+        area=4.0 * half_u * half_v,
+        diagonal=2.0 * np.hypot(half_u, half_v),
+        segment=np.tile(seg, 4),
+        s=np.tile(s, 4),
+    )
+
+
+def _xlog(x: np.ndarray, y: np.ndarray, r: np.ndarray, rest2: np.ndarray) -> np.ndarray:
+    """x * ln(y + r) with r = sqrt(x^2 + y^2 + z^2) and rest2 = x^2 + z^2.
+
+    For y < 0 the form ln(rest2 / (r - y)) avoids cancellation; the term is
+    taken as 0 where x == 0 (its limit).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log = np.where(y >= 0.0, np.log(y + r), np.log(rest2 / (r - y)))
+        return np.where(x == 0.0, 0.0, x * log)
+
+
+def _rect_integral(px: np.ndarray, py: np.ndarray, pz: np.ndarray, hu: np.ndarray, hv: np.ndarray) -> np.ndarray:
+    """Integral of 1/r over [-hu, hu] x [-hv, hv] seen from local point (px, py, pz)."""
+    z2 = pz * pz
+    total = np.zeros(np.broadcast(px, py, pz, hu, hv).shape)
+    for sx, x in ((1.0, hu - px), (-1.0, -hu - px)):
+        for sy, y in ((1.0, hv - py), (-1.0, -hv - py)):
+            x2, y2 = x * x, y * y
+            r = np.sqrt(x2 + y2 + z2)
+            f = _xlog(x, y, r, x2 + z2) + _xlog(y, x, r, y2 + z2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f -= np.where(pz == 0.0, 0.0, pz * np.arctan(x * y / (pz * r)))
+            total += sx * sy * f
+    return total
+
+
+def potential_block(panels: Panels, rows: Index, cols: Index) -> np.ndarray:
+    """Potential at the centroids of `rows` per unit charge density on `cols`.
+
+    `rows` and `cols` are index arrays or slices; slices (contiguous runs of
+    panels) index without copying, which is what the H-matrix build uses.
+    """
+    d = panels.center[rows][:, None, :] - panels.center[cols][None, :, :]
+    dist = np.sqrt(np.einsum("ijk,ijk->ij", d, d))
+    near = dist < NEAR_DIAGONALS * panels.diagonal[cols][None, :]
+    # Zero distances only occur on near entries, which are overwritten below.
+    out = panels.area[cols][None, :] / np.maximum(dist, np.finfo(float).tiny)
+    if near.any():
+        ri, ci = np.nonzero(near)
+        dd = d[ri, ci]
+        out[ri, ci] = _rect_integral(
+            dot3(dd, panels.u[cols][ci]),
+            dot3(dd, panels.v[cols][ci]),
+            dot3(dd, panels.n[cols][ci]),
+            panels.half_u[cols][ci],
+            panels.half_v[cols][ci],
+        )
+    return COULOMB_K * out
+
+
+def _take(panels: Panels, order: np.ndarray) -> Panels:
+    return Panels(**{f.name: getattr(panels, f.name)[order] for f in fields(panels)})
+
+
+class ClusterTree:
+    """Bisection tree over panel centroids; nodes are contiguous runs of `perm`."""
+
+    def __init__(self, points: np.ndarray, leaf_size: int) -> None:
+        self.perm = np.arange(len(points), dtype=np.int64)
+        self.start: List[int] = []
+        self.stop: List[int] = []
+        self.lo: List[np.ndarray] = []
+        self.hi: List[np.ndarray] = []
+        self.children: List[Tuple[int, ...]] = []
+        self._points = points
+        self._build(0, len(points), max(1, int(leaf_size)))
+        del self._points
+
+    def _build(self, start: int, stop: int, leaf_size: int) -> int:
+        node = len(self.start)
+        pts = self._points[self.perm[start:stop]]
+        self.start.append(start)
+        self.stop.append(stop)
+        self.lo.append(pts.min(axis=0))
+        self.hi.append(pts.max(axis=0))
+        self.children.append(())
+        if stop - start > leaf_size:
+            axis = int(np.argmax(self.hi[node] - self.lo[node]))
+            # Median split along the widest extent (stable, so ties keep index order).
+            order = np.argsort(pts[:, axis], kind="stable")
+            self.perm[start:stop] = self.perm[start:stop][order]
+            mid = (start + stop) // 2
+            self.children[node] = (self._build(start, mid, leaf_size), self._build(mid, stop, leaf_size))
+        return node
+
+    def cover(self, size: int) -> List[int]:
+        """The largest nodes of at most `size` panels (or leaves), in panel order."""
+        out: List[int] = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self.stop[node] - self.start[node] <= size or not self.children[node]:
+                out.append(node)
+            else:
+                stack.extend(reversed(self.children[node]))
+        return out
+
+    def diameter(self, node: int) -> float:
+        return float(np.linalg.norm(self.hi[node] - self.lo[node]))
+
+    def distance(self, a: int, b: int) -> float:
+        gap = np.maximum(0.0, np.maximum(self.lo[a] - self.hi[b], self.lo[b] - self.hi[a]))
+        return float(np.linalg.norm(gap))
+
+
+def aca(
+    entries: Callable[[Index, Index], np.ndarray],
+    rows: range,
+    cols: range,
+    tol: float,
+    max_rank: int,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Partially pivoted ACA of the block `entries(rows, cols)` as U @ V.
+
+    Returns None if the block does not reach `tol` within `max_rank` terms
+    (the caller then stores it dense). `rows` and `cols` are ranges, so the
+    single rows and columns sampled stay contiguous.
+    """
+    m, n = len(rows), len(cols)
+    us = np.zeros((m, max_rank))
+    vs = np.zeros((max_rank, n))
+    free = np.ones(m, dtype=bool)
+    norm2 = 0.0
+    k = 0
+    i = 0
+    while k < max_rank:
+        free[i] = False
+        row = entries(rows[i : i + 1], cols)[0] - us[i, :k] @ vs[:k]
+        j = int(np.argmax(np.abs(row)))
+        if row[j] == 0.0:
+            if not free.any():
+                break
+            i = int(np.argmax(free))
+            continue
+        v = row / row[j]
+        u = entries(rows, cols[j : j + 1])[:, 0] - us[:, :k] @ vs[:k, j]
+        # Frobenius norm of the approximation, updated incrementally.
+        nu, nv = float(u @ u), float(v @ v)
+        norm2 += 2.0 * float((u @ us[:, :k]) @ (vs[:k] @ v)) + nu * nv
+        us[:, k], vs[k] = u, v
+        k += 1
+        if nu * nv <= tol * tol * norm2:
+            return us[:, :k].copy(), vs[:k].copy()
+        if not free.any():
+            break
+        i = int(np.argmax(np.where(free, np.abs(u), -1.0)))
+    return None
+
+
+def recompress(u: np.ndarray, v: np.ndarray, tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Shrink the rank of U @ V to the fewest terms within `tol` (relative Frobenius).
+
+    ACA ranks are not optimal; a QR of both factors and an SVD of the small
+    core typically removes a third or more of the terms.
+    """
+    qu, ru = np.linalg.qr(u)
+    qv, rv = np.linalg.qr(v.T)
+    w, sv, zt = np.linalg.svd(ru @ rv.T)
+    # Drop the tail whose energy stays below tol^2 of the total.
+    tail = np.sqrt(np.cumsum((sv * sv)[::-1]))[::-1]
+    rank = max(1, int(np.count_nonzero(tail > tol * tail[0])))
+    return qu @ (w[:, :rank] * sv[:rank]), zt[:rank] @ qv.T
+
+
+class HMatrix:
+    """Hierarchical potential matrix: dense near blocks, ACA far blocks.
+
+    Works in the cluster tree's permuted panel order; `matvec` takes and
+    returns vectors (or (P, k) arrays) in the original panel order. Blocks
+    are stored in float32: the solve tolerance is far above single precision,
+    and it halves both the memory and the matvec traffic.
+    """
+
+    def __init__(
+        self,
+        panels: Panels,
+        leaf_size: int = 256,
+        eta: float = 4.0,
+        tol: float = 1e-4,
+        precond_size: int = PRECOND_SIZE,
+    ) -> None:
+        self.size = len(panels)
+        self.tree = ClusterTree(panels.center, leaf_size)
+        # Panels in tree order, so every cluster is a slice (no gathers while sampling).
+        ordered = _take(panels, self.tree.perm)
+        self.dense: List[Tuple[int, int, int, int, np.ndarray]] = []
+        self.lowrank: List[Tuple[int, int, int, int, np.ndarray, np.ndarray]] = []
+
+        def entries(r: range, c: range) -> np.ndarray:
+            return potential_block(ordered, slice(r.start, r.stop), slice(c.start, c.stop))
+
+        # Clusters further apart than this have no near-integrated pairs, so
+        # ACA can sample them with the bare point-charge kernel.
+        near_reach = NEAR_DIAGONALS * float(panels.diagonal.max(initial=0.0))
+
+        def far_entries(r: range, c: range) -> np.ndarray:
+            d = ordered.center[r.start : r.stop, None, :] - ordered.center[None, c.start : c.stop, :]
+            return COULOMB_K * ordered.area[c.start : c.stop] / np.sqrt(np.einsum("ijk,ijk->ij", d, d))
+
+        tree = self.tree
+        stack = [(0, 0)]
+        while stack:
+            a, b = stack.pop()
+            r0, r1, c0, c1 = tree.start[a], tree.stop[a], tree.start[b], tree.stop[b]
+            rows, cols = range(r0, r1), range(c0, c1)
+            if a != b and min(tree.diameter(a), tree.diameter(b)) <= eta * tree.distance(a, b):
+                sample = far_entries if tree.distance(a, b) > near_reach else entries
+                uv = aca(sample, rows, cols, tol, max_rank=min(r1 - r0, c1 - c0) // 2)
+                if uv is not None:
+                    u, v = recompress(uv[0], uv[1], tol)
+                    self.lowrank.append((r0, r1, c0, c1, u.astype(np.float32), v.astype(np.float32)))
+                    continue
+                self.dense.append((r0, r1, c0, c1, entries(rows, cols).astype(np.float32)))
+                continue
+            ka, kb = tree.children[a], tree.children[b]
+            if not ka and not kb:
+                self.dense.append((r0, r1, c0, c1, entries(rows, cols).astype(np.float32)))
+                continue
+            # Split the larger cluster (both, on the diagonal).
+            if a == b:
+                stack.extend((x, y) for x in ka for y in ka)
+            elif ka and (not kb or tree.stop[a] - tree.start[a] >= tree.stop[b] - tree.start[b]):
+                stack.extend((x, b) for x in ka)
+            else:
+                stack.extend((a, y) for y in kb)
+
+        self._build_preconditioner(ordered, precond_size)
+
+    def _build_preconditioner(self, ordered: Panels, precond_size: int) -> None:
+        """Two-level preconditioner on the clusters of at most `precond_size` panels.
+
+        Fine level: the inverted diagonal block of every cluster (block
+        Jacobi). Coarse level: one constant charge density per cluster, with
+        the Galerkin matrix Z^T A Z; A Z is summed block by block from the
+        stored H-matrix, so it costs one pass over the stored entries.
+        """
+        tree = self.tree
+        nodes = tree.cover(precond_size)
+        self.pre_start = np.array([tree.start[k] for k in nodes], dtype=np.int64)
+        self.pre_size = np.array([tree.stop[k] - tree.start[k] for k in nodes], dtype=np.int64)
+        self.block_inv = [
+            np.linalg.inv(potential_block(ordered, slice(r0, r0 + m), slice(r0, r0 + m))).astype(np.float32)
+            for r0, m in zip(self.pre_start.tolist(), self.pre_size.tolist())
+        ]
+
+        cluster = np.repeat(np.arange(len(nodes)), self.pre_size)
+        az = np.zeros((self.size, len(nodes)))
+
+        def column_sums(c0: int, c1: int) -> Tuple[int, int, np.ndarray]:
+            # Block columns are a tree node: inside one cluster or a union of whole clusters.
+            k0, k1 = int(cluster[c0]), int(cluster[c1 - 1]) + 1
+            return k0, k1, np.maximum(self.pre_start[k0:k1] - c0, 0)
+
+        for r0, r1, c0, c1, blk in self.dense:
+            k0, k1, cuts = column_sums(c0, c1)
+            az[r0:r1, k0:k1] += np.add.reduceat(blk, cuts, axis=1)
+        for r0, r1, c0, c1, u, v in self.lowrank:
+            k0, k1, cuts = column_sums(c0, c1)
+            az[r0:r1, k0:k1] += u @ np.add.reduceat(v, cuts, axis=1)
+        self.coarse_inv = np.linalg.inv(np.add.reduceat(az, self.pre_start, axis=0))
+        self.coarse_az = az.astype(np.float32)
+
+    @property
+    def stored(self) -> int:
+        """Matrix entries actually stored (dense entries plus low-rank factors)."""
+        dense = sum(blk.size for *_, blk in self.dense)
+        return dense + sum(u.size + v.size for *_, u, v in self.lowrank)
+
+    @property
+    def max_rank(self) -> int:
+        return max((u.shape[1] for *_, u, _v in self.lowrank), default=0)
+
+    def _permuted_matvec(self, x: np.ndarray) -> np.ndarray:
+        y = np.zeros(x.shape)
+        x = x.astype(np.float32)
+        for r0, r1, c0, c1, blk in self.dense:
+            y[r0:r1] += blk @ x[c0:c1]
+        for r0, r1, c0, c1, u, v in self.lowrank:
+            y[r0:r1] += u @ (v @ x[c0:c1])
+        return y
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        perm = self.tree.perm
+        y = np.empty_like(x)
+        y[perm] = self._permuted_matvec(x[perm])
+        return y
+
+    def precondition(self, x: np.ndarray) -> np.ndarray:
+        """Coarse correction, then block Jacobi on the remaining residual."""
+        perm = self.tree.perm
+        xp = x[perm]
+        c = self.coarse_inv @ np.add.reduceat(xp, self.pre_start, axis=0)
+        rest = xp - self.coarse_az @ c.astype(np.float32)
+        yp = np.repeat(c, self.pre_size, axis=0)
+        for r0, m, inv in zip(self.pre_start.tolist(), self.pre_size.tolist(), self.block_inv):
+            yp[r0 : r0 + m] += inv @ rest[r0 : r0 + m].astype(np.float32)
+        y = np.empty_like(x)
+        y[perm] = yp
+        return y
+
+
+class GmresError(RuntimeError):
+    """GMRES stopped at `max_iter` before reaching the requested residual."""
+
+    def __init__(self, iterations: int, residual: float) -> None:
+        super().__init__(f"GMRES did not converge in {iterations} iterations (relative residual {residual:.3g})")
+        self.iterations = iterations
+        self.residual = residual
+
+
+def gmres(
+    matvec: Callable[[np.ndarray], np.ndarray],
+    b: np.ndarray,
+    precondition: Callable[[np.ndarray], np.ndarray],
+    tol: float = 1e-6,
+    restart: int = 60,
+    max_iter: int = 1000,
+) -> Tuple[np.ndarray, int]:
+    """Right-preconditioned restarted GMRES for one or several right-hand sides.
+
+    `b` is (n,) or (n, k). The k systems run their own Krylov spaces in
+    lockstep, so every step is one `matvec` / `precondition` call on an
+    (n, k) block (far cheaper than k single-vector calls). Returns
+    (x, steps); raises GmresError if a relative residual has not reached
+    `tol` after `max_iter` steps.
+    """
+    rhs = b.reshape(len(b), -1)
+    n, k = rhs.shape
+    x = np.zeros((n, k))
+    b_norm = np.linalg.norm(rhs, axis=0)
+    b_norm[b_norm == 0.0] = 1.0
+    steps = 0
+    while True:
+        r = rhs - matvec(x) if steps else rhs.copy()
+        beta = np.linalg.norm(r, axis=0)
+        cols = np.flatnonzero(beta > tol * b_norm)
+        if not len(cols):
+            return x.reshape(b.shape), steps
+        if steps >= max_iter:
+            raise GmresError(steps, float((beta / b_norm).max()))
+        m = len(cols)
+        q = np.zeros((restart + 1, n, m))
+        h = np.zeros((restart + 1, restart, m))
+        cs = np.zeros((restart, m))
+        sn = np.zeros((restart, m))
+        g = np.zeros((restart + 1, m))
+        g[0] = beta[cols]
+        q[0] = r[:, cols] / beta[cols]
+        # Krylov steps each column needs this cycle (it stops on convergence or breakdown).
+        size = np.full(m, restart)
+        live = np.ones(m, dtype=bool)
+        for j in range(restart):
+            w = matvec(precondition(q[j]))
+            for i in range(j + 1):  # modified Gram-Schmidt
+                h[i, j] = np.einsum("nk,nk->k", q[i], w)
+                w -= h[i, j] * q[i]
+            h_next = np.linalg.norm(w, axis=0)
+            steps += 1
+            # Givens rotations keep h upper triangular and g the residual vector.
+            for i in range(j):
+                h[i, j], h[i + 1, j] = cs[i] * h[i, j] + sn[i] * h[i + 1, j], cs[i] * h[i + 1, j] - sn[i] * h[i, j]
+            den = np.hypot(h[j, j], h_next)
+            den[den == 0.0] = 1.0
+            cs[j], sn[j] = h[j, j] / den, h_next / den
+            h[j, j] = cs[j] * h[j, j] + sn[j] * h_next
+            g[j + 1], g[j] = -sn[j] * g[j], cs[j] * g[j]
+
+            stop = live & ((np.abs(g[j + 1]) <= tol * b_norm[cols]) | (h_next == 0.0))
+            size[stop] = j + 1
+            live &= ~stop
+            if not live.any() or steps >= max_iter:
+                size[live] = j + 1
+                break
+            q[j + 1] = w / np.where(h_next == 0.0, 1.0, h_next)
+
+        y = np.zeros((int(size.max()), m))
+        for c in range(m):
+            s = int(size[c])
+            y[:s, c] = np.linalg.solve(np.triu(h[:s, :s, c]), g[:s, c])
+        x[:, cols] += precondition(np.einsum("jnk,jk->nk", q[: len(y)], y))
+
+
+@dataclass(frozen=True)
+class BemResult:
+    c_eff_F: float  # linear-voltage two-terminal capacitance of the series net
+    c_self_F: float  # whole network at one potential, relative to infinity
+    maxwell_F: np.ndarray  # (groups, groups) Maxwell matrix between runs of the series net
+    net_F: np.ndarray  # (nets, nets) Maxwell matrix between nets
+    panels: int
+    stored_entries: int  # H-matrix storage, in matrix entries
+    max_rank: int
+    iterations: int  # batched GMRES steps (one matvec over all right-hand sides each)
+
+
+def solve_capacitance(
+    table: SegmentTable,
+    width_m: float,
+    groups: int = 8,
+    max_panel_m: Optional[float] = None,
+    tol: float = 1e-4,
+    leaf_size: int = 256,
+    eta: float = 4.0,
+    series_net: int = 0,
+) -> BemResult:
+    """Solve the panelized network for C_eff, the net matrix and a run matrix.
+
+    Every net floats (zero net charge). `series_net` carries the linear
+    potential s - const; the other nets settle at whatever constant
+    potentials make them neutral. The `groups` run matrix splits the series
+    net by arclength, with all other conductors held at zero.
+    """
+    panels = panelize(table, width_m, max_panel_m)
+    hmat = HMatrix(panels, leaf_size=leaf_size, eta=eta, tol=tol)
+    area = panels.area
+    nets = table.nets
+    net = table.net[panels.segment]
+    series = net == series_net
+    groups = max(0, int(groups))
+    group = np.where(series, np.minimum((panels.s * groups).astype(np.int64), groups - 1), groups)
+
+    # Every right-hand side in one batched solve: net k at 1 V (column k of
+    # the net Maxwell matrix), the series net at s, and run g at 1 V.
+    rhs = [(net == k).astype(np.float64) for k in range(nets)]
+    rhs.append(np.where(series, panels.s, 0.0))
+    rhs.extend((group == g).astype(np.float64) for g in range(groups))
+    sigma, iterations = gmres(hmat.matvec, np.stack(rhs, axis=1), hmat.precondition, tol=tol)
+    q_all = sigma * area[:, None]
+
+    q_net = q_all[:, :nets]
+    net_F = np.stack([np.bincount(net, weights=q_net[:, k], minlength=nets) for k in range(nets)], axis=1)
+
+    # Series net at s, then add a constant x_k to every net so all are neutral.
+    q_s = q_all[:, nets]
+    x = np.linalg.solve(net_F, -np.bincount(net, weights=q_s, minlength=nets))
+    q = q_s + q_net @ x
+    c_eff = float(q @ (np.where(series, panels.s, 0.0) + x[net]))
+
+    maxwell = np.zeros((groups, groups))
+    for g in range(groups):
+        maxwell[:, g] = np.bincount(group, weights=q_all[:, nets + 1 + g], minlength=groups + 1)[:groups]
+
+    return BemResult(
+        c_eff_F=c_eff,
+        c_self_F=float(net_F.sum()),
+        maxwell_F=maxwell,
+        net_F=net_F,
+        panels=len(panels),
+        stored_entries=hmat.stored,
+        max_rank=hmat.max_rank,
+        iterations=iterations,
+    )
@@ -0,0 +1,258 @@
+"""On-disk result cache for the Example 12 (BFEM) generator.
+
+Every BFEM helper script shells out to the MoonBit generator, and most of the
+time it asks for a parameter set it has already seen. This module stores the
+generator's outputs keyed on:
+
+- the kind of output (`report` for the `bfem:report:*` key/value set,
+  `conductor-network` for the `bfem:conductor-network:v1` JSON document,
+  `conductor-network-bin` for its binary sidecar),
+- the normalized generator parameters, and
+- a hash of the generator sources (`examples/12-bifilar-electromagnet/*.mbt`
+  and `cad/`), so editing the geometry code invalidates old entries.
+
+Entries are plain files under the cache directory. A cache hit refreshes the
+entry's mtime and the directory is trimmed oldest-first whenever it grows past
+its size budget, which gives an LRU policy without any index file to keep
+consistent across concurrent writers.
+
+The cache directory defaults to `$BFEM_CACHE_DIR`, else `$XDG_CACHE_HOME/bfem`,
+else `~/.cache/bfem`. Scripts expose `--no-cache` to bypass it entirely.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+from bfem_profile import count
+
+CACHE_SCHEMA = "bfem:cache:v1"
+
+KIND_REPORT = "report"
+KIND_CONDUCTOR_NETWORK = "conductor-network"
+KIND_CONDUCTOR_NETWORK_BIN = "conductor-network-bin"
+
+# Entry file suffix per kind; everything else is JSON text.
+_SUFFIXES = {KIND_CONDUCTOR_NETWORK_BIN: ".bin"}
+
+DEFAULT_MAX_MB = 256.0
+
+# Generator args that shape the conductor geometry (and therefore every export).
+NETWORK_PARAM_NAMES = (
+    "innerDiam",
+    "numPairs",
+    "numSegs",
+    "vertTurns",
+    "wireWidth",
+    "wireGap",
+    "nocage",
+    "nocoil",
+    "nowires",
+    "nosupport",
+)
+
+# `--report` additionally depends on the resistivity.
+REPORT_PARAM_NAMES = NETWORK_PARAM_NAMES + ("rho",)
+
+_SOURCE_DIRS = ("examples/12-bifilar-electromagnet", "cad")
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("BFEM_CACHE_DIR")
+    if env:
+        return Path(env)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg) / "bfem"
+    return Path.home() / ".cache" / "bfem"
+
+
+def _source_files(repo: Path) -> Iterable[Path]:
+    for rel in _SOURCE_DIRS:
+        root = repo / rel
+        if not root.is_dir():
+            continue
+        for p in sorted(root.rglob("*")):
+            if p.is_file() and (p.suffix == ".mbt" or p.name == "moon.pkg"):
+                yield p
+    mod = repo / "moon.mod"
+    if mod.is_file():
+        yield mod
+
+
+@functools.lru_cache(maxsize=None)
+def source_fingerprint(repo: Path) -> str:
+    """Hash of the generator sources; changes whenever the geometry code does."""
+    h = hashlib.sha256()
+    for p in _source_files(repo):
+        h.update(p.relative_to(repo).as_posix().encode("utf-8"))
+        h.update(b"\0")
+        h.update(p.read_bytes())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def normalize_params(params: Mapping[str, object]) -> Dict[str, object]:
+    """Canonicalize a generator parameter set so equal geometry hashes equally.
+
+    Flags stay booleans, integers stay integers, and every other number is
+    compared as a float so that e.g. `--wireWidth 1` and `--wireWidth 1.0`
+    share an entry.
+    """
+    out: Dict[str, object] = {}
+    for k in sorted(params):
+        v = params[k]
+        if isinstance(v, bool) or v is None:
+            out[k] = v
+        elif isinstance(v, int):
+            out[k] = v
+        elif isinstance(v, float):
+            out[k] = float(v)
+        else:
+            out[k] = str(v)
+    return out
+
+
+def params_from_args(args: argparse.Namespace, names: Iterable[str] = NETWORK_PARAM_NAMES) -> Dict[str, object]:
+    return {name: getattr(args, name) for name in names}
+
+
+class ResultCache:
+    """Content-addressed store of generator outputs with size-bounded LRU eviction."""
+
+    def __init__(self, root: Path, repo: Path, max_bytes: int, enabled: bool = True) -> None:
+        self.root = root
+        self.repo = repo
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def key(self, kind: str, params: Mapping[str, object]) -> str:
+        doc = {
+            "schema": CACHE_SCHEMA,
+            "kind": kind,
+            "params": normalize_params(params),
+            "source": source_fingerprint(self.repo),
+        }
+        blob = json.dumps(doc, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, kind: str, params: Mapping[str, object]) -> Path:
+        return self.root / f"{kind}-{self.key(kind, params)}{_SUFFIXES.get(kind, '.json')}"
+
+    def get_bytes(self, kind: str, params: Mapping[str, object]) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        path = self._path(kind, params)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            count("cache misses")
+            return None
+        count("cache hits")
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put_bytes(self, kind: str, params: Mapping[str, object], data: bytes) -> None:
+        if not self.enabled:
+            return
+        path = self._path(kind, params)
+        tmp = None
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial entry.
+            fd, tmp = tempfile.mkstemp(dir=str(self.root), prefix=".tmp-", suffix=path.suffix)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # A cache that cannot be written is just a slower run. Eviction
+            # skips dot-files, so a leftover temp file would never be reclaimed.
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            return
+        self._evict()
+
+    def get_text(self, kind: str, params: Mapping[str, object]) -> Optional[str]:
+        data = self.get_bytes(kind, params)
+        return None if data is None else data.decode("utf-8")
+
+    def put_text(self, kind: str, params: Mapping[str, object], text: str) -> None:
+        self.put_bytes(kind, params, text.encode("utf-8"))
+
+    def get_report(self, params: Mapping[str, object]) -> Optional[Dict[str, str]]:
+        text = self.get_text(KIND_REPORT, params)
+        if text is None:
+            return None
+        try:
+            kv = json.loads(text)
+        except ValueError:
+            return None
+        return kv if isinstance(kv, dict) else None
+
+    def put_report(self, params: Mapping[str, object], kv: Mapping[str, str]) -> None:
+        self.put_text(KIND_REPORT, params, json.dumps(dict(kv), sort_keys=True))
+
+    def fetch_file(
+        self,
+        kind: str,
+        params: Mapping[str, object],
+        out_path: Path,
+        produce: Callable[[Path], None],
+    ) -> None:
+        """Materialize a cached output at `out_path`, running `produce` on a miss."""
+        data = self.get_bytes(kind, params)
+        if data is not None:
+            out_path.write_bytes(data)
+            return
+        produce(out_path)
+        if self.enabled:
+            self.put_bytes(kind, params, out_path.read_bytes())
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for p in self.root.glob("*"):
+            if p.name.startswith(".") or p.suffix not in (".json", ".bin"):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+
+
+def add_cache_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--no-cache", action="store_true", help="Always rerun the generator; do not read or write the result cache")
+    p.add_argument("--cache-dir", type=Path, default=None, help="Result cache directory (default: $BFEM_CACHE_DIR or ~/.cache/bfem)")
+    p.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB, help="Result cache size budget in MB (default: 256)")
+
+
+def cache_from_args(args: argparse.Namespace, repo: Path) -> ResultCache:
+    root = args.cache_dir if args.cache_dir is not None else default_cache_dir()
+    max_bytes = int(args.cache_max_mb * 1024 * 1024)
+    return ResultCache(root=root, repo=repo, max_bytes=max_bytes, enabled=not args.no_cache)
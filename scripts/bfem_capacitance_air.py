@@ -1,10 +1,28 @@
 #!/usr/bin/env python3
-"""Air-only *ballpark* effective capacitance estimate for BFEM.
+"""Air-only effective capacitance estimate for BFEM.
 
-This script is a pragmatic first step toward SRF estimation before you have a full
-capacitance solver workflow wired up.
+By default the parallel-plate proxy described below is used: fast (well
+under a second on the default coil) but only a ranking/ballpark tool.
 
-Model (very approximate)
+`--method bem` instead solves the conductor with the built-in
+boundary-element solver (scripts/bfem_bem.py): the square-section wire is
+panelized from the exported centerline and `cross_section.width_mm`, and the
+method-of-moments system (H-matrix / ACA compressed, GMRES) gives
+
+- C_eff for a linear voltage distribution from IN to OUT on a floating coil, and
+- the Maxwell capacitance matrix between `--bem-groups` equal-length runs of
+  the conductor.
+
+No external solver binary is needed, but the default coil is ~90k panels and
+takes about two minutes, so it is opt-in.
+
+Use the BEM C_eff whenever the value itself matters (an SRF, a comparison
+with measurement). Use the proxy to rank variants in sweeps. On the default
+coil the BEM gives 27.8 pF and the proxy 38.1 pF; `--knob-sweep` over `--k`
+against one BEM run lines the proxy up with it (k ~0.26 there). See
+ELECTRICAL-ANALYSIS.md, Step C.
+
+Proxy model (very approximate)
 - Treat the full conductor as a polyline (from `--export_conductor_network`).
 - Consider pairs of *spatially nearby* polyline segments that are nearly parallel
   and *not adjacent in index* (i.e., electrically far-ish).
@@ -27,18 +45,50 @@ c_ij is 0.5*c_ij*(V_i - V_j)^2 with V_i = V*s_i. Therefore:
 
     C_eff ≈ Σ c_ij * (s_i - s_j)^2
 
-This is not a substitute for FastCap/PEEC/FEM, but it gives an actionable
+The proxy is not a substitute for FastCap/PEEC/FEM, but it gives an actionable
 ballpark and helps rank parameter changes (gap/width/turns).
 
+The proxy pair search and per-pair evaluation are vectorized with NumPy (required).
+Segments live in a struct-of-arrays table (scripts/bfem_segments.py) and nearby
+pairs come from a grid index (scripts/bfem_spatial.py) in bounded blocks, so
+memory stays flat on very long networks. `--jobs N` spreads the pair blocks
+over N processes sharing the segment arrays through shared memory; the
+estimate is bit-identical for any N.
+
+On the bundled bfem.inp centerline (10.8k segments, 216k pairs) one
+estimate takes about 0.1 s, against 1.1 s for the original per-pair loop.
+What is left is array work: the 27-cell scan expands about 3.2M candidates
+to find 0.25M pairs within the radius, and the closest-point kernel makes
+some 30 NumPy passes over the pairs that are left.
+
 Usage:
   ./scripts/bfem_capacitance_air.py
   ./scripts/bfem_capacitance_air.py --wireGap 0.1 --wireWidth 1.0
   ./scripts/bfem_capacitance_air.py --search-mm 3.0 --min-index-sep 25
+  ./scripts/bfem_capacitance_air.py --jobs 8
+  ./scripts/bfem_capacitance_air.py --method bem --bem-groups 16
+  ./scripts/bfem_capacitance_air.py --knob-sweep --sweep-search-mm 2,3,4 --sweep-k 0.3,0.35,0.4
 
 Outputs:
 - total length
-- number of interacting segment pairs used
-- C_eff estimate (pF)
+- bem: panel count, C_eff (pF), capacitance to infinity, Maxwell matrix (pF)
+- proxy: number of interacting segment pairs used, C_eff estimate (pF)
+- with several nets: the net-to-net capacitance matrix (pF)
+- --knob-sweep: one proxy row (pairs_used, C_eff) per knob combination
+
+Every path of the export is loaded. Paths are grouped into nets by their
+`net` field (default: the path name). C_eff is for the linear voltage along
+the series net (the one holding `bfem:conductor:series`), and cross-net pairs
+are found in the same pass as pairs within a net.
+
+`--knob-sweep` calibrates the proxy knobs (e.g. against a FastCap reference)
+without one export and grid build per combination: the candidate pairs are
+found once at the largest search radius and smallest index separation, and
+every combination of the `--sweep-*` lists is evaluated in the same pass.
+
+Add `--profile /tmp/cap.json` for a per-stage timing report (see
+scripts/bfem_profile.py), plus `--profile-cprofile /tmp/cap.pstats` to
+cProfile the solve.
 
 Then compute SRF once you have L:
   ./scripts/bfem_resonance.py --L-mH <L> --C-pF <C_eff_pF>
@@ -47,266 +97,424 @@ Then compute SRF once you have L:
 from __future__ import annotations
 
 import argparse
-import json
-import math
-import subprocess
+import itertools
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from bfem_bem import GmresError, solve_capacitance
+from bfem_cache import add_cache_args, cache_from_args, params_from_args
+from bfem_generator import BfemRunError, add_launcher_args, export_conductor_network, launcher_from_args, repo_root
+from bfem_network import NETWORK_SCHEMA, read_network
+from bfem_profile import add_profile_args, count, profiler_from_args, stage
+from bfem_segments import SegmentTable, dot3, network_table, norm3, segment_distances
+from bfem_spatial import CHUNK_PAIRS, GridIndex
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
 
 EPS0_F_PER_M = 8.8541878128e-12
 
+# (shared-memory name, shape, dtype) of an array handed to worker processes.
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+# (partial C_eff, pairs used, candidate pairs, pairs within radius,
+#  (nets, nets) cross-net c_ij sums) of one block.
+BlockSum = Tuple[float, int, int, int, np.ndarray]
 
-@dataclass(frozen=True)
-class Seg:
-    a: Tuple[float, float, float]  # meters
-    b: Tuple[float, float, float]  # meters
-    mid: Tuple[float, float, float]  # meters
-    dir: Tuple[float, float, float]  # unit
-    length_m: float
-    s_mid: float  # normalized arclength position in [0,1]
-
-
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[1]
+# Path whose net carries the IN -> OUT series current.
+SERIES_PATH = "bfem:conductor:series"
 
 
 def _mm_to_m(mm: float) -> float:
     return mm * 1.0e-3
 
 
-def _vsub(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
-    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
-
-
-def _vdot(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
-    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
-
-
-def _vadd(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
-    return (a[0] + b[0], a[1] + b[1], a[2] + b[2])
-
-
-def _vscale(a: Tuple[float, float, float], s: float) -> Tuple[float, float, float]:
-    return (a[0] * s, a[1] * s, a[2] * s)
-
-
-def _vlen(a: Tuple[float, float, float]) -> float:
-    return math.sqrt(_vdot(a, a))
-
-
-def _vunit(a: Tuple[float, float, float]) -> Tuple[float, float, float]:
-    n = _vlen(a)
-    if n == 0:
-        return (0.0, 0.0, 0.0)
-    return (a[0] / n, a[1] / n, a[2] / n)
-
-
-def _clamp(x: float, lo: float, hi: float) -> float:
-    return lo if x < lo else hi if x > hi else x
+@dataclass(frozen=True)
+class Network:
+    paths_m: List[np.ndarray]  # (M, 3) polyline per path, meters
+    path_nets: List[int]  # net id of each path
+    net_names: List[str]
+    series_net: int
+    wire_width_m: float
 
 
-def _segment_distance_m(
-    p1: Tuple[float, float, float],
-    q1: Tuple[float, float, float],
-    p2: Tuple[float, float, float],
-    q2: Tuple[float, float, float],
-) -> float:
-    """Minimum distance between 3D line segments p1-q1 and p2-q2.
+def _load_network(json_path: Path) -> Network:
+    """Read every path of a conductor-network export, tagged by net.
 
-    Based on the standard closest-points-on-segments formula.
+    A path's net is its `net` field if present, otherwise its `name`. The
+    series net is the one holding `bfem:conductor:series` (or paths[0]).
     """
-
-    d1 = _vsub(q1, p1)
-    d2 = _vsub(q2, p2)
-    r = _vsub(p1, p2)
-    a = _vdot(d1, d1)
-    e = _vdot(d2, d2)
-    f = _vdot(d2, r)
-
-    if a <= 1e-18 and e <= 1e-18:
-        return _vlen(_vsub(p1, p2))
-    if a <= 1e-18:
-        t = _clamp(f / e, 0.0, 1.0)
-        c2 = _vadd(p2, _vscale(d2, t))
-        return _vlen(_vsub(p1, c2))
-
-    c = _vdot(d1, r)
-    if e <= 1e-18:
-        s = _clamp(-c / a, 0.0, 1.0)
-        c1 = _vadd(p1, _vscale(d1, s))
-        return _vlen(_vsub(c1, p2))
-
-    b = _vdot(d1, d2)
-    denom = a * e - b * b
-
-    if denom != 0.0:
-        s = _clamp((b * f - c * e) / denom, 0.0, 1.0)
-    else:
-        s = 0.0
-
-    t = (b * s + f) / e
-
-    if t < 0.0:
-        t = 0.0
-        s = _clamp(-c / a, 0.0, 1.0)
-    elif t > 1.0:
-        t = 1.0
-        s = _clamp((b - c) / a, 0.0, 1.0)
-
-    c1 = _vadd(p1, _vscale(d1, s))
-    c2 = _vadd(p2, _vscale(d2, t))
-    return _vlen(_vsub(c1, c2))
-
-
-def _export_network(args: argparse.Namespace, json_path: Path) -> None:
-    repo = _repo_root()
-
-    cmd = [
-        "moon",
-        "run",
-        "--target",
-        "native",
-        "examples/12-bifilar-electromagnet",
-        "--",
-        "--nostep",
-        "--export_conductor_network",
-        str(json_path),
-        "--innerDiam",
-        str(args.innerDiam),
-        "--numPairs",
-        str(args.numPairs),
-        "--numSegs",
-        str(args.numSegs),
-        "--vertTurns",
-        str(args.vertTurns),
-        "--wireWidth",
-        str(args.wireWidth),
-        "--wireGap",
-        str(args.wireGap),
-    ]
-    if args.nocage:
-        cmd.append("--nocage")
-    if args.nocoil:
-        cmd.append("--nocoil")
-    if args.nowires:
-        cmd.append("--nowires")
-    if args.nosupport:
-        cmd.append("--nosupport")
-
-    proc = subprocess.run(cmd, cwd=str(repo), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if proc.returncode != 0:
-        sys.stderr.write(proc.stderr)
-        raise SystemExit(proc.returncode)
-
-
-def _load_series(json_path: Path) -> Tuple[List[Tuple[float, float, float]], Dict[str, float]]:
-    data = json.loads(json_path.read_text(encoding="utf-8"))
-    if data.get("schema") != "bfem:conductor-network:v1":
+    data = read_network(json_path)
+    if data.get("schema") != NETWORK_SCHEMA:
         raise ValueError(f"Unexpected schema: {data.get('schema')}")
 
     params = data.get("params") or {}
-    wire_width_mm = float(params.get("wireWidth_mm"))
+    cross_section = data.get("cross_section") or {}
+    wire_width_mm = float(cross_section.get("width_mm", params.get("wireWidth_mm")))
 
     paths = data.get("paths")
     if not isinstance(paths, list) or not paths:
         raise ValueError("No paths in JSON")
-    pts = paths[0].get("points")
-    if not isinstance(pts, list) or len(pts) < 2:
-        raise ValueError("Path has insufficient points")
-
-    points_m = [(_mm_to_m(float(p[0])), _mm_to_m(float(p[1])), _mm_to_m(float(p[2]))) for p in pts]
-    return points_m, {"wire_width_m": _mm_to_m(wire_width_mm)}
-
-
-def _build_segments(points_m: List[Tuple[float, float, float]]) -> Tuple[List[Seg], float]:
-    seg_lens: List[float] = []
-    for i in range(1, len(points_m)):
-        seg_lens.append(_vlen(_vsub(points_m[i], points_m[i - 1])))
-    total = sum(seg_lens)
-    if total <= 0:
-        raise ValueError("Total length is zero")
-
-    segs: List[Seg] = []
-    s_acc = 0.0
-    for i in range(1, len(points_m)):
-        a = points_m[i - 1]
-        b = points_m[i]
-        d = _vsub(b, a)
-        L = _vlen(d)
-        if L <= 0:
-            continue
-        mid = _vadd(a, _vscale(d, 0.5))
-        s_mid = (s_acc + 0.5 * L) / total
-        segs.append(Seg(a=a, b=b, mid=mid, dir=_vunit(d), length_m=L, s_mid=s_mid))
-        s_acc += L
-    return segs, total
-
-
-def _cell_key(p: Tuple[float, float, float], cell_m: float) -> Tuple[int, int, int]:
-    return (int(math.floor(p[0] / cell_m)), int(math.floor(p[1] / cell_m)), int(math.floor(p[2] / cell_m)))
+    paths_m: List[np.ndarray] = []
+    path_nets: List[int] = []
+    net_names: List[str] = []
+    series_net = None
+    for k, path in enumerate(paths):
+        pts = path.get("points")
+        name = str(path.get("name", f"path{k}"))
+        if pts is None or len(pts) < 2:
+            raise ValueError(f"Path {name} has insufficient points")
+        net = str(path.get("net", name))
+        if net not in net_names:
+            net_names.append(net)
+        path_nets.append(net_names.index(net))
+        if name == SERIES_PATH:
+            series_net = path_nets[-1]
+        paths_m.append(pts * 1.0e-3)
+
+    return Network(
+        paths_m=paths_m,
+        path_nets=path_nets,
+        net_names=net_names,
+        series_net=path_nets[0] if series_net is None else series_net,
+        wire_width_m=_mm_to_m(wire_width_mm),
+    )
+
+
+# Per-block accumulator state, set up once per worker process (see _init_worker).
+_worker: Dict[str, Any] = {}
+
+
+def _share(arrays: Dict[str, np.ndarray], owned: List[shared_memory.SharedMemory]) -> Dict[str, ArraySpec]:
+    """Copy `arrays` into new shared-memory blocks (appended to `owned`)."""
+    specs: Dict[str, ArraySpec] = {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        owned.append(shm)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return specs
+
+
+def _attach(specs: Dict[str, ArraySpec], held: List[shared_memory.SharedMemory]) -> Dict[str, np.ndarray]:
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        held.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return arrays
+
+
+def _init_worker(
+    table_specs: Dict[str, ArraySpec],
+    index_specs: Dict[str, ArraySpec],
+    cell: float,
+    knobs: Dict[str, Any],
+) -> None:
+    held: List[shared_memory.SharedMemory] = []
+    _worker["held"] = held  # keep the mappings alive for the worker's lifetime
+    _worker["table"] = _attach(table_specs, held)
+    _worker["index"] = GridIndex.from_arrays(cell, _attach(index_specs, held))
+    _worker["knobs"] = knobs
+
+
+def _worker_block(bounds: Tuple[int, int]) -> BlockSum:
+    return _block_ceff(_worker["index"], _worker["table"], bounds, **_worker["knobs"])
+
+
+def _block_ceff(
+    index: GridIndex,
+    table: Mapping[str, np.ndarray],
+    bounds: Tuple[int, int],
+    wire_width_m: float,
+    search_m: float,
+    min_index_sep: int,
+    parallel_cos: float,
+    k_factor: float,
+    nets: int,
+    series_net: int,
+) -> BlockSum:
+    """Evaluate the pairs whose first segment lies in `bounds` = [start, stop)."""
+    # The index separation only applies within a net; with several nets the
+    # index yields every pair and the rule is applied below.
+    block = index.block_pairs(bounds[0], bounds[1], search_m, min_index_sep if nets == 1 else 0)
+    a, b, direction = table["a"], table["b"], table["dir"]
+    length, s_mid, net = table["length"], table["s_mid"], table["net"]
+    mutual = np.zeros((nets, nets))
+
+    # Nearly parallel (or anti-parallel).
+    keep = ~(np.abs(dot3(direction.take(block.i, axis=0), direction.take(block.j, axis=0))) < parallel_cos)
+    if nets > 1:
+        keep &= (block.j - block.i > min_index_sep) | (net.take(block.i) != net.take(block.j))
+    i, j = block.i[keep], block.j[keep]
+    if len(i) == 0:
+        return 0.0, 0, block.candidates, len(block), mutual
+
+    d_center = segment_distances(a.take(i, axis=0), b.take(i, axis=0), a.take(j, axis=0), b.take(j, axis=0))
+    gap = np.maximum(d_center - wire_width_m, 1e-6)
+
+    overlap = np.minimum(length.take(i), length.take(j))
+    area = wire_width_m * overlap
+    cij = k_factor * EPS0_F_PER_M * area / gap
+
+    ds = s_mid.take(i) - s_mid.take(j)
+    term = cij * (ds * ds)
+    # Sequential sum in grid-walk order (segment, neighbour cell, bucket
+    # position); see PairBlock.walk_order.
+    walk = np.argsort(i, kind="stable")
+    if nets == 1:
+        partial = float(np.cumsum(term[walk])[-1])
+    else:
+        net_i, net_j = net.take(i)[walk], net.take(j)[walk]
+        series = (net_i == series_net) & (net_j == series_net)
+        partial = float(np.cumsum(np.where(series, term[walk], 0.0))[-1])
+        cross = net_i != net_j
+        mutual += np.bincount(
+            net_i[cross] * nets + net_j[cross], weights=cij[walk][cross], minlength=nets * nets
+        ).reshape(nets, nets)
+    return partial, len(i), block.candidates, len(block), mutual
+
+
+@dataclass(frozen=True)
+class NetworkEstimate:
+    ceff_F: float  # linear-voltage C_eff of the series net
+    pairs: int  # pairs used, within and across nets
+    net_matrix_F: np.ndarray  # (nets, nets) Maxwell-form net-to-net matrix
 
 
 def estimate_ceff_air(
-    segs: List[Seg],
+    table: SegmentTable,
     wire_width_m: float,
     search_m: float,
     min_index_sep: int,
     parallel_cos: float,
     k_factor: float,
+    chunk_pairs: int = CHUNK_PAIRS,
+    jobs: int = 1,
 ) -> Tuple[float, int]:
-    """Return (C_eff_F, pair_count_used)."""
+    """Return (C_eff_F, pair_count_used); see `estimate_network_air`."""
+    est = estimate_network_air(
+        table, wire_width_m, search_m, min_index_sep, parallel_cos, k_factor, chunk_pairs=chunk_pairs, jobs=jobs
+    )
+    return est.ceff_F, est.pairs
 
-    cell_m = search_m
-    grid: Dict[Tuple[int, int, int], List[int]] = {}
-    for i, s in enumerate(segs):
-        key = _cell_key(s.mid, cell_m)
-        grid.setdefault(key, []).append(i)
+
+def estimate_network_air(
+    table: SegmentTable,
+    wire_width_m: float,
+    search_m: float,
+    min_index_sep: int,
+    parallel_cos: float,
+    k_factor: float,
+    series_net: int = 0,
+    chunk_pairs: int = CHUNK_PAIRS,
+    jobs: int = 1,
+) -> NetworkEstimate:
+    """Proxy C_eff of the series net plus the net-to-net capacitance matrix.
+
+    Segment midpoints are indexed in a grid of `search_m` cells
+    (scripts/bfem_spatial.py) and every pair within the search radius and
+    more than `min_index_sep` segments apart is evaluated, one block of home
+    segments at a time. Each block's contributions are summed in
+    segment-by-segment grid-walk order, and the block sums are then added in
+    block order.
+
+    With `jobs` > 1 the blocks are spread over a process pool that reads the
+    segment table and grid index from shared memory. The blocks and the
+    reduction order depend only on `chunk_pairs`, so the result is the same
+    to the last bit for any number of jobs.
+
+    With several nets (scripts/bfem_segments.py `network_table`), pairs on
+    different nets are always kept, whatever their index separation, and
+    are found in the same single pass. Only pairs within `series_net`
+    contribute to C_eff. The cross-net c_ij sums form the net matrix in
+    Maxwell form: off-diagonal -C_ab, diagonal the row sum of the mutual
+    terms (the proxy has no capacitance to infinity).
+    """
+
+    nets = table.nets
+    if len(table) == 0:
+        return NetworkEstimate(0.0, 0, np.zeros((nets, nets)))
+    columns = {k: getattr(table, k) for k in ("a", "b", "dir", "length", "s_mid", "net")}
+    knobs = dict(
+        wire_width_m=wire_width_m,
+        search_m=search_m,
+        min_index_sep=min_index_sep,
+        parallel_cos=parallel_cos,
+        k_factor=k_factor,
+        nets=nets,
+        series_net=series_net,
+    )
+    index = GridIndex(table.mid, search_m)
+    blocks = index.blocks(chunk_pairs)
+    if jobs <= 1 or len(blocks) <= 1:
+        sums = [_block_ceff(index, columns, bounds, **knobs) for bounds in blocks]
+    else:
+        owned: List[shared_memory.SharedMemory] = []
+        try:
+            initargs = (_share(columns, owned), _share(index.arrays(), owned), index.cell, knobs)
+            workers = min(jobs, len(blocks))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                # map() hands results back in block order, whichever worker ran them.
+                sums = list(pool.map(_worker_block, blocks, chunksize=max(1, len(blocks) // (4 * workers))))
+        finally:
+            for shm in owned:
+                shm.close()
+                shm.unlink()
 
     ceff = 0.0
-    pairs = 0
+    pairs = candidates = in_radius = 0
+    mutual = np.zeros((nets, nets))
+    for partial, used, examined, near, block_mutual in sums:
+        ceff += partial
+        pairs += used
+        candidates += examined
+        in_radius += near
+        mutual += block_mutual
+    mutual += mutual.T
+    net_matrix = np.diag(mutual.sum(axis=1)) - mutual
+
+    count("grid cells", index.cells)
+    count("pair blocks", len(blocks))
+    count("candidate pairs", candidates)
+    count("pairs within radius", in_radius)
+    count("pairs accepted", pairs)
+    return NetworkEstimate(ceff, pairs, net_matrix)
 
-    for i, si in enumerate(segs):
-        kx, ky, kz = _cell_key(si.mid, cell_m)
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                for dz in (-1, 0, 1):
-                    bucket = grid.get((kx + dx, ky + dy, kz + dz))
-                    if not bucket:
-                        continue
-                    for j in bucket:
-                        if j <= i:
-                            continue
-                        if abs(j - i) <= min_index_sep:
-                            continue
-                        sj = segs[j]
 
-                        # Cheap midpoint radius cull.
-                        if _vlen(_vsub(si.mid, sj.mid)) > search_m:
-                            continue
+@dataclass(frozen=True)
+class KnobResult:
+    search_m: float
+    min_index_sep: int
+    parallel_cos: float
+    k_factor: float
+    ceff_F: float
+    pairs: int
+
+
+def estimate_ceff_grid(
+    table: SegmentTable,
+    wire_width_m: float,
+    search_ms: Sequence[float],
+    min_index_seps: Sequence[int],
+    parallel_coss: Sequence[float],
+    k_factors: Sequence[float],
+    series_net: int = 0,
+    chunk_pairs: int = CHUNK_PAIRS,
+) -> List[KnobResult]:
+    """Proxy C_eff for every knob combination, from one pass over the pairs.
+
+    Candidates come from a grid index at the largest radius and smallest
+    index separation; each pair's c_ij / k is computed once and the
+    per-setting sums are masked reductions over it. Rows are in
+    itertools.product order of the four lists. pair counts match separate
+    `estimate_ceff_air` runs exactly; C_eff agrees to rounding (terms are
+    summed per setting in block order rather than in grid-walk order).
+    Several nets are handled as in `estimate_network_air`.
+    """
+    radii = np.asarray(search_ms, dtype=np.float64)
+    seps = np.asarray(min_index_seps, dtype=np.int64)
+    coss = np.asarray(parallel_coss, dtype=np.float64)
+    sums = np.zeros((len(radii), len(seps), len(coss)))
+    pairs = np.zeros(sums.shape, dtype=np.int64)
+
+    if len(table) and sums.size:
+        a, b, direction, mid = table.a, table.b, table.dir, table.mid
+        length, s_mid, net = table.length, table.s_mid, table.net
+        multi = table.nets > 1
+        index = GridIndex(mid, float(radii.max()))
+        blocks = 0
+        for block in index.pair_blocks(float(radii.max()), 0 if multi else max(0, int(seps.min())), chunk_pairs):
+            blocks += 1
+            cos = np.abs(dot3(direction.take(block.i, axis=0), direction.take(block.j, axis=0)))
+            keep = ~(cos < coss.min())
+            i, j, cos = block.i[keep], block.j[keep], cos[keep]
+            if len(i) == 0:
+                continue
+
+            d_center = segment_distances(a.take(i, axis=0), b.take(i, axis=0), a.take(j, axis=0), b.take(j, axis=0))
+            gap = np.maximum(d_center - wire_width_m, 1e-6)
+            overlap = np.minimum(length.take(i), length.take(j))
+            ds = s_mid.take(i) - s_mid.take(j)
+            base = EPS0_F_PER_M * (wire_width_m * overlap) / gap * (ds * ds)
+
+            # Same tests as estimate_network_air, one row per knob value.
+            d_mid = norm3(mid.take(i, axis=0) - mid.take(j, axis=0))
+            in_radius = ~(d_mid[None, :] > radii[:, None])
+            far = (j - i)[None, :] > seps[:, None]
+            if multi:
+                net_i, net_j = net.take(i), net.take(j)
+                far |= (net_i != net_j)[None, :]
+                base = np.where((net_i == series_net) & (net_j == series_net), base, 0.0)
+            parallel = (~(cos[None, :] < coss[:, None])).astype(np.float64)
+            for r, s in itertools.product(range(len(radii)), range(len(seps))):
+                used = in_radius[r] & far[s]
+                sums[r, s] += parallel @ np.where(used, base, 0.0)
+                pairs[r, s] += (parallel @ used).astype(np.int64)
+        count("grid cells", index.cells)
+        count("pair blocks", blocks)
+
+    results: List[KnobResult] = []
+    for (r, radius), (s, sep), (c, cos_min), k in itertools.product(
+        enumerate(radii), enumerate(seps), enumerate(coss), k_factors
+    ):
+        results.append(
+            KnobResult(
+                search_m=float(radius),
+                min_index_sep=int(sep),
+                parallel_cos=float(cos_min),
+                k_factor=float(k),
+                ceff_F=float(k) * float(sums[r, s, c]),
+                pairs=int(pairs[r, s, c]),
+            )
+        )
+    return results
+
+
+def print_knob_table(results: List[KnobResult]) -> None:
+    header = "  search_mm min_index_sep parallel_cos      k | pairs_used  C_eff_pF"
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for r in results:
+        print(
+            "  "
+            f"{r.search_m*1e3:>9.4g} {r.min_index_sep:>13} {r.parallel_cos:>12.4g} {r.k_factor:>6.3g}"
+            " | "
+            f"{r.pairs:>10} {r.ceff_F*1e12:>9.4g}"
+        )
 
-                        # Nearly parallel (or anti-parallel).
-                        if abs(_vdot(si.dir, sj.dir)) < parallel_cos:
-                            continue
 
-                        d_center = _segment_distance_m(si.a, si.b, sj.a, sj.b)
-                        gap = max(d_center - wire_width_m, 1e-6)
+def print_matrix_pF(matrix: np.ndarray, labels: Optional[List[str]] = None) -> None:
+    for k, row in enumerate(matrix):
+        label = f" {labels[k]}" if labels else ""
+        print("  " + " ".join(f"{c*1e12:10.4g}" for c in row) + label)
 
-                        overlap = min(si.length_m, sj.length_m)
-                        area = wire_width_m * overlap
-                        cij = k_factor * EPS0_F_PER_M * area / gap
 
-                        ds = si.s_mid - sj.s_mid
-                        ceff += cij * (ds * ds)
-                        pairs += 1
+def _parse_csv_ints(s: Optional[str], default: int) -> List[int]:
+    if not s:
+        return [default]
+    return [int(x.strip()) for x in s.split(",") if x.strip()]
 
-    return ceff, pairs
+
+def _parse_csv_floats(s: Optional[str], default: float) -> List[float]:
+    if not s:
+        return [default]
+    return [float(x.strip()) for x in s.split(",") if x.strip()]
 
 
 def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(description="Estimate air-only effective capacitance of BFEM (ballpark).")
+    p = argparse.ArgumentParser(description="Estimate air-only effective capacitance of BFEM (boundary-element solve or ballpark proxy).")
 
     # Mirror key generator args.
     p.add_argument("--innerDiam", type=float, default=6.0)
@@ -321,42 +529,155 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--nowires", action="store_true")
     p.add_argument("--nosupport", action="store_true")
 
-    # Estimator knobs.
+    p.add_argument(
+        "--method",
+        choices=("bem", "proxy"),
+        default="proxy",
+        help="proxy: parallel-plate pair sum (default); bem: boundary-element solve (minutes on the default coil)",
+    )
+
+    # Boundary-element solver knobs.
+    p.add_argument("--bem-groups", type=int, default=8, help="Conductor runs in the Maxwell matrix (0: C_eff only)")
+    p.add_argument("--bem-panel-mm", type=float, default=None, help="Max panel length along the wire (default: wire width)")
+    p.add_argument("--bem-tol", type=float, default=1e-4, help="ACA compression and GMRES relative tolerance")
+
+    # Proxy estimator knobs.
     p.add_argument("--search-mm", type=float, default=3.0, help="Neighbor search radius (mm)")
     p.add_argument("--min-index-sep", type=int, default=50, help="Ignore pairs closer than this many segments in the polyline")
     p.add_argument("--parallel-cos", type=float, default=0.95, help="Min |cos(theta)| for segments to be considered parallel")
     p.add_argument("--k", type=float, default=0.35, help="Fudge factor multiplying eps0*A/gap")
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Processes to split the proxy pair accumulation across (default: 1; result is identical for any value)",
+    )
+
+    p.add_argument(
+        "--knob-sweep",
+        action="store_true",
+        help="Evaluate the proxy for every combination of the --sweep-* lists in one pass and print a table.",
+    )
+    for name, example in [
+        ("search-mm", "2,3,4"),
+        ("min-index-sep", "25,50"),
+        ("parallel-cos", "0.9,0.95"),
+        ("k", "0.3,0.35,0.4"),
+    ]:
+        p.add_argument(
+            f"--sweep-{name}",
+            type=str,
+            default=None,
+            help=f"Comma-separated list, e.g. '{example}'. Defaults to the current --{name}.",
+        )
 
     p.add_argument("--dump-json", action="store_true", help="Print the exported JSON path")
+    add_cache_args(p)
+    add_launcher_args(p)
+    add_profile_args(p, hot_stage="estimate")
 
     return p
 
 
 def main() -> None:
     args = build_parser().parse_args()
+    with profiler_from_args(args, "bfem_capacitance_air"):
+        run(args)
 
+
+def run(args: argparse.Namespace) -> None:
     with tempfile.TemporaryDirectory(prefix="bfem_cap_air_") as td:
-        json_path = Path(td) / "bfem_conductor_network.json"
-        _export_network(args, json_path)
-
-        points_m, meta = _load_series(json_path)
-        segs, total_len = _build_segments(points_m)
-
-        ceff, pairs = estimate_ceff_air(
-            segs,
-            wire_width_m=meta["wire_width_m"],
-            search_m=_mm_to_m(args.search_mm),
-            min_index_sep=int(args.min_index_sep),
-            parallel_cos=float(args.parallel_cos),
-            k_factor=float(args.k),
-        )
+        # The binary sidecar loads without parsing a point list; JSON only when asked to show it.
+        suffix = ".json" if args.dump_json else ".bin"
+        json_path = Path(td) / f"bfem_conductor_network{suffix}"
+        repo = repo_root()
+        try:
+            with stage("export"):
+                export_conductor_network(
+                    launcher_from_args(args, repo),
+                    cache_from_args(args, repo),
+                    params_from_args(args),
+                    json_path,
+                )
+        except BfemRunError as e:
+            sys.stderr.write(e.stderr)
+            raise SystemExit(e.returncode)
+
+        with stage("network load"):
+            network = _load_network(json_path)
+        with stage("build segments"):
+            table = network_table(network.paths_m, network.path_nets)
+        count("paths", len(network.paths_m))
+        count("points", sum(len(p) for p in network.paths_m))
+        count("segments", len(table))
+
+        with stage("estimate"):
+            if args.knob_sweep:
+                knobs = estimate_ceff_grid(
+                    table,
+                    wire_width_m=network.wire_width_m,
+                    series_net=network.series_net,
+                    search_ms=[_mm_to_m(r) for r in _parse_csv_floats(args.sweep_search_mm, args.search_mm)],
+                    min_index_seps=_parse_csv_ints(args.sweep_min_index_sep, args.min_index_sep),
+                    parallel_coss=_parse_csv_floats(args.sweep_parallel_cos, args.parallel_cos),
+                    k_factors=_parse_csv_floats(args.sweep_k, args.k),
+                )
+            elif args.method == "bem":
+                try:
+                    bem = solve_capacitance(
+                        table,
+                        width_m=network.wire_width_m,
+                        groups=int(args.bem_groups),
+                        max_panel_m=_mm_to_m(args.bem_panel_mm) if args.bem_panel_mm else None,
+                        tol=float(args.bem_tol),
+                        series_net=network.series_net,
+                    )
+                except GmresError as e:
+                    sys.stderr.write(
+                        f"bem: GMRES stopped after {e.iterations} iterations at relative residual {e.residual:.3g}"
+                        f" (--bem-tol {args.bem_tol:g}); try --method proxy or a coarser --bem-panel-mm\n"
+                    )
+                    raise SystemExit(1)
+                count("panels", bem.panels)
+                count("hmatrix entries", bem.stored_entries)
+                count("gmres iterations", bem.iterations)
+            else:
+                proxy = estimate_network_air(
+                    table,
+                    wire_width_m=network.wire_width_m,
+                    search_m=_mm_to_m(args.search_mm),
+                    min_index_sep=int(args.min_index_sep),
+                    parallel_cos=float(args.parallel_cos),
+                    k_factor=float(args.k),
+                    series_net=network.series_net,
+                    jobs=max(1, args.jobs),
+                )
 
         if args.dump_json:
             print(f"json: {json_path}")
 
-    print(f"segments: {len(segs)}")
-    print(f"length_total: {total_len:.6g} m")
-    print(f"pairs_used: {pairs}")
+    print(f"segments: {len(table)}")
+    print(f"length_total: {table.total_length:.6g} m")
+    if table.nets > 1:
+        print(f"nets: {table.nets} (series: {network.net_names[network.series_net]})")
+    if args.knob_sweep:
+        print_knob_table(knobs)
+        return
+    if args.method == "bem":
+        print(f"panels: {bem.panels}")
+        print(f"hmatrix_fill: {bem.stored_entries / bem.panels**2:.3g} (max rank {bem.max_rank})")
+        print(f"C_self_est: {bem.c_self_F*1e12:.6g} pF")
+        ceff, net_F = bem.c_eff_F, bem.net_F
+        if len(bem.maxwell_F):
+            print("maxwell_pF:")
+            print_matrix_pF(bem.maxwell_F)
+    else:
+        print(f"pairs_used: {proxy.pairs}")
+        ceff, net_F = proxy.ceff_F, proxy.net_matrix_F
+    if table.nets > 1:
+        print("net_matrix_pF:")
+        print_matrix_pF(net_F, network.net_names)
     print(f"C_eff_air_est: {ceff:.6g} F")
     print(f"C_eff_air_est: {ceff*1e12:.6g} pF")
 
@@ -19,18 +19,61 @@ Example:
 
 Then run FastHenry2 (on Linux Mint is recommended):
   fasthenry /tmp/bfem.inp
+
+Long, nearly straight runs (cage, exit wires) can be coalesced before the deck
+is written with `--simplify-tol-mm 0.005`: consecutive segments are merged
+while every dropped point stays within the tolerance of the merged segment,
+and the node reduction and geometric error are reported.
+
+Filament subdivision follows the skin depth at `--fmax` unless `--nhinc` /
+`--nwinc` are given: a cross-section dimension wider than `--skin-depths` skin
+depths is split into an odd number of filaments that shrink by
+`--filament-ratio` towards the faces until the outermost is at most one skin
+depth thick. The total filament count is printed before the deck is written,
+so accuracy can be traded against solver time up front.
+
+With `--run` the script also solves the deck: the `--fmin/--fmax/--ndec`
+sweep is split into `--bands` frequency bands, each solved by its own
+FastHenry process (`--fasthenry`, default `fasthenry` on PATH) in its own
+working directory, at most `--jobs` at a time. The bands' `Zc.mat` files are
+merged into one R(f)/L(f) table:
+  ./scripts/bfem_fasthenry.py --out-inp /tmp/bfem.inp --fmin 1e3 --fmax 1e7 --ndec 4 --run -j 4
+
+The deck is streamed to disk line by line, so memory does not grow with the
+network size. Name the output `*.inp.gz` to write it gzip-compressed
+(decompress before handing it to FastHenry2).
 """
 
 from __future__ import annotations
 
 import argparse
-import json
+import contextlib
+import gzip
+import math
+import os
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from bfem_cache import add_cache_args, cache_from_args, params_from_args
+from bfem_generator import BfemRunError, add_launcher_args, export_conductor_network, launcher_from_args, repo_root
+from bfem_network import NETWORK_SCHEMA, read_network
+from bfem_parse_fasthenry_zc import ZcSweep, merge_sweeps, parse_zc_matrices, print_rl_table, save_npz
+from bfem_profile import add_profile_args, count, profiler_from_args, stage
+from bfem_segments import norm3, simplify_polyline
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
 
 
 @dataclass(frozen=True)
@@ -40,67 +83,110 @@ class Point3:
     z_mm: float
 
 
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[1]
-
-
-def _run_export_conductor_network(args: argparse.Namespace, json_path: Path) -> None:
-    repo = _repo_root()
-
-    cmd = [
-        "moon",
-        "run",
-        "--target",
-        "native",
-        "examples/12-bifilar-electromagnet",
-        "--",
-        "--export_conductor_network",
-        str(json_path),
-        "--nocoil" if args.nocoil else "",
-        "--nocage" if args.nocage else "",
-        "--nowires" if args.nowires else "",
-        "--nosupport" if args.nosupport else "",
-        "--numPairs",
-        str(args.numPairs),
-        "--vertTurns",
-        str(args.vertTurns),
-        "--wireWidth",
-        str(args.wireWidth),
-        "--wireGap",
-        str(args.wireGap),
-        "--innerDiam",
-        str(args.innerDiam),
-        "--numSegs",
-        str(args.numSegs),
-    ]
-    cmd = [c for c in cmd if c]
-
-    proc = subprocess.run(
-        cmd,
-        cwd=str(repo),
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=False,
-    )
-    if proc.returncode != 0:
-        sys.stderr.write(proc.stderr)
-        raise SystemExit(proc.returncode)
-
-
 def _mm_to_m(mm: float) -> float:
     return mm * 1.0e-3
 
 
 def _load_centerlines(path: Path) -> Dict[str, Any]:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    if data.get("schema") != "bfem:conductor-network:v1":
+    data = read_network(path)
+    if data.get("schema") != NETWORK_SCHEMA:
         raise ValueError(f"Unexpected schema: {data.get('schema')}")
     if data.get("units") != "mm":
         raise ValueError(f"Unexpected units: {data.get('units')}")
     return data
 
 
+@dataclass(frozen=True)
+class Simplification:
+    nodes_in: int
+    nodes_out: int
+    max_dev_mm: float  # largest distance of a dropped point from its replacement chord
+    length_in_mm: float
+    length_out_mm: float
+
+
+def _polyline_length(pts: np.ndarray) -> float:
+    return float(norm3(np.diff(pts, axis=0)).sum())
+
+
+def simplify_series(data: Dict[str, Any], tol_mm: float) -> Simplification:
+    """Coalesce nearly collinear segments of the series path in place.
+
+    Points within `tol_mm` of a straight chord are dropped (see
+    `simplify_polyline`), so helix curvature above the tolerance survives.
+    The path ends and the points nearest the IN/OUT terminals are always
+    kept.
+    """
+    path = data["paths"][0]
+    pts = np.asarray(path["points"], dtype=np.float64)[:, :3]
+    pinned = []
+    for t in data.get("terminals", []) or []:
+        p = t.get("point") if isinstance(t, dict) else None
+        if isinstance(p, list) and len(p) == 3:
+            d = norm3(pts - np.asarray(p, dtype=np.float64))
+            k = int(np.argmin(d))
+            if d[k] <= tol_mm:
+                pinned.append(k)
+    keep, max_dev = simplify_polyline(pts, tol_mm, pinned)
+    out = pts[keep]
+    path["points"] = out
+    return Simplification(
+        nodes_in=len(pts),
+        nodes_out=len(out),
+        max_dev_mm=max_dev,
+        length_in_mm=_polyline_length(pts),
+        length_out_mm=_polyline_length(out),
+    )
+
+
+MU0_H_PER_M = 4.0e-7 * math.pi
+
+
+def skin_depth_m(sigma_s_per_m: float, f_hz: float) -> float:
+    """Skin depth of a non-magnetic conductor at `f_hz` (infinite at DC)."""
+    if f_hz <= 0.0:
+        return math.inf
+    return 1.0 / math.sqrt(math.pi * f_hz * MU0_H_PER_M * sigma_s_per_m)
+
+
+@dataclass(frozen=True)
+class FilamentSplit:
+    inc: int  # filaments across the dimension
+    ratio: Optional[float]  # FastHenry rh/rw: size ratio of adjacent filaments, edges smallest (None: solver default)
+    edge_m: Optional[float]  # thickness of the outermost filaments, when known
+
+
+def _split_dimension(size_m: float, delta_m: float, skin_depths: float, ratio: float, max_inc: int) -> FilamentSplit:
+    """Pick an odd filament count whose edge filaments are no thicker than one skin depth.
+
+    A dimension within `skin_depths` skin depths carries current nearly
+    uniformly and stays one filament. Otherwise filaments shrink
+    geometrically by `ratio` towards both faces, where the current crowds;
+    with 2m+1 filaments the edge one is size / (2 (r^m - 1) / (r - 1) + r^m),
+    or size / (2m + 1) for uniform filaments (r = 1). `ratio` must be >= 1.
+    A `max_inc` below 3 leaves no room for a split.
+    """
+    if size_m <= skin_depths * delta_m or max_inc < 3:
+        return FilamentSplit(1, 1.0, size_m)
+    m = 1
+    while True:
+        grow = ratio**m
+        if ratio == 1.0:
+            edge = size_m / (2 * m + 1)
+        else:
+            edge = size_m / (2.0 * (grow - 1.0) / (ratio - 1.0) + grow)
+        if edge <= delta_m or 2 * (m + 1) + 1 > max_inc:
+            return FilamentSplit(2 * m + 1, ratio, edge)
+        m += 1
+
+
+def _format_split(prefix: str, split: FilamentSplit) -> str:
+    out = f"n{prefix}inc={split.inc}"
+    if split.inc > 1 and split.ratio is not None:
+        out += f" r{prefix}={_format_float(split.ratio)}"
+    return out
+
+
 def _sanitize_name(name: str) -> str:
     # FastHenry node/seg names are simplest if alnum+underscore.
     out = []
@@ -118,28 +204,30 @@ def _format_float(v: float) -> str:
     return f"{v:.12g}"
 
 
-def build_fasthenry_deck(
+# Points converted to Python floats per batch while streaming the deck.
+_STREAM_POINTS = 4096
+
+
+def iter_fasthenry_deck(
     data: Dict[str, Any],
     sigma_s_per_m: float,
-    nhinc: int,
-    nwinc: int,
+    h_split: FilamentSplit,
+    w_split: FilamentSplit,
     fmin_hz: float,
     fmax_hz: float,
     ndec: int,
-) -> str:
+) -> Iterator[str]:
+    """Yield the deck one line at a time (without newlines).
+
+    Nodes and elements are generated straight from the point array, so the
+    deck is never held in memory as a whole. Every segment shares the export's
+    single cross-section, so the filament split goes on the `.default` line.
+    """
     cs = data.get("cross_section", {})
     width_mm = float(cs.get("width_mm"))
     w_m = _mm_to_m(width_mm)
     h_m = w_m
 
-    lines: List[str] = []
-    lines.append("* bfem FastHenry2 deck generated by scripts/bfem_fasthenry.py")
-    lines.append(".units m")
-    lines.append(
-        f".default sigma={_format_float(sigma_s_per_m)} w={_format_float(w_m)} h={_format_float(h_m)} nhinc={nhinc} nwinc={nwinc}"
-    )
-    lines.append("")
-
     paths = data.get("paths", [])
     if not isinstance(paths, list) or not paths:
         raise ValueError("No paths found in conductor-network JSON")
@@ -147,34 +235,131 @@ def build_fasthenry_deck(
     name = str(path.get("name", "bfem:conductor:series"))
     safe = _sanitize_name(name)
     pts = path.get("points")
-    if not isinstance(pts, list) or len(pts) < 2:
+    if pts is None or len(pts) < 2:
         raise ValueError("Series path must have at least 2 points")
+    n = len(pts)
+
+    yield "* bfem FastHenry2 deck generated by scripts/bfem_fasthenry.py"
+    yield ".units m"
+    yield (
+        f".default sigma={_format_float(sigma_s_per_m)} w={_format_float(w_m)} h={_format_float(h_m)}"
+        f" {_format_split('h', h_split)} {_format_split('w', w_split)}"
+    )
+    yield ""
 
-    node_names: List[str] = []
-    for i, p in enumerate(pts):
-        x_mm, y_mm, z_mm = float(p[0]), float(p[1]), float(p[2])
-        node = f"N_{safe}_{i}"
-        node_names.append(node)
-        lines.append(
-            f"{node} x={_format_float(_mm_to_m(x_mm))} y={_format_float(_mm_to_m(y_mm))} z={_format_float(_mm_to_m(z_mm))}"
-        )
+    for start in range(0, n, _STREAM_POINTS):
+        for i, p in enumerate(pts[start : start + _STREAM_POINTS].tolist(), start):
+            x_mm, y_mm, z_mm = float(p[0]), float(p[1]), float(p[2])
+            yield (
+                f"N_{safe}_{i} x={_format_float(_mm_to_m(x_mm))} y={_format_float(_mm_to_m(y_mm))} z={_format_float(_mm_to_m(z_mm))}"
+            )
 
-    for i in range(1, len(node_names)):
-        seg = f"E_{safe}_{i-1}_{i}"
-        lines.append(f"{seg} {node_names[i-1]} {node_names[i]}")
+    for i in range(1, n):
+        yield f"E_{safe}_{i-1}_{i} N_{safe}_{i-1} N_{safe}_{i}"
 
     # Single external between endpoints. Exporter ensures endpoints correspond
     # to IN and OUT terminal points.
-    lines.append("")
-    lines.append(f".external {node_names[0]} {node_names[-1]} BFEM_IN_OUT")
+    yield ""
+    yield f".external N_{safe}_0 N_{safe}_{n - 1} BFEM_IN_OUT"
+
+    yield f".freq fmin={_format_float(fmin_hz)} fmax={_format_float(fmax_hz)} ndec={ndec}"
+    yield ".end"
+
+
+def build_fasthenry_deck(data: Dict[str, Any], **kwargs: Any) -> str:
+    """Return the whole deck as one string (see `iter_fasthenry_deck`)."""
+    return "".join(f"{line}\n" for line in iter_fasthenry_deck(data, **kwargs))
+
+
+def _open_deck(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8", newline="\n")
+    return path.open("w", encoding="utf-8", newline="\n")
+
+
+def write_fasthenry_deck(path: Path, data: Dict[str, Any], **kwargs: Any) -> None:
+    """Stream the deck to `path`, gzip-compressed when the name ends in `.gz`.
+
+    The input is validated before `path` is opened, so a bad network never
+    truncates an existing deck.
+    """
+    lines = iter_fasthenry_deck(data, **kwargs)
+    # The generator checks its input before yielding the first line.
+    first = next(lines)
+    with _open_deck(path) as f:
+        f.write(f"{first}\n")
+        f.writelines(f"{line}\n" for line in lines)
+
+
+class FastHenryRunError(RuntimeError):
+    """A FastHenry band run exited with a non-zero status."""
+
+    def __init__(self, band_dir: Path, returncode: int, log_tail: str) -> None:
+        super().__init__(f"fasthenry exited with status {returncode} in {band_dir}")
+        self.returncode = returncode
+        self.log_tail = log_tail
 
-    lines.append(
-        f".freq fmin={_format_float(fmin_hz)} fmax={_format_float(fmax_hz)} ndec={ndec}"
-    )
-    lines.append(".end")
-    lines.append("")
 
-    return "\n".join(lines)
+def frequency_bands(fmin_hz: float, fmax_hz: float, ndec: int, bands: int) -> List[Tuple[float, float]]:
+    """Split a `.freq fmin fmax ndec` sweep into contiguous (fmin, fmax) bands.
+
+    FastHenry steps from fmin by factors of 10^(1/ndec) up to fmax. The bands
+    cut that same grid into consecutive runs of points, so with the same
+    `ndec` every band solves exactly the frequencies of the full sweep, each
+    point once. A sweep starting at DC (fmin <= 0) has no logarithmic grid
+    to cut and stays one band.
+    """
+    if fmax_hz <= fmin_hz or fmin_hz <= 0.0:
+        return [(fmin_hz, fmax_hz)]
+    points = int(math.floor(ndec * math.log10(fmax_hz / fmin_hz) + 1e-9)) + 1
+    freqs = [fmin_hz * 10.0 ** (k / ndec) for k in range(points)]
+    runs = np.array_split(np.arange(points), max(1, min(bands, points)))
+    return [(freqs[int(r[0])], freqs[int(r[-1])]) for r in runs]
+
+
+def _run_band(fasthenry: str, band_dir: Path) -> ZcSweep:
+    with (band_dir / "fasthenry.log").open("w", encoding="utf-8") as log:
+        try:
+            proc = subprocess.run(
+                [fasthenry, "bfem.inp"], cwd=str(band_dir), stdout=log, stderr=subprocess.STDOUT, check=False
+            )
+        except OSError as e:
+            raise FastHenryRunError(band_dir, 127, str(e)) from e
+    if proc.returncode != 0:
+        tail = (band_dir / "fasthenry.log").read_text(encoding="utf-8", errors="replace").splitlines()[-20:]
+        raise FastHenryRunError(band_dir, proc.returncode, "\n".join(tail))
+    return parse_zc_matrices(band_dir / "Zc.mat")
+
+
+def run_fasthenry_bands(
+    data: Dict[str, Any],
+    work_dir: Path,
+    fasthenry: str,
+    bands: int,
+    jobs: int,
+    fmin_hz: float,
+    fmax_hz: float,
+    ndec: int,
+    **deck_kwargs: Any,
+) -> ZcSweep:
+    """Solve the sweep as one FastHenry process per frequency band; merge Z(f).
+
+    Each band gets its own deck and working directory (`band-NN/`, holding
+    `bfem.inp`, `Zc.mat` and `fasthenry.log`) under `work_dir`; at most `jobs`
+    processes run at once. Raises FastHenryRunError for the first failed band.
+    """
+    band_dirs = []
+    for k, (lo, hi) in enumerate(frequency_bands(fmin_hz, fmax_hz, ndec, bands)):
+        band_dir = work_dir / f"band-{k:02d}"
+        band_dir.mkdir(parents=True, exist_ok=True)
+        write_fasthenry_deck(band_dir / "bfem.inp", data, fmin_hz=lo, fmax_hz=hi, ndec=ndec, **deck_kwargs)
+        band_dirs.append(band_dir)
+    count("fasthenry runs", len(band_dirs))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(lambda d: _run_band(fasthenry, d), band_dirs))
+
+    return merge_sweeps(results)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -193,7 +378,9 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--nowires", action="store_true")
     p.add_argument("--nosupport", action="store_true")
 
-    p.add_argument("--out-inp", type=Path, required=True, help="Output FastHenry .inp file")
+    p.add_argument(
+        "--out-inp", type=Path, required=True, help="Output FastHenry .inp file (gzip-compressed if it ends in .gz)"
+    )
 
     # FastHenry parameters
     p.add_argument(
@@ -202,37 +389,152 @@ def build_parser() -> argparse.ArgumentParser:
         default=5.8e7,
         help="Conductivity (S/m). Default is copper-ish.",
     )
-    p.add_argument("--nhinc", type=int, default=1, help="Filament subdivisions in height")
-    p.add_argument("--nwinc", type=int, default=1, help="Filament subdivisions in width")
+    p.add_argument(
+        "--nhinc", type=int, default=None, help="Filament subdivisions in height (default: from skin depth at --fmax)"
+    )
+    p.add_argument(
+        "--nwinc", type=int, default=None, help="Filament subdivisions in width (default: from skin depth at --fmax)"
+    )
+    p.add_argument(
+        "--skin-depths",
+        type=float,
+        default=2.0,
+        help="Subdivide a cross-section dimension only beyond this many skin depths",
+    )
+    p.add_argument(
+        "--filament-ratio",
+        type=float,
+        default=2.0,
+        help="Size ratio of adjacent filaments, >= 1 (FastHenry rh/rw; 1: uniform filaments)",
+    )
+    p.add_argument("--max-inc", type=int, default=15, help="Upper bound on automatic nhinc/nwinc")
+
+    p.add_argument(
+        "--simplify-tol-mm",
+        type=float,
+        default=0.0,
+        help="Merge consecutive segments whose points lie within this distance of a straight line (0 = off)",
+    )
 
     p.add_argument("--fmin", type=float, default=1.0, help="FastHenry fmin (Hz)")
     p.add_argument("--fmax", type=float, default=1.0, help="FastHenry fmax (Hz)")
     p.add_argument("--ndec", type=int, default=1, help="FastHenry points per decade")
 
+    p.add_argument("--run", action="store_true", help="Also run FastHenry per frequency band and print R(f)/L(f)")
+    p.add_argument("--fasthenry", default="fasthenry", help="FastHenry executable for --run (default: fasthenry)")
+    p.add_argument("--bands", type=int, default=None, help="Frequency bands for --run (default: --jobs)")
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="FastHenry processes to run at once for --run (default: CPU count)",
+    )
+    p.add_argument(
+        "--run-dir", type=Path, default=None, help="Keep the per-band --run working directories under this path"
+    )
+    p.add_argument(
+        "--zc-npz", type=Path, default=None, help="Save the merged --run impedance matrices to this .npz"
+    )
+
+    add_cache_args(p)
+    add_launcher_args(p)
+    add_profile_args(p, hot_stage="fasthenry")
+
     return p
 
 
 def main() -> None:
-    args = build_parser().parse_args()
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.filament_ratio < 1.0:
+        parser.error("--filament-ratio must be >= 1 (edge filaments are the thinnest)")
+    with profiler_from_args(args, "bfem_fasthenry"):
+        run(args)
+
 
+def run(args: argparse.Namespace) -> None:
     with tempfile.TemporaryDirectory(prefix="bfem_centerlines_") as td:
-        json_path = Path(td) / "centerlines.json"
-        _run_export_conductor_network(args, json_path)
-        data = _load_centerlines(json_path)
-
-    deck = build_fasthenry_deck(
-        data,
-        sigma_s_per_m=args.sigma,
-        nhinc=args.nhinc,
-        nwinc=args.nwinc,
-        fmin_hz=args.fmin,
-        fmax_hz=args.fmax,
-        ndec=args.ndec,
+        json_path = Path(td) / "centerlines.bin"
+        repo = repo_root()
+        try:
+            with stage("export"):
+                export_conductor_network(
+                    launcher_from_args(args, repo),
+                    cache_from_args(args, repo),
+                    params_from_args(args),
+                    json_path,
+                )
+        except BfemRunError as e:
+            sys.stderr.write(e.stderr)
+            raise SystemExit(e.returncode)
+        with stage("network load"):
+            data = _load_centerlines(json_path)
+
+    if args.simplify_tol_mm > 0.0:
+        with stage("simplify"):
+            simp = simplify_series(data, args.simplify_tol_mm)
+        count("nodes", simp.nodes_out)
+        reduction = 1.0 - simp.nodes_out / simp.nodes_in
+        length_change = simp.length_out_mm / simp.length_in_mm - 1.0
+        print(f"simplify: nodes {simp.nodes_in} -> {simp.nodes_out} ({reduction:.1%} fewer)")
+        print(f"simplify: max deviation {simp.max_dev_mm:.3g} mm, length change {length_change:+.3%}")
+
+    width_m = _mm_to_m(float(data["cross_section"]["width_mm"]))
+    # Only an automatic split needs the skin depth.
+    auto = args.nhinc is None or args.nwinc is None
+    delta_m = skin_depth_m(args.sigma, args.fmax) if auto else None
+
+    def split(inc: Optional[int]) -> FilamentSplit:
+        if inc is not None:
+            return FilamentSplit(inc, None, None)
+        assert delta_m is not None
+        return _split_dimension(width_m, delta_m, args.skin_depths, args.filament_ratio, args.max_inc)
+
+    h_split, w_split = split(args.nhinc), split(args.nwinc)
+    segments = len(data["paths"][0]["points"]) - 1
+    per_segment = h_split.inc * w_split.inc
+    count("filaments", segments * per_segment)
+    if delta_m is not None and math.isinf(delta_m):
+        print(f"skin depth: none at {args.fmax:.4g} Hz (DC), one filament per dimension")
+    elif delta_m is not None:
+        print(f"skin depth: {delta_m * 1e3:.4g} mm at {args.fmax:.4g} Hz (cross-section {width_m * 1e3:.4g} mm)")
+    edges = [sp.edge_m for sp in (h_split, w_split) if sp.edge_m is not None]
+    edge = f", edge {min(edges) * 1e3:.3g} mm" if edges else ""
+    print(
+        f"filaments: nhinc={h_split.inc} nwinc={w_split.inc} ({per_segment}/segment{edge})"
+        f" x {segments} segments = {segments * per_segment}"
     )
-    args.out_inp.write_text(deck, encoding="utf-8")
+
+    deck_kwargs = dict(sigma_s_per_m=args.sigma, h_split=h_split, w_split=w_split)
+    with stage("write deck"):
+        write_fasthenry_deck(args.out_inp, data, fmin_hz=args.fmin, fmax_hz=args.fmax, ndec=args.ndec, **deck_kwargs)
     print(f"Wrote: {args.out_inp}")
     print("Note: This deck defines a single .external between BFEM IN/OUT.")
 
+    if args.run:
+        with contextlib.ExitStack() as stack:
+            work_dir = args.run_dir or Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="bfem_fasthenry_")))
+            try:
+                with stage("fasthenry"):
+                    sweep = run_fasthenry_bands(
+                        data,
+                        work_dir,
+                        fasthenry=args.fasthenry,
+                        bands=args.bands or args.jobs,
+                        jobs=args.jobs,
+                        fmin_hz=args.fmin,
+                        fmax_hz=args.fmax,
+                        ndec=args.ndec,
+                        **deck_kwargs,
+                    )
+            except FastHenryRunError as e:
+                sys.stderr.write(f"{e}\n{e.log_tail}\n")
+                raise SystemExit(e.returncode)
+        if args.zc_npz is not None:
+            save_npz(args.zc_npz, sweep)
+        print_rl_table(sweep)
+
 
 if __name__ == "__main__":
     main()
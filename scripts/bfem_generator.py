@@ -0,0 +1,313 @@
+"""Shared launcher for the Example 12 (BFEM) generator.
+
+`moon run --target native examples/12-bifilar-electromagnet -- ...` re-checks
+the whole build graph and goes through moon's launcher on every call, which
+dominates the wall-clock time of sweeps that invoke the generator hundreds of
+times. `GeneratorLauncher` instead builds the native executable once per
+source revision (see `bfem_cache.source_fingerprint`), remembers where the
+artifact lives, and executes it directly afterwards.
+
+If the artifact is stale or missing it is rebuilt; if that build fails or the
+artifact cannot be located, the launcher falls back to `moon run`.
+
+The helpers at the bottom combine the launcher with the result cache so each
+script only describes *what* it wants from the generator.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+from bfem_cache import KIND_CONDUCTOR_NETWORK, KIND_CONDUCTOR_NETWORK_BIN, ResultCache, source_fingerprint
+from bfem_profile import count, stage
+
+EXAMPLE_PKG = "examples/12-bifilar-electromagnet"
+EXAMPLE_NAME = "12-bifilar-electromagnet"
+
+_REPORT_RE = re.compile(r"^bfem:report:(?P<key>[^=]+)=(?P<value>.*)$")
+_STAMP_NAME = "bfem-native-stamp.json"
+
+
+class BfemRunError(RuntimeError):
+    """The Example 12 generator exited with a non-zero status."""
+
+    def __init__(self, returncode: int, stderr: str) -> None:
+        super().__init__(f"generator exited with status {returncode}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def repo_root() -> Path:
+    # scripts/ -> repo root
+    return Path(__file__).resolve().parents[1]
+
+
+def generator_args(params: Mapping[str, object]) -> List[str]:
+    """Translate a parameter dict into generator CLI args.
+
+    Boolean entries become bare flags (omitted when False); everything else is
+    passed as `--name value`.
+    """
+    out: List[str] = []
+    for name, value in params.items():
+        if isinstance(value, bool):
+            if value:
+                out.append(f"--{name}")
+        elif value is not None:
+            out.extend([f"--{name}", str(value)])
+    return out
+
+
+class BatchItemError(RuntimeError):
+    """The generator rejected one request of a `--batch` run."""
+
+
+class GeneratorLauncher:
+    """Runs the Example 12 generator, preferring a prebuilt native executable."""
+
+    def __init__(self, repo: Path, prebuilt: bool = True) -> None:
+        self.repo = repo
+        self.prebuilt = prebuilt
+        self._lock = threading.Lock()
+        self._resolved = False
+        self._exe: Optional[Path] = None
+
+    def _stamp_path(self) -> Path:
+        return self.repo / "_build" / _STAMP_NAME
+
+    def _read_stamp(self, fingerprint: str) -> Optional[Path]:
+        try:
+            stamp = json.loads(self._stamp_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(stamp, dict) or stamp.get("source") != fingerprint:
+            return None
+        exe = Path(str(stamp.get("artifact", "")))
+        try:
+            if exe.stat().st_mtime_ns != stamp.get("artifact_mtime_ns"):
+                return None
+        except OSError:
+            return None
+        return exe
+
+    def _write_stamp(self, fingerprint: str, exe: Path) -> None:
+        stamp = {
+            "source": fingerprint,
+            "artifact": str(exe),
+            "artifact_mtime_ns": exe.stat().st_mtime_ns,
+        }
+        try:
+            self._stamp_path().write_text(json.dumps(stamp, indent=2), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _find_artifact(self) -> Optional[Path]:
+        # moon places native executables under _build/native/<mode>/build/<pkg>/.
+        candidates = [
+            p
+            for p in (self.repo / "_build" / "native").glob(f"*/build/{EXAMPLE_PKG}/{EXAMPLE_NAME}*")
+            if p.is_file() and p.suffix in ("", ".exe")
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: p.stat().st_mtime_ns)
+
+    def _build(self) -> Optional[Path]:
+        proc = subprocess.run(
+            ["moon", "build", "--target", "native"],
+            cwd=str(self.repo),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            return None
+        return self._find_artifact()
+
+    def executable(self) -> Optional[Path]:
+        """Path to an up-to-date native generator, building it if needed."""
+        if not self.prebuilt:
+            return None
+        with self._lock:
+            if self._resolved:
+                return self._exe
+            fingerprint = source_fingerprint(self.repo)
+            exe = self._read_stamp(fingerprint)
+            if exe is None:
+                try:
+                    with stage("moon build"):
+                        exe = self._build()
+                except OSError:
+                    exe = None
+                if exe is not None:
+                    self._write_stamp(fingerprint, exe)
+            self._exe = exe
+            self._resolved = True
+            return exe
+
+    def command(self, args: List[str]) -> List[str]:
+        exe = self.executable()
+        if exe is not None:
+            return [str(exe), *args]
+        return ["moon", "run", "--target", "native", EXAMPLE_PKG, "--", *args]
+
+    def run(self, args: List[str], capture_stdout: bool = False) -> subprocess.CompletedProcess:
+        """Run the generator; raise BfemRunError on a non-zero exit."""
+        cmd = self.command(args)
+        count("generator runs")
+        with stage("generator"):
+            proc = subprocess.run(
+                cmd,
+                cwd=str(self.repo),
+                stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+        if proc.returncode != 0:
+            raise BfemRunError(proc.returncode, proc.stderr)
+        return proc
+
+
+def add_launcher_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--moon-run",
+        action="store_true",
+        help="Always launch the generator via `moon run` instead of the prebuilt native executable",
+    )
+
+
+def launcher_from_args(args: argparse.Namespace, repo: Path) -> GeneratorLauncher:
+    return GeneratorLauncher(repo, prebuilt=not args.moon_run)
+
+
+def parse_report(stderr: str) -> Dict[str, str]:
+    """Collect `bfem:report:<key>=<value>` lines into a dict."""
+    kv: Dict[str, str] = {}
+    for line in stderr.splitlines():
+        m = _REPORT_RE.match(line.strip())
+        if not m:
+            continue
+        kv[m.group("key")] = m.group("value")
+    return kv
+
+
+def generate_report(launcher: GeneratorLauncher, params: Mapping[str, object]) -> Dict[str, str]:
+    proc = launcher.run(["--nostep", "--report", *generator_args(params)])
+    return parse_report(proc.stderr)
+
+
+def iter_batch(launcher: GeneratorLauncher, requests: Iterable[Mapping[str, object]]) -> Iterator[Dict[str, Any]]:
+    """Stream requests through one `--batch` generator process.
+
+    Requests are written as newline-delimited JSON from a background thread
+    while responses are read (and yielded) as they arrive, so neither pipe can
+    fill up and stall the other side. Raises BfemRunError if the process
+    itself fails; per-request failures come back as `"ok": false` responses.
+    """
+    proc = subprocess.Popen(
+        launcher.command(["--batch"]),
+        cwd=str(launcher.repo),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+    stdin, stdout, stderr = proc.stdin, proc.stdout, proc.stderr
+    stderr_chunks: List[str] = []
+
+    def feed() -> None:
+        try:
+            for req in requests:
+                stdin.write(json.dumps(req, separators=(",", ":")) + "\n")
+                # The generator answers line by line; don't hold requests in our buffer.
+                stdin.flush()
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                pass
+
+    threads = [
+        threading.Thread(target=feed, daemon=True),
+        threading.Thread(target=lambda: stderr_chunks.append(stderr.read()), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for line in stdout:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        stdout.close()
+        returncode = proc.wait()
+        for t in threads:
+            t.join()
+    if returncode != 0:
+        raise BfemRunError(returncode, "".join(stderr_chunks))
+
+
+def generate_reports(
+    launcher: GeneratorLauncher,
+    params_list: List[Mapping[str, object]],
+    on_result: Optional[Callable[[int, Union[Dict[str, str], Exception]], None]] = None,
+) -> List[Union[Dict[str, str], Exception]]:
+    """Evaluate `--report` for many parameter sets in a single generator process.
+
+    Results are returned in input order; a request the generator rejected is
+    returned as a BatchItemError in its slot. `on_result(index, result)` is
+    called for each response as soon as it arrives.
+    """
+    results: List[Union[Dict[str, str], Exception]] = [
+        BatchItemError("no response from generator") for _ in params_list
+    ]
+    # Like generator_args, leave unset (None) parameters at the generator defaults.
+    requests = (
+        {"id": i, **{k: v for k, v in params.items() if v is not None}, "report": True}
+        for i, params in enumerate(params_list)
+    )
+    count("generator runs")
+    count("batch requests", len(params_list))
+    with stage("generator batch"):
+        for resp in iter_batch(launcher, requests):
+            i = resp.get("id")
+            if not isinstance(i, (int, float)) or not 0 <= int(i) < len(results):
+                continue
+            if resp.get("ok"):
+                results[int(i)] = {str(k): str(v) for k, v in (resp.get("report") or {}).items()}
+            else:
+                results[int(i)] = BatchItemError(str(resp.get("error", "unknown error")))
+            if on_result is not None:
+                on_result(int(i), results[int(i)])
+    return results
+
+
+def export_conductor_network(
+    launcher: GeneratorLauncher,
+    cache: ResultCache,
+    params: Mapping[str, object],
+    out_path: Path,
+) -> None:
+    """Write the conductor network for `params` to `out_path`.
+
+    A `.bin` path gets the binary sidecar (see scripts/bfem_network.py),
+    anything else the `bfem:conductor-network:v1` JSON document.
+    """
+    binary = out_path.suffix == ".bin"
+    flag = "--export_conductor_network_bin" if binary else "--export_conductor_network"
+    cache.fetch_file(
+        KIND_CONDUCTOR_NETWORK_BIN if binary else KIND_CONDUCTOR_NETWORK,
+        params,
+        out_path,
+        lambda path: launcher.run(["--nostep", flag, str(path), *generator_args(params)]),
+    )
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Built-in partial-inductance (PEEC) estimate of the BFEM series path.
+
+Gives an inductance for scripts/bfem_resonance.py without installing and
+running FastHenry2. The series conductor (`bfem:conductor:series` from the
+conductor-network export) is cut into straight square-section bar segments
+carrying the same current from IN to OUT, so the IN->OUT inductance is the sum
+of every segment's partial self inductance and twice every pairwise mutual:
+
+    L = Σ_i Lp_ii + 2 Σ_{i<j} Mp_ij
+
+like the `.external` of the deck from scripts/bfem_fasthenry.py (a partial,
+open-loop inductance; no return path is modelled).
+
+Kernels
+- The bar cross-section enters through its geometric mean distance,
+  g = 0.2235 (w + t). Self terms use the closed form for two parallel
+  filaments of length l at distance g:
+    Lp = mu0/(2 pi) [l asinh(l/g) - sqrt(l^2 + g^2) + g]
+- Near pairs (midpoints closer than `--cutoff` times the longer segment) use
+  the Neumann integral between the two center filaments, with the distance
+  from each point to the other segment's line floored at g: the integral
+  along one segment is closed-form, the other uses Gauss-Legendre points.
+  Bars further apart than g get the exact filament mutual (the GMD of two
+  separate square bars is close to their center distance); collinear or
+  bent neighbours meeting at a joint get the GMD bar value there instead of
+  the filament singularity.
+- All other pairs use the filament (midpoint) approximation
+    Mp = mu0/(4 pi) (u_i . u_j) l_i l_j / |c_i - c_j|
+
+The far field is summed over cache-sized tiles of segment pairs (two small
+matrix products per tile); near pairs come from the shared grid index
+(scripts/bfem_spatial.py) in bounded blocks and replace their far-field
+value. Segments longer than `--max-seg-mm` (exit wires) are split first so
+the near-field search radius stays wire-sized.
+
+Usage:
+  ./scripts/bfem_inductance.py
+  ./scripts/bfem_inductance.py --numPairs 12 --wireGap 0.1 --C-pF 0.37
+
+With `--C-pF` (e.g. C_eff from scripts/bfem_capacitance_air.py) the lumped
+self-resonant frequency is printed as well; otherwise feed the result to
+  ./scripts/bfem_resonance.py --L-h <L_h> --C-pF <C_eff_pF>
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+from bfem_cache import add_cache_args, cache_from_args, params_from_args
+from bfem_generator import BfemRunError, add_launcher_args, export_conductor_network, launcher_from_args, repo_root
+from bfem_network import NETWORK_SCHEMA, read_network
+from bfem_profile import add_profile_args, count, profiler_from_args, stage
+from bfem_resonance import LC, f0_hz
+from bfem_segments import SegmentTable, dot3, norm3, segment_table
+from bfem_spatial import GridIndex
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+MU0_H_PER_M = 4.0e-7 * math.pi
+SERIES_PATH = "bfem:conductor:series"
+
+# Geometric mean distance of a w x t rectangle from itself, per (w + t).
+GMD_RECT = 0.2235
+
+# Far-field tile: rows x columns of segment pairs (a few 64-bit arrays of this
+# many entries stay within a typical L2 cache).
+TILE_ROWS = 64
+TILE_COLS = 1024
+
+# Gauss-Legendre orders for the near-field outer integral: touching and
+# adjacent pairs (midpoints within CLOSE lengths) need more points than the
+# smooth rest of the near zone.
+CLOSE = 1.5
+ORDER_CLOSE = 8
+ORDER_NEAR = 3
+
+
+def _gauss(order: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Gauss-Legendre nodes and weights on [0, 1]."""
+    x, w = np.polynomial.legendre.leggauss(order)
+    return 0.5 * (x + 1.0), 0.5 * w
+
+
+@dataclass(frozen=True)
+class InductanceEstimate:
+    L_h: float
+    self_h: float  # Σ Lp_ii
+    mutual_h: float  # 2 Σ_{i<j} Mp_ij
+    segments: int
+    near_pairs: int
+
+
+def subdivide(points_m: np.ndarray, max_len_m: float) -> np.ndarray:
+    """Split polyline segments longer than `max_len_m` into equal parts."""
+    d = points_m[1:] - points_m[:-1]
+    parts = np.maximum(1, np.ceil(norm3(d) / max_len_m)).astype(np.int64)
+    if int(parts.max()) == 1:
+        return points_m
+    seg = np.repeat(np.arange(len(d)), parts)
+    frac = np.arange(len(seg)) - np.repeat(np.cumsum(parts) - parts, parts)
+    t = frac / np.repeat(parts, parts)
+    return np.concatenate((points_m[:-1][seg] + d[seg] * t[:, None], points_m[-1:]))
+
+
+def self_inductance(length_m: np.ndarray, gmd_m: float) -> np.ndarray:
+    g = gmd_m
+    return MU0_H_PER_M / (2.0 * math.pi) * (length_m * np.arcsinh(length_m / g) - np.sqrt(length_m**2 + g * g) + g)
+
+
+def near_mutual(
+    table: SegmentTable, i: np.ndarray, j: np.ndarray, gmd_m: float, order: int = ORDER_CLOSE
+) -> np.ndarray:
+    """Neumann mutuals of segment pairs (i, j), distances floored at the GMD."""
+    ui, uj = table.dir[i], table.dir[j]
+    li, lj = table.length[i], table.length[j]
+    aj = table.a[j]
+    inner = np.zeros(len(i))
+    for x, w in zip(*_gauss(order)):
+        d = table.a[i] + ui * (li * x)[:, None] - aj
+        tau = dot3(d, uj)
+        rho = np.sqrt(np.maximum(dot3(d, d) - tau * tau, gmd_m * gmd_m))
+        inner += w * (np.arcsinh((lj - tau) / rho) + np.arcsinh(tau / rho))
+    return MU0_H_PER_M / (4.0 * math.pi) * dot3(ui, uj) * li * inner
+
+
+def far_mutual(table: SegmentTable, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Filament (midpoint) mutuals of segment pairs (i, j)."""
+    r = norm3(table.mid[i] - table.mid[j])
+    return MU0_H_PER_M / (4.0 * math.pi) * dot3(table.dir[i], table.dir[j]) * table.length[i] * table.length[j] / r
+
+
+def _far_field_sum(table: SegmentTable) -> float:
+    """Σ_{i<j} of the filament mutuals, tile by tile."""
+    n = len(table)
+    c = table.mid
+    cc = dot3(c, c)
+    ul = table.dir * table.length[:, None]
+    total = 0.0
+    for r0 in range(0, n, TILE_ROWS):
+        r1 = min(n, r0 + TILE_ROWS)
+        for c0 in range(r0, n, TILE_COLS):
+            c1 = min(n, c0 + TILE_COLS)
+            r2 = cc[r0:r1, None] + cc[None, c0:c1] - 2.0 * (c[r0:r1] @ c[c0:c1].T)
+            m = (ul[r0:r1] @ ul[c0:c1].T) / np.sqrt(np.maximum(r2, 1e-30))
+            if c0 < r1:
+                # Diagonal tile: keep j > i only.
+                m = np.triu(m, k=r0 + 1 - c0)
+            total += float(m.sum())
+    return MU0_H_PER_M / (4.0 * math.pi) * total
+
+
+def estimate_inductance(table: SegmentTable, gmd_m: float, cutoff: float) -> InductanceEstimate:
+    """Partial inductance of the path through `table`, all segments in series."""
+    with stage("self"):
+        self_h = float(self_inductance(table.length, gmd_m).sum())
+    with stage("far field"):
+        mutual = _far_field_sum(table)
+
+    # Near pairs: swap the filament value for the regularized Neumann integral.
+    max_len = float(table.length.max())
+    radius = cutoff * max_len
+    near_pairs = 0
+    with stage("near field"):
+        index = GridIndex(table.mid, radius)
+        for block in index.pair_blocks(radius):
+            i, j = block.i, block.j
+            r = norm3(table.mid[i] - table.mid[j])
+            lmax = np.maximum(table.length[i], table.length[j])
+            keep = r < cutoff * lmax
+            close = (r < CLOSE * lmax)[keep]
+            i, j = i[keep], j[keep]
+            near_pairs += len(i)
+            for sel, order in ((close, ORDER_CLOSE), (~close, ORDER_NEAR)):
+                a, b = i[sel], j[sel]
+                mutual += float((near_mutual(table, a, b, gmd_m, order) - far_mutual(table, a, b)).sum())
+    count("near pairs", near_pairs)
+
+    return InductanceEstimate(
+        L_h=self_h + 2.0 * mutual,
+        self_h=self_h,
+        mutual_h=2.0 * mutual,
+        segments=len(table),
+        near_pairs=near_pairs,
+    )
+
+
+def _load_series(path: Path) -> Tuple[np.ndarray, float]:
+    """Series-path points (m) and square wire width (m) of a network export."""
+    data = read_network(path)
+    if data.get("schema") != NETWORK_SCHEMA:
+        raise ValueError(f"Unexpected schema: {data.get('schema')}")
+    params = data.get("params") or {}
+    cross_section = data.get("cross_section") or {}
+    width_mm = float(cross_section.get("width_mm", params.get("wireWidth_mm")))
+    paths = data.get("paths") or []
+    if not paths:
+        raise ValueError("No paths in conductor network")
+    series = next((p for p in paths if p.get("name") == SERIES_PATH), paths[0])
+    pts = series.get("points")
+    if pts is None or len(pts) < 2:
+        raise ValueError("Series path has insufficient points")
+    return np.asarray(pts, dtype=np.float64) * 1.0e-3, width_mm * 1.0e-3
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Built-in PEEC estimate of the BFEM IN->OUT inductance.")
+
+    # Mirror key MoonBit args.
+    p.add_argument("--innerDiam", type=float, default=6.0)
+    p.add_argument("--numPairs", type=int, default=10)
+    p.add_argument("--numSegs", type=int, default=36)
+    p.add_argument("--vertTurns", type=float, default=15.0)
+    p.add_argument("--wireWidth", type=float, default=1.0)
+    p.add_argument("--wireGap", type=float, default=0.2)
+
+    p.add_argument("--nocage", action="store_true")
+    p.add_argument("--nocoil", action="store_true")
+    p.add_argument("--nowires", action="store_true")
+    p.add_argument("--nosupport", action="store_true")
+
+    p.add_argument(
+        "--cutoff",
+        type=float,
+        default=4.0,
+        help="Near-field pairs: midpoints closer than this many lengths of the longer segment",
+    )
+    p.add_argument(
+        "--max-seg-mm",
+        type=float,
+        default=None,
+        help="Split longer segments before the estimate (default: 1.5x the median segment length)",
+    )
+    p.add_argument("--C-pF", type=float, default=None, help="Also print f0 for this capacitance (pF)")
+
+    add_cache_args(p)
+    add_launcher_args(p)
+    add_profile_args(p, hot_stage="far field")
+
+    return p
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    with profiler_from_args(args, "bfem_inductance"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix="bfem_inductance_") as td:
+        net_path = Path(td) / "bfem_conductor_network.bin"
+        repo = repo_root()
+        try:
+            with stage("export"):
+                export_conductor_network(
+                    launcher_from_args(args, repo),
+                    cache_from_args(args, repo),
+                    params_from_args(args),
+                    net_path,
+                )
+        except BfemRunError as e:
+            sys.stderr.write(e.stderr)
+            raise SystemExit(e.returncode)
+        with stage("network load"):
+            points_m, width_m = _load_series(net_path)
+
+    with stage("build segments"):
+        lengths = norm3(points_m[1:] - points_m[:-1])
+        max_len_m = args.max_seg_mm * 1.0e-3 if args.max_seg_mm else 1.5 * float(np.median(lengths[lengths > 0]))
+        table = segment_table(subdivide(points_m, max_len_m))
+    count("segments", len(table))
+
+    est = estimate_inductance(table, GMD_RECT * 2.0 * width_m, args.cutoff)
+
+    print(f"segments: {est.segments}")
+    print(f"length_total: {table.total_length:.6g} m")
+    print(f"near_pairs: {est.near_pairs}")
+    print(f"L_self_sum: {est.self_h:.6g} H")
+    print(f"L_mutual_sum: {est.mutual_h:.6g} H")
+    print(f"L_est: {est.L_h:.6g} H")
+    print(f"L_est: {est.L_h * 1e6:.6g} uH")
+    if args.C_pF is not None:
+        C_f = args.C_pF * 1.0e-12
+        print(f"f0: {f0_hz(LC(L_h=est.L_h, C_f=C_f)):.6g} Hz (C = {args.C_pF:.6g} pF)")
+    else:
+        print("")
+        print("Then compute SRF:")
+        print(f"  ./scripts/bfem_resonance.py --L-h {est.L_h:.6g} --C-pF <C_eff_pF>")
+
+
+if __name__ == "__main__":
+    main()
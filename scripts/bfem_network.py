@@ -0,0 +1,118 @@
+"""Reader/writer for BFEM conductor-network exports (JSON or binary sidecar).
+
+The generator writes the conductor network either as the
+`bfem:conductor-network:v1` JSON document (`--export_conductor_network`) or as
+a compact binary sidecar (`--export_conductor_network_bin`,
+`bfem:conductor-network-bin:v1`):
+
+  b"BFEMNET1" | u32 LE header length | UTF-8 JSON header | zero padding to a
+  multiple of 8 bytes | per path, `count` x [x, y, z] little-endian float64
+
+The header is the JSON document without the point lists: the same `units`,
+`params`, `cross_section` and `terminals`, plus `count` and `offset` (bytes
+from the end of the padding) for every path's point block.
+
+`read_network` accepts either form and returns the JSON document shape with
+each path's `points` as a read-only (N, 3) float64 array in mm. For the
+binary form those arrays are views of one memory map, so nothing is parsed
+per point; for JSON the lists are converted with one `np.asarray` per path.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+NETWORK_SCHEMA = "bfem:conductor-network:v1"
+NETWORK_BIN_SCHEMA = "bfem:conductor-network-bin:v1"
+NETWORK_BIN_MAGIC = b"BFEMNET1"
+
+_POINT_DTYPE = np.dtype("<f8")
+
+
+def is_network_bin(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(len(NETWORK_BIN_MAGIC)) == NETWORK_BIN_MAGIC
+
+
+def _data_start(header_len: int) -> int:
+    start = len(NETWORK_BIN_MAGIC) + 4 + header_len
+    return (start + 7) // 8 * 8
+
+
+def _read_bin(path: Path) -> Dict[str, Any]:
+    with path.open("rb") as f:
+        # The map stays open as long as any point array refers to it.
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    prefix = len(NETWORK_BIN_MAGIC)
+    if len(buf) < prefix + 4 or buf[:prefix] != NETWORK_BIN_MAGIC:
+        raise ValueError(f"{path}: not a conductor-network binary")
+    (header_len,) = struct.unpack_from("<I", buf, prefix)
+    header = json.loads(bytes(buf[prefix + 4 : prefix + 4 + header_len]).decode("utf-8"))
+    if not isinstance(header, dict) or header.get("schema") != NETWORK_BIN_SCHEMA:
+        raise ValueError(f"Unexpected schema: {header.get('schema') if isinstance(header, dict) else None}")
+
+    start = _data_start(header_len)
+    for path_doc in header.get("paths") or []:
+        n = int(path_doc.pop("count"))
+        offset = start + int(path_doc.pop("offset"))
+        if offset + n * 3 * _POINT_DTYPE.itemsize > len(buf):
+            raise ValueError(f"{path}: point block of {path_doc.get('name')} runs past the end of the file")
+        path_doc["points"] = np.frombuffer(buf, dtype=_POINT_DTYPE, count=n * 3, offset=offset).reshape(n, 3)
+    header["schema"] = NETWORK_SCHEMA
+    return header
+
+
+def read_network(path: Path) -> Dict[str, Any]:
+    """Load a conductor-network export (JSON or binary) with array points."""
+    if is_network_bin(path):
+        return _read_bin(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("JSON root must be an object")
+    for path_doc in data.get("paths") or []:
+        pts = path_doc.get("points")
+        if isinstance(pts, list) and pts:
+            arr = np.asarray(pts, dtype=np.float64)[:, :3]
+            arr.flags.writeable = False
+            path_doc["points"] = arr
+    return data
+
+
+def write_network_bin(data: Dict[str, Any], path: Path) -> None:
+    """Write a conductor-network document (lists or arrays) as the binary sidecar."""
+    header = {k: v for k, v in data.items() if k != "paths"}
+    header["schema"] = NETWORK_BIN_SCHEMA
+    blocks = []
+    offset = 0
+    header["paths"] = []
+    for path_doc in data.get("paths") or []:
+        pts = np.asarray(path_doc.get("points"), dtype=_POINT_DTYPE)
+        pts = np.ascontiguousarray(pts.reshape(len(pts), -1)[:, :3])
+        entry = {k: v for k, v in path_doc.items() if k != "points"}
+        entry.update(count=len(pts), offset=offset)
+        header["paths"].append(entry)
+        blocks.append(pts.tobytes())
+        offset += len(blocks[-1])
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    pad = _data_start(len(head)) - (len(NETWORK_BIN_MAGIC) + 4 + len(head))
+    with path.open("wb") as f:
+        f.write(NETWORK_BIN_MAGIC)
+        f.write(struct.pack("<I", len(head)))
+        f.write(head)
+        f.write(b"\0" * pad)
+        for block in blocks:
+            f.write(block)
@@ -0,0 +1,175 @@
+"""Coarse-to-fine Pareto search over Example 12 (BFEM) sweep parameters.
+
+A full `--sweep` evaluates every combination of the sweep lists, although
+most of those variants end up far from the best trade-offs. `optimize` instead
+evaluates a coarse grid spanning the user bounds, then repeatedly refines
+around the current Pareto front (maximize the first objective, minimize the
+second) plus the current top-ranked points, halving the step every round until
+the steps reach the requested tolerance or the evaluation budget runs out.
+
+The search only sees parameter tuples and objective pairs, so callers decide
+how a point is evaluated (generator, cache, surrogate, ...).
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, ...]
+Objectives = Tuple[float, float]
+
+# Evaluates a batch of points; None marks a point that could not be evaluated.
+Evaluator = Callable[[List[Point]], List[Optional[Objectives]]]
+
+
+@dataclass(frozen=True)
+class Dimension:
+    name: str
+    lo: float
+    hi: float
+    integer: bool = False
+
+    @property
+    def free(self) -> bool:
+        return self.hi > self.lo
+
+    def snap(self, x: float) -> float:
+        x = min(max(x, self.lo), self.hi)
+        if self.integer:
+            return float(round(x))
+        # Keep grid arithmetic from producing near-duplicate keys (0.30000000000000004).
+        return round(x, 9)
+
+
+@dataclass
+class OptimizeResult:
+    evaluated: Dict[Point, Optional[Objectives]] = field(default_factory=dict)
+    rounds: int = 0
+
+    def front(self) -> List[Point]:
+        ok = [(p, o) for p, o in self.evaluated.items() if o is not None]
+        return [ok[i][0] for i in pareto_front([o for _, o in ok])]
+
+
+def parse_bounds(s: Optional[str], default: float, integer: bool = False) -> Tuple[float, float]:
+    """Parse `lo:hi` (or a single value) into inclusive bounds."""
+    if not s:
+        return default, default
+    parts = [x.strip() for x in s.split(":")]
+    if len(parts) == 1:
+        lo = hi = float(parts[0])
+    elif len(parts) == 2:
+        lo, hi = float(parts[0]), float(parts[1])
+    else:
+        raise ValueError(f"expected lo:hi, got {s!r}")
+    if lo > hi:
+        raise ValueError(f"lower bound exceeds upper bound in {s!r}")
+    if integer and (lo != int(lo) or hi != int(hi)):
+        raise ValueError(f"integer bounds expected, got {s!r}")
+    return lo, hi
+
+
+def pareto_front(objectives: Sequence[Objectives]) -> List[int]:
+    """Indices of the non-dominated pairs (maximize first, minimize second)."""
+    order = sorted(range(len(objectives)), key=lambda i: (-objectives[i][0], objectives[i][1]))
+    front: List[int] = []
+    best_second = float("inf")
+    for i in order:
+        if objectives[i][1] < best_second:
+            front.append(i)
+            best_second = objectives[i][1]
+    return front
+
+
+def coarse_grid(dims: Sequence[Dimension], levels: int) -> List[Point]:
+    axes: List[List[float]] = []
+    for d in dims:
+        if not d.free:
+            axes.append([d.lo])
+            continue
+        n = max(2, levels)
+        values = [d.snap(d.lo + (d.hi - d.lo) * k / (n - 1)) for k in range(n)]
+        axes.append(sorted(set(values)))
+    return [tuple(p) for p in itertools.product(*axes)]
+
+
+def initial_steps(dims: Sequence[Dimension], levels: int) -> List[float]:
+    return [(d.hi - d.lo) / (max(2, levels) - 1) if d.free else 0.0 for d in dims]
+
+
+def neighbours(center: Point, steps: Sequence[float], dims: Sequence[Dimension]) -> List[Point]:
+    """Axis-aligned moves of one step around `center`, snapped to the bounds."""
+    out: List[Point] = []
+    for k, (d, h) in enumerate(zip(dims, steps)):
+        if not d.free:
+            continue
+        if d.integer:
+            h = max(1.0, float(round(h)))
+        for sign in (-1.0, 1.0):
+            q = list(center)
+            q[k] = d.snap(center[k] + sign * h)
+            if q[k] != center[k]:
+                out.append(tuple(q))
+    return out
+
+
+def optimize(
+    dims: Sequence[Dimension],
+    evaluate: Evaluator,
+    budget: int,
+    levels: int = 3,
+    keep: int = 10,
+    tol: float = 0.02,
+    on_round: Optional[Callable[[int, int, OptimizeResult], None]] = None,
+) -> OptimizeResult:
+    """Search `dims` for the trade-off front of `evaluate`'s objective pairs.
+
+    Each round's refinement centres are the Pareto front plus the `keep` best
+    points under the sweep ranking (first objective descending, then second
+    ascending), so the reported top list is refined as well as the front.
+    Steps never shrink below `tol` times their range (one for integer
+    dimensions); the search stops once a round at that resolution yields no
+    new points, or when `budget` evaluations are used.
+    Raises ValueError if the coarse grid alone exceeds the budget.
+    """
+    result = OptimizeResult()
+    grid = coarse_grid(dims, levels)
+    if len(grid) > budget:
+        raise ValueError(
+            f"coarse grid has {len(grid)} points but the budget is {budget}; "
+            "lower the grid levels or raise the budget"
+        )
+
+    def run(points: List[Point]) -> None:
+        for p, o in zip(points, evaluate(points)):
+            result.evaluated[p] = o
+        result.rounds += 1
+        if on_round is not None:
+            on_round(result.rounds, len(points), result)
+
+    run(grid)
+    steps = initial_steps(dims, levels)
+    min_steps = [1.0 if d.integer else tol * (d.hi - d.lo) for d in dims]
+    while len(result.evaluated) < budget:
+        steps = [max(h / 2.0, m) for h, m in zip(steps, min_steps)]
+        ok = [(p, o) for p, o in result.evaluated.items() if o is not None]
+        ranked = sorted(ok, key=lambda po: (-po[1][0], po[1][1]))
+        centres = [ok[i][0] for i in pareto_front([o for _, o in ok])]
+        centres += [p for p, _ in ranked[: max(0, keep)] if p not in centres]
+
+        candidates: List[Point] = []
+        seen = set(result.evaluated)
+        for c in centres:
+            for q in neighbours(c, steps, dims):
+                if q not in seen:
+                    seen.add(q)
+                    candidates.append(q)
+        candidates = candidates[: budget - len(result.evaluated)]
+        if not candidates:
+            if all(h <= m for h, m in zip(steps, min_steps)):
+                break
+            continue
+        run(candidates)
+    return result
@@ -1,18 +1,34 @@
 #!/usr/bin/env python3
-"""Parse FastHenry `Zc.mat` for a 1-port BFEM deck and derive R/L.
+"""Parse FastHenry `Zc.mat` impedance matrices and derive R/L.
 
-FastHenry dumps impedance matrices to `Zc.mat`. For the BFEM deck we generate,
-there is exactly 1 conductor -> a 1x1 complex impedance Z(f).
+FastHenry dumps one impedance matrix per frequency to `Zc.mat`:
 
-This script extracts the first (and only) Z entry at each frequency, and prints:
-- f (Hz)
-- R (ohms) = Re(Z)
-- L (henries) = Im(Z) / (2*pi*f)
+  Row 1:  n_a  to  n_b, port name: bfem_in_out
+  ...
+  Impedance matrix for frequency = 100000 2 x 2
+       0.295705  +1.82665e-05j       0.01  +2.1e-06j
+       ...
 
-It is intentionally tolerant to different `Zc.mat` textual formats.
+`parse_zc_matrices` streams the file block by block: only one
+"frequency = f N x N" block is held as text at a time, and it is converted
+with one array conversion into its slot of the result. `ZcSweep.z` is
+(frequencies, N, N) complex, `ZcSweep.f_hz` the matching frequencies and
+`ZcSweep.ports` the port names from the `Row` headers. Matrix entries are
+collected by count rather than by line, so wrapped rows and entries printed
+without a separating space parse the same.
+
+A sweep saves to and loads from a compact `.npz` (`save_npz` / `load_npz`),
+so large multi-port sweeps are parsed once. `ZcSweep.at` looks up a
+frequency; `ZcSweep.rl` gives R(f) and L(f) = X / (2 pi f) for any port pair,
+interpolated linearly in log f between solved frequencies.
+
+For the single-port BFEM deck from scripts/bfem_fasthenry.py, the script
+prints f, R = Re(Z), X = Im(Z) and L = X / (2 pi f) of Z[0, 0].
 
 Usage:
   ./scripts/bfem_parse_fasthenry_zc.py examples/12-bifilar-electromagnet/Zc.mat
+  ./scripts/bfem_parse_fasthenry_zc.py Zc.mat --npz /tmp/zc.npz --port 1 2
+  ./scripts/bfem_parse_fasthenry_zc.py /tmp/zc.npz --at 1.5e5 2e5
 
 Then estimate SRF with an effective capacitance (e.g. air-only estimate):
   ./scripts/bfem_resonance.py --L-h <L> --C-pF <C>
@@ -23,9 +39,19 @@ from __future__ import annotations
 import argparse
 import math
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, TextIO, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
 
 
 @dataclass(frozen=True)
@@ -35,83 +61,189 @@ class ZPoint:
     x_ohm: float
 
 
-_FLOAT_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
-
-
-def _floats_in_line(line: str) -> List[float]:
-    return [float(m.group(0)) for m in _FLOAT_RE.finditer(line)]
-
-
-def _looks_like_freq_line(line: str) -> Optional[float]:
-    # Common patterns: "Frequency = 1" or "freq 1".
-    if "freq" not in line.lower():
-        return None
-    nums = _floats_in_line(line)
-    if not nums:
-        return None
-    # Prefer the last number on the line.
-    return float(nums[-1])
-
-
-def _iter_zpoints(lines: Iterable[str]) -> Iterable[ZPoint]:
-    """Heuristic parser for 1x1 Zc.mat.
-
-    Strategy:
-    - Track current frequency when we see a freq-ish line.
-    - After a frequency is set, look for the first line that contains at least
-      two floats; interpret them as (Re, Im) for Z.
-    - Yield a ZPoint and then clear frequency so we don't accidentally consume
-      subsequent metadata.
-
-    We intentionally do *not* use a pre-frequency fallback because the header
-    often contains integers like "Row 1 ... 0 ... 10823" which can be misread
-    as numeric data.
+@dataclass(frozen=True)
+class ZcSweep:
+    f_hz: np.ndarray  # (F,) ascending as solved
+    z: np.ndarray  # (F, N, N) complex128, ohms
+    ports: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return int(self.f_hz.shape[0])
+
+    def at(self, f_hz: float, rtol: float = 1e-9) -> np.ndarray:
+        """The N x N matrix solved at `f_hz`; KeyError if that frequency was not solved."""
+        k = int(np.argmin(np.abs(self.f_hz - f_hz)))
+        if abs(self.f_hz[k] - f_hz) > rtol * abs(f_hz):
+            raise KeyError(f"no solution at {f_hz:g} Hz")
+        return self.z[k]
+
+    def rl(self, f_hz: Sequence[float], port: Tuple[int, int] = (0, 0)) -> Tuple[np.ndarray, np.ndarray]:
+        """R(f) (ohms) and L(f) (henries) of Z[port], interpolated linearly in log f.
+
+        Frequencies outside the solved range take the nearest end value.
+        """
+        zp = self.z[:, port[0], port[1]]
+        order = np.argsort(self.f_hz)
+        f, zp = self.f_hz[order], zp[order]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            l_h = np.where(f > 0, zp.imag / (2.0 * math.pi * f), np.nan)
+        x = np.log(np.maximum(f, np.finfo(float).tiny))
+        q = np.log(np.maximum(np.asarray(f_hz, dtype=np.float64), np.finfo(float).tiny))
+        return np.interp(q, x, zp.real), np.interp(q, x, l_h)
+
+
+_FLOAT = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_HEADER_RE = re.compile(r"Impedance matrix for frequency\s*=\s*(" + _FLOAT + r")\s+(\d+)\s*x\s*(\d+)[^\n]*")
+_ROW_RE = re.compile(r"\s*Row\s+(\d+):.*port name:\s*(\S+)")
+
+
+def _split_numbers(text: str) -> str:
+    """Whitespace-separate the numbers of matrix text.
+
+    Every sign starts a new number unless it follows an exponent marker, so
+    entries printed without a gap ("0.29+1.8e-05j") come apart; the `j`
+    suffix goes. Plain string replaces are much faster than a regex here.
     """
+    text = text.replace("+", " +").replace("-", " -").replace("j", " ")
+    return text.replace("e +", "e+").replace("e -", "e-").replace("E +", "E+").replace("E -", "E-")
+
+
+def _iter_blocks(f: TextIO) -> Iterator[Tuple[re.Match, List[str]]]:
+    """Yield (header match, body lines) per impedance block of an open `Zc.mat`."""
+    header = None
+    body: List[str] = []
+    for line in f:
+        if "Impedance matrix" in line:
+            m = _HEADER_RE.search(line)
+            if m is not None:
+                if header is not None:
+                    yield header, body
+                header, body = m, [line[m.end() :]]
+                continue
+        if header is not None:
+            body.append(line)
+    if header is not None:
+        yield header, body
+
+
+def parse_zc_matrices(path: Path) -> ZcSweep:
+    """Read every impedance matrix in a FastHenry `Zc.mat`, one block at a time.
+
+    Peak memory is the result arrays plus the text of a single block. The
+    arrays grow by doubling, since the block count is only known at the end.
+    """
+    names: Dict[int, str] = {}
+    f_hz = np.empty(0)
+    z = np.empty((0, 0, 0), dtype=np.complex128)
+    count = 0
+    n_rows = n_cols = 0
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        # Port names come from the "Row k: ..." lines before the first block.
+        for line in f:
+            m = _ROW_RE.match(line)
+            if m is not None:
+                names[int(m.group(1))] = m.group(2)
+            elif "Impedance matrix" in line:
+                break
+        f.seek(0)
+
+        for h, body in _iter_blocks(f):
+            rows, cols = int(h.group(2)), int(h.group(3))
+            if not count:
+                n_rows, n_cols = rows, cols
+                f_hz = np.empty(16)
+                z = np.empty((16, n_rows, n_cols), dtype=np.complex128)
+            elif (rows, cols) != (n_rows, n_cols):
+                raise ValueError(f"{path}: matrix size changes to {rows} x {cols} at f = {h.group(1)}")
+            if count == len(f_hz):
+                f_hz = np.resize(f_hz, 2 * count)
+                z = np.concatenate([z, np.empty_like(z)])
+            need = 2 * n_rows * n_cols
+            # Entries are taken by count, not by line, so wrapped rows parse the same.
+            vals = _split_numbers("".join(body)).split()
+            if len(vals) < need:
+                raise ValueError(f"{path}: truncated matrix at f = {h.group(1)}")
+            nums = np.array(vals[:need], dtype=np.float64)
+            f_hz[count] = float(h.group(1))
+            z[count] = (nums[0::2] + 1j * nums[1::2]).reshape(n_rows, n_cols)
+            count += 1
+
+    if not count:
+        raise ValueError(f"{path}: no 'Impedance matrix for frequency' blocks")
+    ports = tuple(names.get(r + 1, f"port{r + 1}") for r in range(n_rows))
+    if count < len(f_hz):
+        f_hz, z = f_hz[:count].copy(), z[:count].copy()
+    return ZcSweep(f_hz=f_hz, z=z, ports=ports)
+
+
+def merge_sweeps(sweeps: Iterable[ZcSweep]) -> ZcSweep:
+    """Concatenate sweeps (e.g. frequency bands) sorted by frequency, each frequency once."""
+    sweeps = list(sweeps)
+    f_hz = np.concatenate([s.f_hz for s in sweeps])
+    z = np.concatenate([s.z for s in sweeps])
+    # Bands may share an edge frequency; keep its first solution.
+    _, first = np.unique(np.round(np.log10(f_hz), 9), return_index=True)
+    return ZcSweep(f_hz=f_hz[first], z=z[first], ports=sweeps[0].ports)
+
+
+def save_npz(path: Path, sweep: ZcSweep) -> None:
+    np.savez_compressed(path, f_hz=sweep.f_hz, z=sweep.z, ports=np.array(sweep.ports))
+
+
+def load_npz(path: Path) -> ZcSweep:
+    with np.load(path) as d:
+        return ZcSweep(f_hz=d["f_hz"], z=d["z"], ports=tuple(str(p) for p in d["ports"]))
+
+
+def load_sweep(path: Path) -> ZcSweep:
+    """A `Zc.mat` or a sweep saved with `save_npz`."""
+    return load_npz(path) if path.suffix == ".npz" else parse_zc_matrices(path)
 
-    cur_f: Optional[float] = None
-    for raw in lines:
-        line = raw.strip()
-        if not line:
-            continue
-
-        f = _looks_like_freq_line(line)
-        if f is not None:
-            cur_f = f
-            continue
-
-        nums = _floats_in_line(line)
-        if cur_f is not None:
-            if len(nums) >= 2:
-                r, x = float(nums[0]), float(nums[1])
-                yield ZPoint(f_hz=cur_f, r_ohm=r, x_ohm=x)
-                cur_f = None
-            continue
 
-        # No fallback parsing before a frequency line.
+def parse_zc(path: Path) -> List[ZPoint]:
+    """Z[0, 0] at each frequency, for the single-port BFEM deck."""
+    sweep = parse_zc_matrices(path)
+    z00 = sweep.z[:, 0, 0]
+    return [ZPoint(f_hz=f, r_ohm=z.real, x_ohm=z.imag) for f, z in zip(sweep.f_hz.tolist(), z00.tolist())]
 
 
-def parse_zc(path: Path) -> List[ZPoint]:
-    txt = path.read_text(encoding="utf-8", errors="replace").splitlines()
-    points = list(_iter_zpoints(txt))
-    if not points:
-        raise ValueError("Could not find any (freq, Re, Im) data in Zc.mat")
-    return points
+def print_rl_table(sweep: ZcSweep, port: Tuple[int, int] = (0, 0)) -> None:
+    print("f_Hz\tR_ohm\tX_ohm\tL_H")
+    for f, zp in zip(sweep.f_hz.tolist(), sweep.z[:, port[0], port[1]].tolist()):
+        if f <= 0:
+            L = float("nan")
+        else:
+            L = zp.imag / (2.0 * math.pi * f)
+        print(f"{f:.12g}\t{zp.real:.12g}\t{zp.imag:.12g}\t{L:.12g}")
 
 
 def main() -> None:
     ap = argparse.ArgumentParser(description="Parse FastHenry Zc.mat and compute R/L.")
-    ap.add_argument("zc", type=Path, help="Path to Zc.mat")
+    ap.add_argument("zc", type=Path, help="Path to Zc.mat (or a .npz saved with --npz)")
+    ap.add_argument("--npz", type=Path, default=None, help="Save all matrices to this .npz")
+    ap.add_argument(
+        "--port", type=int, nargs=2, default=(1, 1), metavar=("ROW", "COL"), help="Matrix entry to report (1-based)"
+    )
+    ap.add_argument(
+        "--at", type=float, nargs="+", default=None, metavar="F_HZ", help="Interpolate R/L at these frequencies instead"
+    )
     args = ap.parse_args()
 
-    pts = parse_zc(args.zc)
-
-    print("f_Hz\tR_ohm\tX_ohm\tL_H")
-    for p in pts:
-        if p.f_hz <= 0:
-            L = float("nan")
-        else:
-            L = p.x_ohm / (2.0 * math.pi * p.f_hz)
-        print(f"{p.f_hz:.12g}\t{p.r_ohm:.12g}\t{p.x_ohm:.12g}\t{L:.12g}")
+    sweep = load_sweep(args.zc)
+    if args.npz is not None:
+        save_npz(args.npz, sweep)
+    port = (args.port[0] - 1, args.port[1] - 1)
+    n = sweep.z.shape[1]
+    if not (0 <= port[0] < n and 0 <= port[1] < n):
+        raise SystemExit(f"--port out of range for a {n} x {n} matrix")
+
+    if args.at is None:
+        print_rl_table(sweep, port)
+        return
+    r_ohm, l_h = sweep.rl(args.at, port)
+    print("f_Hz\tR_ohm\tL_H")
+    for f, r, L in zip(args.at, r_ohm.tolist(), l_h.tolist()):
+        print(f"{f:.12g}\t{r:.12g}\t{L:.12g}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""Per-stage timing for the BFEM helper scripts (`--profile`).
+
+Scripts wrap their phases in `stage(name)` and tally work items with
+`count(name, n)`; both are no-ops unless `--profile PATH` is given, in which
+case a JSON report is written to PATH when the script finishes:
+
+  {
+    "schema": "bfem:profile:v1",
+    "script": "bfem_capacitance_air",
+    "argv": [...],
+    "total": {"wall_s": 2.41, "cpu_s": 2.37},
+    "stages": [{"name": "moon build", "calls": 1, "wall_s": 1.9, "cpu_s": 0.01}, ...],
+    "counts": {"segments": 8711, "candidate pairs": 120533, ...},
+    "cprofile": "/tmp/bfem.pstats"
+  }
+
+Stage times are summed over calls, so a stage entered from several worker
+threads at once can report more wall time than the whole run. CPU time is
+process CPU time (all threads) while the stage was active.
+
+`--profile-cprofile PATH` additionally runs cProfile around each script's hot
+stage (override with `--profile-stage`) and dumps the stats to PATH for
+`python -m pstats` or snakeviz.
+
+The active profiler is process-global (like `logging`), so shared helpers such
+as the generator launcher can record their own stages without every caller
+threading a profiler through.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_SCHEMA = "bfem:profile:v1"
+
+
+class Profiler:
+    def __init__(
+        self,
+        script: str,
+        report_path: Optional[Path] = None,
+        hot_stage: Optional[str] = None,
+        cprofile_path: Optional[Path] = None,
+    ) -> None:
+        self.script = script
+        self.report_path = report_path
+        self.enabled = report_path is not None or cprofile_path is not None
+        self.hot_stage = hot_stage
+        self.cprofile_path = cprofile_path
+        self._lock = threading.Lock()
+        self._order: List[str] = []
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._cprofile_active = False
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        prof = self._start_cprofile() if name == self.hot_stage else None
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            if prof is not None:
+                prof.disable()
+                with self._lock:
+                    self._cprofile_active = False
+            with self._lock:
+                st = self._stages.get(name)
+                if st is None:
+                    st = self._stages[name] = {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0}
+                    self._order.append(name)
+                st["calls"] += 1
+                st["wall_s"] += wall
+                st["cpu_s"] += cpu
+
+    def _start_cprofile(self) -> Optional[cProfile.Profile]:
+        if self.cprofile_path is None:
+            return None
+        with self._lock:
+            # cProfile only follows one thread; concurrent entries are timed but not profiled.
+            if self._cprofile_active:
+                return None
+            self._cprofile_active = True
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            prof = self._cprofile
+        prof.enable()
+        return prof
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + int(n)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "schema": PROFILE_SCHEMA,
+                "script": self.script,
+                "argv": sys.argv[1:],
+                "total": {
+                    "wall_s": time.perf_counter() - self._wall0,
+                    "cpu_s": time.process_time() - self._cpu0,
+                },
+                "stages": [{"name": n, **self._stages[n]} for n in self._order],
+                "counts": dict(self._counts),
+                "cprofile": str(self.cprofile_path) if self._cprofile is not None else None,
+            }
+
+    def finish(self) -> None:
+        """Write the JSON report (and cProfile dump) if profiling is on."""
+        if not self.enabled:
+            return
+        if self._cprofile is not None and self.cprofile_path is not None:
+            self._cprofile.dump_stats(str(self.cprofile_path))
+        if self.report_path is not None:
+            text = json.dumps(self.report(), indent=2)
+            if str(self.report_path) == "-":
+                sys.stderr.write(text + "\n")
+            else:
+                self.report_path.write_text(text + "\n", encoding="utf-8")
+
+    def __enter__(self) -> "Profiler":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.finish()
+
+
+_active = Profiler("", None)
+
+
+def get_profiler() -> Profiler:
+    return _active
+
+
+def install(profiler: Profiler) -> Profiler:
+    global _active
+    _active = profiler
+    return profiler
+
+
+def stage(name: str):
+    """`with stage("json load"): ...` on the active profiler."""
+    return _active.stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    _active.count(name, n)
+
+
+def add_profile_args(p: argparse.ArgumentParser, hot_stage: str) -> None:
+    p.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Write a JSON per-stage timing report to PATH ('-' for stderr)",
+    )
+    p.add_argument(
+        "--profile-cprofile",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Dump cProfile stats of the hot stage to PATH",
+    )
+    p.add_argument(
+        "--profile-stage",
+        type=str,
+        default=hot_stage,
+        help=f"Stage profiled by --profile-cprofile (default: {hot_stage!r})",
+    )
+
+
+def profiler_from_args(args: argparse.Namespace, script: str) -> Profiler:
+    """Create the script's profiler from its CLI args and make it the active one."""
+    return install(
+        Profiler(
+            script,
+            report_path=args.profile,
+            hot_stage=args.profile_stage,
+            cprofile_path=args.profile_cprofile,
+        )
+    )
@@ -20,9 +20,9 @@ import sys
 import tempfile
 from pathlib import Path
 
-
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[1]
+from bfem_cache import add_cache_args, cache_from_args, params_from_args
+from bfem_generator import BfemRunError, add_launcher_args, export_conductor_network, launcher_from_args, repo_root
+from bfem_profile import add_profile_args, profiler_from_args, stage
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -43,6 +43,10 @@ def build_parser() -> argparse.ArgumentParser:
 
     p.add_argument("--tol-mm", type=float, default=1e-3, help="Quantization tolerance for node matching")
 
+    add_cache_args(p)
+    add_launcher_args(p)
+    add_profile_args(p, hot_stage="verify")
+
     return p
 
 
@@ -58,45 +62,28 @@ def _run(cmd: list[str], cwd: Path) -> None:
 
 def main() -> None:
     args = build_parser().parse_args()
-    repo = _repo_root()
+    with profiler_from_args(args, "bfem_prove_single_wire"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    repo = repo_root()
 
     with tempfile.TemporaryDirectory(prefix="bfem_single_wire_") as td:
         json_path = Path(td) / "bfem_conductor_network.json"
 
-        export_cmd = [
-            "moon",
-            "run",
-            "--target",
-            "native",
-            "examples/12-bifilar-electromagnet",
-            "--",
-            "--nostep",
-            "--export_conductor_network",
-            str(json_path),
-            "--innerDiam",
-            str(args.innerDiam),
-            "--numPairs",
-            str(args.numPairs),
-            "--numSegs",
-            str(args.numSegs),
-            "--vertTurns",
-            str(args.vertTurns),
-            "--wireWidth",
-            str(args.wireWidth),
-            "--wireGap",
-            str(args.wireGap),
-        ]
-        if args.nocage:
-            export_cmd.append("--nocage")
-        if args.nocoil:
-            export_cmd.append("--nocoil")
-        if args.nowires:
-            export_cmd.append("--nowires")
-        if args.nosupport:
-            export_cmd.append("--nosupport")
-
         sys.stdout.write(f"Exporting conductor network: {json_path}\n")
-        _run(export_cmd, cwd=repo)
+        try:
+            with stage("export"):
+                export_conductor_network(
+                    launcher_from_args(args, repo),
+                    cache_from_args(args, repo),
+                    params_from_args(args),
+                    json_path,
+                )
+        except BfemRunError as e:
+            sys.stderr.write(e.stderr)
+            raise SystemExit(e.returncode)
 
         verify_cmd = [
             sys.executable,
@@ -106,7 +93,8 @@ def main() -> None:
             str(args.tol_mm),
         ]
         sys.stdout.write("\nVerifying connectivity...\n")
-        _run(verify_cmd, cwd=repo)
+        with stage("verify"):
+            _run(verify_cmd, cwd=repo)
 
 
 if __name__ == "__main__":
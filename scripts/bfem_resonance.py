@@ -10,19 +10,62 @@ Then estimate the (lumped) resonance:
 
 It also prints the required C for a target f0 given L.
 
+Sweep engine
+Given several L and/or C values (comma-separated lists, every combination is
+a design point), or R(f)/L(f) from a FastHenry `Zc.mat` / `.npz` (`--zc`),
+the lumped self-resonant coil model
+
+  Z(f) = (R + jwL) || 1/(jwC) = (R + jwL) / (1 + jwC (R + jwL))
+
+is evaluated over `--points` log-spaced frequencies for all design points at
+once (blocks of designs x frequencies). The SRF is the first frequency where
+Im(Z) turns from inductive to capacitive; the bracketing grid step is refined
+by vectorized bisection in log f. Each design reports f0_ideal, SRF, R and L
+at the SRF, Q = 2 pi f L / R there, and |Z| at the peak. `--csv` writes that
+table, `--z-csv` the full |Z|/phase curves.
+
 Examples:
   # If you have L and C already:
   ./scripts/bfem_resonance.py --L-uH 120 --C-pF 800
 
   # If you have L and want required C for a target f0:
   ./scripts/bfem_resonance.py --L-mH 1.0 --target-f0-hz 10000
+
+  # SRF map over an L x C grid with a series resistance:
+  ./scripts/bfem_resonance.py --L-uH 1,2,3,4 --C-pF 0.2,0.3,0.4 --R-ohm 0.3 --csv /tmp/srf.csv
+
+  # Frequency-dependent R/L from FastHenry:
+  ./scripts/bfem_resonance.py --zc examples/12-bifilar-electromagnet/Zc.mat --C-pF 0.37
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
+import itertools
 import math
+import sys
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from bfem_parse_fasthenry_zc import ZcSweep, load_sweep
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+# Designs evaluated together: a (designs x frequencies) complex block.
+SWEEP_BLOCK = 256
+BISECT_STEPS = 60
+
+# R(f), L(f) for design rows: (rows, f) -> (R_ohm, L_h), both broadcastable to f.
+RLFunc = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
 
 
 @dataclass(frozen=True)
@@ -31,7 +74,23 @@ class LC:
     C_f: float
 
 
-def _f0_hz(lc: LC) -> float:
+@dataclass(frozen=True)
+class SrfTable:
+    """One row per design point; SRF fields are NaN where no resonance lies in the sweep."""
+
+    l_h: np.ndarray  # L at the SRF (the design L for constant L)
+    c_f: np.ndarray
+    r_ohm: np.ndarray  # R at the SRF
+    f0_ideal_hz: np.ndarray  # 1 / (2 pi sqrt(L C))
+    srf_hz: np.ndarray
+    q: np.ndarray  # 2 pi f L / R at the SRF
+    z_peak_ohm: np.ndarray  # |Z| at the SRF
+
+    def __len__(self) -> int:
+        return int(self.c_f.shape[0])
+
+
+def f0_hz(lc: LC) -> float:
     if lc.L_h <= 0 or lc.C_f <= 0:
         raise ValueError("L and C must be > 0")
     return 1.0 / (2.0 * math.pi * math.sqrt(lc.L_h * lc.C_f))
@@ -44,20 +103,133 @@ def _required_c_f(L_h: float, target_f0_hz: float) -> float:
     return 1.0 / (w * w * L_h)
 
 
+def impedance(f_hz: np.ndarray, r_ohm: np.ndarray, l_h: np.ndarray, c_f: np.ndarray) -> np.ndarray:
+    """Z of a series R-L branch in parallel with C; all arguments broadcast."""
+    w = 2.0 * math.pi * f_hz
+    zl = r_ohm + 1j * w * l_h
+    return zl / (1.0 + 1j * w * c_f * zl)
+
+
+def constant_rl(r_ohm: float, l_h: np.ndarray) -> RLFunc:
+    """Frequency-independent R and per-design L."""
+
+    def rl(rows: np.ndarray, f_hz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        shape = (len(rows),) + (1,) * (np.ndim(f_hz) - 1)
+        return np.full(shape, r_ohm), l_h[rows].reshape(shape)
+
+    return rl
+
+
+def table_rl(sweep: ZcSweep, port: Tuple[int, int] = (0, 0)) -> RLFunc:
+    """R(f), L(f) of one FastHenry port, shared by every design."""
+
+    def rl(rows: np.ndarray, f_hz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        r_ohm, l_h = sweep.rl(np.ravel(f_hz), port)
+        return r_ohm.reshape(np.shape(f_hz)), l_h.reshape(np.shape(f_hz))
+
+    return rl
+
+
+def srf_sweep(f_hz: np.ndarray, c_f: np.ndarray, rl: RLFunc, block: int = SWEEP_BLOCK) -> SrfTable:
+    """Locate the self-resonance of every design over the frequency grid `f_hz`."""
+    n = len(c_f)
+    out = {k: np.full(n, np.nan) for k in ("l_h", "r_ohm", "f0_ideal_hz", "srf_hz", "q", "z_peak_ohm")}
+    f = np.asarray(f_hz, dtype=np.float64)
+    for start in range(0, n, block):
+        rows = np.arange(start, min(n, start + block))
+        c = c_f[rows, None]
+        r, l = rl(rows, f[None, :])
+        im = impedance(f[None, :], r, l, c).imag
+
+        # First inductive -> capacitive step of Im(Z).
+        turn = (im[:, :-1] > 0.0) & (im[:, 1:] <= 0.0)
+        found = turn.any(axis=1)
+        k = np.argmax(turn, axis=1)
+        rows, c, k = rows[found], c_f[rows[found]], k[found]
+        lo, hi = np.log(f[k]), np.log(f[k + 1])
+        for _ in range(BISECT_STEPS):
+            mid = 0.5 * (lo + hi)
+            fm = np.exp(mid)
+            r, l = rl(rows, fm)
+            inductive = impedance(fm, r, l, c).imag > 0.0
+            lo = np.where(inductive, mid, lo)
+            hi = np.where(inductive, hi, mid)
+
+        f0 = np.exp(0.5 * (lo + hi))
+        r, l = rl(rows, f0)
+        r, l = np.broadcast_to(r, f0.shape), np.broadcast_to(l, f0.shape)
+        out["srf_hz"][rows] = f0
+        out["r_ohm"][rows] = r
+        out["l_h"][rows] = l
+        with np.errstate(divide="ignore"):
+            out["q"][rows] = 2.0 * math.pi * f0 * l / r
+        out["z_peak_ohm"][rows] = np.abs(impedance(f0, r, l, c))
+
+    # Designs without a resonance in range still get L and the ideal f0.
+    missing = np.isnan(out["l_h"])
+    if missing.any():
+        rows = np.flatnonzero(missing)
+        f_mid = np.full(len(rows), math.sqrt(f[0] * f[-1]))
+        out["l_h"][rows] = np.broadcast_to(rl(rows, f_mid)[1], f_mid.shape)
+    out["f0_ideal_hz"] = 1.0 / (2.0 * math.pi * np.sqrt(out["l_h"] * c_f))
+    return SrfTable(c_f=np.asarray(c_f, dtype=np.float64), **out)
+
+
+def _float_list(text: str) -> List[float]:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def _write_srf_csv(path: Path, table: SrfTable) -> None:
+    cols = ("l_h", "c_f", "r_ohm", "f0_ideal_hz", "srf_hz", "q", "z_peak_ohm")
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        w.writerows(zip(*(getattr(table, c).tolist() for c in cols)))
+
+
+def _write_z_csv(path: Path, f_hz: np.ndarray, c_f: np.ndarray, rl: RLFunc) -> None:
+    """|Z| and phase per design and frequency, long format."""
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(("design", "f_hz", "z_abs_ohm", "z_phase_deg"))
+        for start in range(0, len(c_f), SWEEP_BLOCK):
+            rows = np.arange(start, min(len(c_f), start + SWEEP_BLOCK))
+            r, l = rl(rows, f_hz[None, :])
+            z = impedance(f_hz[None, :], r, l, c_f[rows, None])
+            mag, phase = np.abs(z), np.degrees(np.angle(z))
+            for i, d in enumerate(rows.tolist()):
+                w.writerows(zip(itertools.repeat(d), f_hz.tolist(), mag[i].tolist(), phase[i].tolist()))
+
+
+def _print_srf_table(table: SrfTable) -> None:
+    print("L_H\tC_F\tR_ohm\tf0_ideal_Hz\tSRF_Hz\tQ\tZpeak_ohm")
+    for row in zip(
+        table.l_h.tolist(),
+        table.c_f.tolist(),
+        table.r_ohm.tolist(),
+        table.f0_ideal_hz.tolist(),
+        table.srf_hz.tolist(),
+        table.q.tolist(),
+        table.z_peak_ohm.tolist(),
+    ):
+        print("\t".join(f"{v:.6g}" for v in row))
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Estimate resonant frequency from L and C.")
 
-    # Inductance inputs (pick one).
-    gL = p.add_mutually_exclusive_group(required=True)
-    gL.add_argument("--L-h", type=float, help="Inductance in henries")
-    gL.add_argument("--L-mH", type=float, help="Inductance in millihenries")
-    gL.add_argument("--L-uH", type=float, help="Inductance in microhenries")
+    # Inductance inputs (pick one; comma-separated lists sweep).
+    gL = p.add_mutually_exclusive_group(required=False)
+    gL.add_argument("--L-h", type=_float_list, help="Inductance in henries")
+    gL.add_argument("--L-mH", type=_float_list, help="Inductance in millihenries")
+    gL.add_argument("--L-uH", type=_float_list, help="Inductance in microhenries")
+    gL.add_argument("--zc", type=Path, help="R(f)/L(f) from a FastHenry Zc.mat (or .npz) instead of a fixed L")
 
     # Capacitance inputs (optional if target-f0 is provided).
     gC = p.add_mutually_exclusive_group(required=False)
-    gC.add_argument("--C-f", type=float, help="Capacitance in farads")
-    gC.add_argument("--C-nF", type=float, help="Capacitance in nanofarads")
-    gC.add_argument("--C-pF", type=float, help="Capacitance in picofarads")
+    gC.add_argument("--C-f", type=_float_list, help="Capacitance in farads")
+    gC.add_argument("--C-nF", type=_float_list, help="Capacitance in nanofarads")
+    gC.add_argument("--C-pF", type=_float_list, help="Capacitance in picofarads")
 
     p.add_argument(
         "--target-f0-hz",
@@ -66,32 +238,81 @@ def build_parser() -> argparse.ArgumentParser:
         help="If set, also print required C for this target f0 (given L)",
     )
 
+    # Sweep engine.
+    p.add_argument("--sweep", action="store_true", help="Run the impedance sweep even for a single L and C")
+    p.add_argument("--R-ohm", type=float, default=0.0, help="Series resistance for fixed-L sweeps (ohms)")
+    p.add_argument("--fmin", type=float, default=None, help="Sweep start (Hz; default: 1/100 of the lowest f0)")
+    p.add_argument("--fmax", type=float, default=None, help="Sweep stop (Hz; default: 100x the highest f0)")
+    p.add_argument("--points", type=int, default=2000, help="Log-spaced sweep frequencies")
+    p.add_argument("--csv", type=Path, default=None, help="Write the SRF table to this CSV")
+    p.add_argument("--z-csv", type=Path, default=None, help="Write |Z| and phase per design and frequency to this CSV")
+
     return p
 
 
+def _run_sweep(args: argparse.Namespace, l_list: Optional[List[float]], c_list: List[float]) -> None:
+    if args.zc is not None:
+        sweep = load_sweep(args.zc)
+        c_f = np.asarray(c_list)
+        rl = table_rl(sweep)
+        l_ref = sweep.rl([math.sqrt(sweep.f_hz.min() * sweep.f_hz.max())])[1]
+        l_lo = l_hi = float(l_ref[0])
+    else:
+        designs = np.array(list(itertools.product(l_list, c_list)))
+        c_f = designs[:, 1].copy()
+        rl = constant_rl(args.R_ohm, designs[:, 0].copy())
+        l_lo, l_hi = min(l_list), max(l_list)
+
+    fmin = args.fmin or 0.01 / (2.0 * math.pi * math.sqrt(l_hi * max(c_list)))
+    fmax = args.fmax or 100.0 / (2.0 * math.pi * math.sqrt(l_lo * min(c_list)))
+    f_hz = np.geomspace(fmin, fmax, max(2, args.points))
+
+    table = srf_sweep(f_hz, c_f, rl)
+    if args.csv is not None:
+        _write_srf_csv(args.csv, table)
+        print(f"Wrote: {args.csv} ({len(table)} designs)")
+    else:
+        _print_srf_table(table)
+    if args.z_csv is not None:
+        _write_z_csv(args.z_csv, f_hz, c_f, rl)
+        print(f"Wrote: {args.z_csv}")
+
+
 def main() -> None:
     args = build_parser().parse_args()
 
+    l_list = None
     if args.L_h is not None:
-        L_h = float(args.L_h)
+        l_list = [float(v) for v in args.L_h]
     elif args.L_mH is not None:
-        L_h = float(args.L_mH) * 1e-3
-    else:
-        L_h = float(args.L_uH) * 1e-6
+        l_list = [float(v) * 1e-3 for v in args.L_mH]
+    elif args.L_uH is not None:
+        l_list = [float(v) * 1e-6 for v in args.L_uH]
+    elif args.zc is None:
+        raise SystemExit("Provide inductance (--L-*) or --zc")
 
-    C_f = None
+    c_list = None
     if args.C_f is not None:
-        C_f = float(args.C_f)
+        c_list = [float(v) for v in args.C_f]
     elif args.C_nF is not None:
-        C_f = float(args.C_nF) * 1e-9
+        c_list = [float(v) * 1e-9 for v in args.C_nF]
     elif args.C_pF is not None:
-        C_f = float(args.C_pF) * 1e-12
+        c_list = [float(v) * 1e-12 for v in args.C_pF]
+
+    if args.zc is not None or args.sweep or args.csv or args.z_csv or len(l_list) > 1 or len(c_list or []) > 1:
+        if not c_list:
+            raise SystemExit("The sweep needs capacitance (--C-*)")
+        _run_sweep(args, l_list, c_list)
+        return
+
+    L_h = l_list[0]
+    C_f = c_list[0] if c_list else None
 
     print(f"L = {L_h:.6g} H")
 
     if C_f is not None:
         print(f"C = {C_f:.6g} F")
-        f0 = _f0_hz(LC(L_h=L_h, C_f=C_f))
+        f0 = f0_hz(LC(L_h=L_h, C_f=C_f))
         print(f"f0 = {f0:.6g} Hz")
 
     if args.target_f0_hz is not None:
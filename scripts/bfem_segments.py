@@ -0,0 +1,224 @@
+"""Struct-of-arrays segment table for BFEM conductor polylines.
+
+The estimators work on the straight segments between consecutive polyline
+points. `SegmentTable` keeps them as contiguous float64 columns (endpoints,
+midpoints, unit directions, lengths and normalized arclength) instead of one
+Python object per segment, so a network costs a fixed 116 bytes per segment
+and every per-segment quantity can be gathered for arrays of segment indices
+at once.
+
+`segment_table` builds the table from an (M, 3) point array in one vectorized
+pass. Zero-length segments (repeated points) are dropped, as the estimators
+have always done. `network_table` stacks several polylines (conductor-network
+paths) into one table, grouped by net: each segment records its net, and the
+arclength coordinate runs over the net's paths in order. `simplify_polyline`
+drops points that lie within a tolerance of a straight chord, for solvers
+whose cost grows with the segment count.
+
+The arithmetic follows the original per-segment tuple code (`x*x + y*y + z*z`
+association, sequential arclength sums), so estimates computed from the table
+agree with it up to floating-point rounding (the pair sums are accumulated in
+a different order).
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+
+def dot3(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise dot product of (M, 3) arrays, associated as (x + y) + z."""
+    return a[:, 0] * b[:, 0] + a[:, 1] * b[:, 1] + a[:, 2] * b[:, 2]
+
+
+def norm3(a: np.ndarray) -> np.ndarray:
+    return np.sqrt(dot3(a, a))
+
+
+@dataclass(frozen=True)
+class SegmentTable:
+    a: np.ndarray  # (N, 3) start points, meters
+    b: np.ndarray  # (N, 3) end points, meters
+    mid: np.ndarray  # (N, 3) midpoints, meters
+    dir: np.ndarray  # (N, 3) unit directions
+    length: np.ndarray  # (N,) meters
+    s_mid: np.ndarray  # (N,) normalized arclength of the midpoint within its net, in [0, 1]
+    net: np.ndarray  # (N,) int32 net id, nets stored contiguously in id order
+    net_length: np.ndarray  # (nets,) meters
+    total_length: float  # meters
+
+    def __len__(self) -> int:
+        return int(self.length.shape[0])
+
+    @property
+    def nets(self) -> int:
+        return int(self.net_length.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(getattr(self, k).nbytes) for k in ("a", "b", "mid", "dir", "length", "s_mid", "net"))
+
+
+def segment_table(points_m: np.ndarray) -> SegmentTable:
+    """Build the segment table of the polyline through `points_m` ((M, 3), meters)."""
+    pts = np.ascontiguousarray(points_m, dtype=np.float64).reshape(-1, 3)
+    if len(pts) < 2:
+        raise ValueError("Path has insufficient points")
+    d = pts[1:] - pts[:-1]
+    lengths = norm3(d)
+    # Sequential running sum, exactly like accumulating segment by segment.
+    cum = np.cumsum(lengths)
+    total = float(cum[-1])
+    if total <= 0:
+        raise ValueError("Total length is zero")
+
+    keep = lengths > 0
+    # Arclength at each segment start: the running sum of the preceding lengths.
+    s_acc = np.concatenate(([0.0], cum[:-1]))[keep]
+    d = d[keep]
+    lengths = lengths[keep]
+    a = pts[:-1][keep]
+    return SegmentTable(
+        a=a,
+        b=pts[1:][keep],
+        mid=a + d * 0.5,
+        dir=d / lengths[:, None],
+        length=lengths,
+        s_mid=(s_acc + 0.5 * lengths) / total,
+        net=np.zeros(len(lengths), dtype=np.int32),
+        net_length=np.array([total]),
+        total_length=total,
+    )
+
+
+def network_table(paths: Sequence[np.ndarray], path_nets: Sequence[int]) -> SegmentTable:
+    """Stack the polylines `paths` (meters) into one table, grouped by net.
+
+    `path_nets[k]` is the net id (0 .. nets-1) of `paths[k]`. Segments are
+    ordered by net, then by path order within the net, so a net's segments
+    are contiguous and index separation still means distance along the wire.
+    A single path gives exactly `segment_table` of that path.
+    """
+    if len(paths) != len(path_nets):
+        raise ValueError("paths and path_nets differ in length")
+    nets = max(path_nets, default=-1) + 1
+    tables = [segment_table(p) for p in paths]
+    parts = []
+    net_length = np.zeros(nets)
+    for net in range(nets):
+        members = [t for t, n in zip(tables, path_nets) if n == net]
+        if not members:
+            raise ValueError(f"net {net} has no paths")
+        net_length[net] = sum(t.total_length for t in members)
+        offset = 0.0
+        for t in members:
+            s_mid = t.s_mid if len(members) == 1 else (offset + t.s_mid * t.total_length) / net_length[net]
+            offset += t.total_length
+            parts.append((t, s_mid, net))
+    return SegmentTable(
+        a=np.concatenate([t.a for t, _, _ in parts]),
+        b=np.concatenate([t.b for t, _, _ in parts]),
+        mid=np.concatenate([t.mid for t, _, _ in parts]),
+        dir=np.concatenate([t.dir for t, _, _ in parts]),
+        length=np.concatenate([t.length for t, _, _ in parts]),
+        s_mid=np.concatenate([s for _, s, _ in parts]),
+        net=np.concatenate([np.full(len(t), net, dtype=np.int32) for t, _, net in parts]),
+        net_length=net_length,
+        total_length=float(net_length.sum()),
+    )
+
+
+def segment_distances(p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """Minimum distances between 3D line segments p1[k]-q1[k] and p2[k]-q2[k].
+
+    Batched form of the standard closest-points-on-segments formula; every
+    argument is an (M, 3) array. Degenerate inputs follow the same branches
+    as the one-pair version: both segments points, one segment a point, and
+    parallel segments (zero denominator, s = 0).
+    """
+
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = dot3(d1, d1)
+    e = dot3(d2, d2)
+    f = dot3(d2, r)
+    c = dot3(d1, r)
+    b = dot3(d1, d2)
+
+    p1_point = a <= 1e-18
+    p2_point = e <= 1e-18
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = a * e - b * b
+        s = np.where(denom != 0.0, np.clip((b * f - c * e) / denom, 0.0, 1.0), 0.0)
+        t = (b * s + f) / e
+        below = t < 0.0
+        above = t > 1.0
+        s = np.where(below, np.clip(-c / a, 0.0, 1.0), s)
+        s = np.where(above, np.clip((b - c) / a, 0.0, 1.0), s)
+        t = np.clip(t, 0.0, 1.0)
+
+        # Segment 1 is a point: closest point on segment 2 to p1.
+        s = np.where(p1_point, 0.0, s)
+        t = np.where(p1_point & ~p2_point, np.clip(f / e, 0.0, 1.0), t)
+        # Segment 2 is a point: closest point on segment 1 to p2.
+        s = np.where(p2_point & ~p1_point, np.clip(-c / a, 0.0, 1.0), s)
+        t = np.where(p2_point, 0.0, t)
+
+    c1 = p1 + d1 * s[:, None]
+    c2 = p2 + d2 * t[:, None]
+    return norm3(c1 - c2)
+
+
+def point_segment_distances(p: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distances from the (M, 3) points `p` to the single segment a-b."""
+    d = b - a
+    dd = float(d @ d)
+    r = p - a
+    t = np.clip((r @ d) / dd, 0.0, 1.0) if dd > 1e-18 else np.zeros(len(p))
+    return norm3(r - t[:, None] * d)
+
+
+def simplify_polyline(points: np.ndarray, tol: float, pinned: Sequence[int] = ()) -> Tuple[np.ndarray, float]:
+    """Indices of the points to keep so the polyline stays within `tol` of the original.
+
+    Douglas-Peucker: a run of points is replaced by its chord when every
+    dropped point lies within `tol` of that chord, otherwise it is split at
+    the farthest point. The first and last points and every index in
+    `pinned` are always kept (the polyline is simplified piecewise between
+    them). Returns the sorted kept indices and the largest distance of a
+    dropped point from its chord (0 when nothing was dropped).
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    keep[np.asarray(pinned, dtype=np.int64)] = True
+    anchors = np.flatnonzero(keep)
+    stack = list(zip(anchors[:-1].tolist(), anchors[1:].tolist()))
+    max_dev = 0.0
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        d = point_segment_distances(points[i + 1 : j], points[i], points[j])
+        k = int(np.argmax(d))
+        if d[k] > tol:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+        else:
+            max_dev = max(max_dev, float(d[k]))
+    return np.flatnonzero(keep), max_dev
@@ -0,0 +1,293 @@
+"""Uniform-grid neighbour index for BFEM point and segment sets.
+
+`GridIndex` buckets points (segment midpoints, polyline nodes, ...) into cubic
+cells and stores the buckets CSR-style: one stable argsort of the linear cell
+ids (`order`) plus the sorted ids themselves, so a cell's members are a
+contiguous slice and appear in ascending point index. When the padded
+bounding box has at most `DENSE_CELLS_PER_POINT` cells per point (any wound
+coil), a row-pointer array over all cells (`cell_start`) turns the slice
+lookup into two gathers; sparse boxes fall back to `searchsorted` on the
+sorted ids. There are no per-cell Python objects, so building the index for a
+million points is a couple of NumPy sorts.
+
+`pair_blocks` answers the bulk query "all pairs (i, j), j - i > min_index_sep,
+whose points are within `radius`" by scanning the 27 cells around every point.
+Pairs are produced in blocks of consecutive home points, each block expanding
+at most `chunk_pairs` candidates, so memory stays flat however many pairs the
+query returns. Each pair carries the neighbour offset it was found through;
+sorting a block by (i, offset, j) reproduces the order of a point-by-point
+walk of the grid (a stable sort by i alone does it, since the block is laid
+out offset by offset, each in (i, j) order), which callers use for order-stable sums. `blocks` and
+`block_pairs` expose the same split one block at a time, so blocks can be
+farmed out to worker processes (`from_arrays` rebuilds an index from shared
+arrays) and still be reduced in a fixed order.
+
+`close_pairs` is a leaner one-shot variant for tiny radii where almost every
+cell holds one point (endpoint merging): it visits only the 13 forward
+neighbour cells plus the home cell, and queries the cells in sorted order so
+the bucket lookups walk memory sequentially.
+
+A uniform grid with cells the size of the query radius suits the BFEM
+geometry (wire-sized spacing everywhere); a KD-tree would only pay off for
+strongly non-uniform point densities.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+from bfem_segments import norm3
+
+# Neighbour cell offsets in (dx, dy, dz) order; a pair's offset index is its
+# position in this list, as seen from the pair's first point.
+NEIGHBOUR_OFFSETS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+# Offsets with a positive linear cell id; with the home cell they see each cell pair once.
+FORWARD_OFFSETS = [o for o in NEIGHBOUR_OFFSETS if o > (0, 0, 0)]
+
+# Default upper bound on candidate pairs expanded per block.
+CHUNK_PAIRS = 1 << 18
+
+# Largest bounding box, in cells per point, that gets a dense cell_start table.
+DENSE_CELLS_PER_POINT = 8
+
+
+@dataclass(frozen=True)
+class PairBlock:
+    """Pairs found for home points [start, stop), grouped by neighbour offset."""
+
+    start: int
+    stop: int
+    i: np.ndarray  # int32, first point (the smaller index)
+    j: np.ndarray  # int32, second point
+    offset: np.ndarray  # int8, index into NEIGHBOUR_OFFSETS
+    candidates: int  # pairs examined before the radius test
+
+    def __len__(self) -> int:
+        return int(self.i.shape[0])
+
+    def walk_order(self) -> np.ndarray:
+        """Permutation sorting the block into grid-walk order (i, offset, j).
+
+        block_pairs emits the pairs offset by offset, each run in (i, j)
+        order, so a stable sort on i alone yields (i, offset, j). That also
+        holds for any masked subset of the block.
+        """
+        return np.argsort(self.i, kind="stable")
+
+
+class GridIndex:
+    def __init__(self, points: np.ndarray, cell: float) -> None:
+        if not cell > 0:
+            raise ValueError(f"cell size must be positive, got {cell}")
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        self.cell = float(cell)
+        n = len(self.points)
+
+        keys = np.floor(self.points / self.cell).astype(np.int64)
+        if n:
+            # Pad by one cell on every side so neighbour offsets never wrap around.
+            keys -= keys.min(axis=0) - 1
+            dims = keys.max(axis=0) + 2
+        else:
+            dims = np.ones(3, dtype=np.int64)
+        strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+        self.offset_ids = np.array(NEIGHBOUR_OFFSETS, dtype=np.int64) @ strides
+        self.ids = keys @ strides
+        # Bucket order; stable, so each cell lists its points in ascending index.
+        self.order = np.argsort(self.ids, kind="stable").astype(np.int32)
+        self.sorted_ids = self.ids[self.order]
+        # Row pointers over every cell of the padded box (empty when too sparse).
+        cells = int(np.prod(dims))
+        if cells <= DENSE_CELLS_PER_POINT * max(n, 1):
+            self.cell_start = np.searchsorted(self.sorted_ids, np.arange(cells + 1, dtype=np.int64))
+        else:
+            self.cell_start = np.zeros(0, dtype=np.int64)
+
+    # Array attributes that fully describe a built index (see from_arrays).
+    ARRAYS = ("points", "ids", "order", "sorted_ids", "offset_ids", "cell_start")
+
+    @classmethod
+    def from_arrays(cls, cell: float, arrays: Mapping[str, np.ndarray]) -> "GridIndex":
+        """Rebuild an index from another index's arrays without re-sorting.
+
+        Lets worker processes share one index through shared memory.
+        """
+        index = cls.__new__(cls)
+        index.cell = float(cell)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        return index
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def cells(self) -> int:
+        """Number of occupied cells."""
+        if not len(self.sorted_ids):
+            return 0
+        return int(np.count_nonzero(np.diff(self.sorted_ids))) + 1
+
+    def _ranges(self, cell_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(self.cell_start):
+            return self.cell_start.take(cell_ids), self.cell_start.take(cell_ids + 1)
+        lo = np.searchsorted(self.sorted_ids, cell_ids, side="left")
+        hi = np.searchsorted(self.sorted_ids, cell_ids, side="right")
+        return lo, hi
+
+    def neighbour_counts(self) -> np.ndarray:
+        """Points in the 27 cells around each point (itself included)."""
+        load = np.zeros(len(self), dtype=np.int64)
+        for d in self.offset_ids:
+            lo, hi = self._ranges(self.ids + d)
+            load += hi - lo
+        return load
+
+    def blocks(self, chunk_pairs: int = CHUNK_PAIRS) -> List[Tuple[int, int]]:
+        """Split points into consecutive [start, stop) blocks of about `chunk_pairs` candidates.
+
+        The split depends only on the index and `chunk_pairs`, so the same
+        blocks come out however they are later distributed.
+        """
+        n = len(self)
+        chunk_pairs = max(1, int(chunk_pairs))
+        cum = np.cumsum(self.neighbour_counts())
+        bounds = [0]
+        while bounds[-1] < n:
+            done = int(cum[bounds[-1] - 1]) if bounds[-1] else 0
+            # Always take at least one point, even if it alone exceeds the budget.
+            nxt = int(np.searchsorted(cum, done + chunk_pairs, side="right"))
+            bounds.append(min(n, max(nxt, bounds[-1] + 1)))
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def block_pairs(self, start: int, stop: int, radius: float, min_index_sep: int = 0) -> PairBlock:
+        """Pairs within `radius` whose first point lies in [start, stop).
+
+        `radius` may not exceed the cell size (pairs further apart than one
+        cell are not scanned). The distance test keeps a pair unless it is
+        strictly farther than `radius`.
+        """
+        if radius > self.cell:
+            raise ValueError(f"query radius {radius} exceeds the index cell size {self.cell}")
+        sep = max(0, int(min_index_sep))
+        pts = self.points
+        idx = np.arange(start, stop, dtype=np.int32)
+        home = self.ids[start:stop]
+        parts_i: List[np.ndarray] = []
+        parts_j: List[np.ndarray] = []
+        parts_o: List[np.ndarray] = []
+        candidates = 0
+        for oi, d in enumerate(self.offset_ids):
+            lo, hi = self._ranges(home + d)
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Expand each point's bucket range [lo, hi) into explicit (i, j) pairs.
+            i = np.repeat(idx, counts)
+            starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+            j = self.order.take(starts + np.arange(total, dtype=np.int64))
+
+            # Later points only (each pair once), far enough apart in index.
+            keep = j - i > sep
+            i, j = i[keep], j[keep]
+            candidates += len(i)
+
+            keep = ~(norm3(pts.take(i, axis=0) - pts.take(j, axis=0)) > radius)
+            parts_i.append(i[keep])
+            parts_j.append(j[keep])
+            parts_o.append(np.full(int(np.count_nonzero(keep)), oi, dtype=np.int8))
+
+        if parts_i:
+            i, j, o = np.concatenate(parts_i), np.concatenate(parts_j), np.concatenate(parts_o)
+        else:
+            i = j = np.zeros(0, dtype=np.int32)
+            o = np.zeros(0, dtype=np.int8)
+        return PairBlock(start=start, stop=stop, i=i, j=j, offset=o, candidates=candidates)
+
+    def pair_blocks(
+        self,
+        radius: float,
+        min_index_sep: int = 0,
+        chunk_pairs: int = CHUNK_PAIRS,
+    ) -> Iterator[PairBlock]:
+        """Yield every pair within `radius` with j - i > min_index_sep, block by block."""
+        for start, stop in self.blocks(chunk_pairs):
+            yield self.block_pairs(start, stop, radius, min_index_sep)
+
+    def pairs_within(self, radius: float, min_index_sep: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """All pairs within `radius` as (i, j) arrays, in grid-walk order."""
+        parts_i: List[np.ndarray] = []
+        parts_j: List[np.ndarray] = []
+        for block in self.pair_blocks(radius, min_index_sep):
+            walk = block.walk_order()
+            parts_i.append(block.i[walk])
+            parts_j.append(block.j[walk])
+        if not parts_i:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        return np.concatenate(parts_i), np.concatenate(parts_j)
+
+
+def close_pairs(points: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Every pair (i < j) of `points` at most `radius` apart, with its distance.
+
+    Cost is linear in points plus candidates, so it suits sparse queries; a
+    cell crowded with k points expands k^2 / 2 candidates.
+    """
+    if not radius > 0:
+        raise ValueError(f"radius must be positive, got {radius}")
+    pts = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+    n = len(pts)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    keys = np.floor(pts / radius).astype(np.int64)
+    keys -= keys.min(axis=0) - 1
+    dims = keys.max(axis=0) + 2
+    strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    ids = keys @ strides
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    rank = np.arange(n, dtype=np.int64)
+
+    parts_i: List[np.ndarray] = []
+    parts_j: List[np.ndarray] = []
+    parts_d: List[np.ndarray] = []
+    for d in [0] + [int(np.dot(o, strides)) for o in FORWARD_OFFSETS]:
+        # Sorted queries keep searchsorted close to a linear merge.
+        lo = np.searchsorted(sorted_ids, sorted_ids + d, side="left")
+        hi = np.searchsorted(sorted_ids, sorted_ids + d, side="right")
+        if d == 0:
+            lo = rank + 1  # later members of the home cell only
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        a = np.repeat(rank, counts)
+        b = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total, dtype=np.int64)
+        i, j = order[a], order[b]
+        dist = norm3(pts[i] - pts[j])
+        keep = ~(dist > radius)
+        i, j = i[keep], j[keep]
+        parts_i.append(np.minimum(i, j))
+        parts_j.append(np.maximum(i, j))
+        parts_d.append(dist[keep])
+
+    if not parts_i:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(parts_i), np.concatenate(parts_j), np.concatenate(parts_d)
@@ -0,0 +1,176 @@
+"""Closed-form helix metrics for Example 12 (BFEM), without the generator.
+
+`--report`'s helix-only quantities (`helix_length_mm`, `area_mm2`,
+`rdc_est_ohm`, ...) are deterministic functions of the coil parameters. The
+generator samples each helix with `cad/helix.mbt`'s `helix_path`:
+
+- `N = ceil(vertTurns * numSegs)` segments per helix,
+- an angle step of `2*pi*vertTurns / N` and a rise of `h*vertTurns / N` per
+  segment, on a circle of radius `r`,
+
+so every segment of one helix is a chord of the same length
+`sqrt((2*r*sin(dtheta/2))^2 + dz^2)`. With `coil_turn_dimensions`
+(`r_k = innerDiam/2 + w/2 + (k-1)*(g+w)`, `h = 2*(w+g)`) and two helices per
+pair, the total length is `2 * sum_k N * chord_k` and needs no path sampling.
+
+`helix_metrics` evaluates that for whole columns of candidates at once (using
+NumPy when it is installed, plain Python otherwise). `SurrogateDrift` tracks
+how far the surrogate is from real `--report` output when spot-checked.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # the plain-Python path below is still fast for sweeps
+    np = None
+
+# Report keys the surrogate reproduces (everything else needs the generator).
+SURROGATE_KEYS = (
+    "wire_width_mm",
+    "area_mm2",
+    "area_m2",
+    "helix_length_mm",
+    "helix_length_m",
+    "rho_ohm_m",
+    "rdc_est_ohm",
+)
+
+# Keys compared by SurrogateDrift.
+DRIFT_KEYS = ("helix_length_mm", "area_mm2", "rdc_est_ohm")
+
+
+def helix_length_mm(
+    inner_diam: float,
+    num_pairs: int,
+    num_segs: int,
+    vert_turns: float,
+    wire_width: float,
+    wire_gap: float,
+) -> float:
+    """Total bifilar helix centerline length (mm) for one parameter set."""
+    total = math.ceil(vert_turns * num_segs)
+    if total < 1:
+        return 0.0
+    half_angle = math.pi * vert_turns / total
+    dz = 2.0 * (wire_width + wire_gap) * vert_turns / total
+    s = 2.0 * math.sin(half_angle)
+    r0 = inner_diam / 2.0 + wire_width / 2.0
+    pitch = wire_gap + wire_width
+    chords = 0.0
+    for k in range(num_pairs):
+        chord_xy = s * (r0 + k * pitch)
+        chords += math.sqrt(chord_xy * chord_xy + dz * dz)
+    return 2.0 * total * chords
+
+
+def _helix_lengths_numpy(
+    inner_diam: Sequence[float],
+    num_pairs: Sequence[int],
+    num_segs: Sequence[int],
+    vert_turns: Sequence[float],
+    wire_width: Sequence[float],
+    wire_gap: Sequence[float],
+) -> List[float]:
+    d = np.asarray(inner_diam, dtype=np.float64)
+    n = np.asarray(num_pairs, dtype=np.int64)
+    segs = np.asarray(num_segs, dtype=np.float64)
+    t = np.asarray(vert_turns, dtype=np.float64)
+    w = np.asarray(wire_width, dtype=np.float64)
+    g = np.asarray(wire_gap, dtype=np.float64)
+
+    total = np.ceil(t * segs)
+    valid = total >= 1
+    safe_total = np.where(valid, total, 1.0)
+    s = 2.0 * np.sin(np.pi * t / safe_total)
+    dz = 2.0 * (w + g) * t / safe_total
+    r0 = d / 2.0 + w / 2.0
+    pitch = g + w
+
+    # One column per pair index, masked past each candidate's numPairs.
+    k = np.arange(int(n.max()) if n.size else 0, dtype=np.float64)
+    chord_xy = s[:, None] * (r0[:, None] + k[None, :] * pitch[:, None])
+    chords = np.sqrt(chord_xy * chord_xy + (dz * dz)[:, None])
+    chords = np.where(k[None, :] < n[:, None], chords, 0.0)
+    length = 2.0 * total * chords.sum(axis=1)
+    return np.where(valid, length, 0.0).tolist()
+
+
+def helix_metrics(
+    inner_diam: Sequence[float],
+    num_pairs: Sequence[int],
+    num_segs: Sequence[int],
+    vert_turns: Sequence[float],
+    wire_width: Sequence[float],
+    wire_gap: Sequence[float],
+    rho: Sequence[float],
+    nocoil: Sequence[bool],
+) -> Dict[str, List[float]]:
+    """Evaluate the helix-only `--report` metrics for columns of candidates.
+
+    Every argument is one column (all the same length); the result maps each
+    key in SURROGATE_KEYS to a column of values in the same order.
+    """
+    if np is not None and len(num_pairs) > 1:
+        lengths = _helix_lengths_numpy(inner_diam, num_pairs, num_segs, vert_turns, wire_width, wire_gap)
+    else:
+        lengths = [
+            helix_length_mm(*row)
+            for row in zip(inner_diam, num_pairs, num_segs, vert_turns, wire_width, wire_gap)
+        ]
+    out: Dict[str, List[float]] = {k: [] for k in SURROGATE_KEYS}
+    for length, w, r, off in zip(lengths, wire_width, rho, nocoil):
+        length_mm = 0.0 if off else length
+        area_mm2 = w * w
+        area_m2 = area_mm2 * 1.0e-6
+        length_m = length_mm * 1.0e-3
+        out["wire_width_mm"].append(w)
+        out["area_mm2"].append(area_mm2)
+        out["area_m2"].append(area_m2)
+        out["helix_length_mm"].append(length_mm)
+        out["helix_length_m"].append(length_m)
+        out["rho_ohm_m"].append(r)
+        out["rdc_est_ohm"].append(0.0 if length_m == 0.0 else r * length_m / area_m2)
+    return out
+
+
+def helix_metrics_for(params_list: Sequence[Mapping[str, object]]) -> List[Dict[str, float]]:
+    """Row-wise wrapper around helix_metrics for generator parameter dicts."""
+
+    def col(name: str) -> list:
+        return [p[name] for p in params_list]
+
+    cols = helix_metrics(
+        col("innerDiam"),
+        col("numPairs"),
+        col("numSegs"),
+        col("vertTurns"),
+        col("wireWidth"),
+        col("wireGap"),
+        col("rho"),
+        [bool(p.get("nocoil")) for p in params_list],
+    )
+    return [{k: cols[k][i] for k in SURROGATE_KEYS} for i in range(len(params_list))]
+
+
+@dataclass
+class SurrogateDrift:
+    """Largest relative surrogate-vs-generator difference seen per key."""
+
+    checked: int = 0
+    max_rel: Dict[str, float] = field(default_factory=lambda: {k: 0.0 for k in DRIFT_KEYS})
+
+    def add(self, surrogate: Mapping[str, float], reference: Mapping[str, float]) -> None:
+        self.checked += 1
+        for k in DRIFT_KEYS:
+            a, b = float(surrogate[k]), float(reference[k])
+            scale = max(abs(a), abs(b))
+            rel = abs(a - b) / scale if scale > 0.0 else 0.0
+            self.max_rel[k] = max(self.max_rel[k], rel)
+
+    def worst(self) -> float:
+        return max(self.max_rel.values(), default=0.0)
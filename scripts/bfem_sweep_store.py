@@ -0,0 +1,227 @@
+"""Append-only on-disk store for bfem_analyze.py sweep rows.
+
+Every finished sweep variant is appended (and flushed) as soon as it
+completes, so an interrupted sweep keeps everything evaluated so far and
+`--resume` can skip those variants on the next run.
+
+The format follows the store path's suffix:
+
+- `.csv`   one header row, then one row per variant,
+- `.jsonl` one JSON object per variant,
+- `.bin`   fixed-size little-endian float64 records (`RECORD`), one per
+  variant, with the columns listed in the metadata.
+
+Next to the store, `<store>.meta.json` records the schema, the column names
+and the *context* the rows were computed in (the parameters that are not
+swept, the evaluator, and the generator source fingerprint). Resuming against
+a different context is refused rather than mixing incomparable rows.
+
+A write interrupted mid-row leaves a partial trailing line/record; it is
+dropped (and the file truncated back to the last complete row) when the store
+is reopened.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import io
+import itertools
+import json
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, List, Mapping, Tuple, TypeVar
+
+STORE_SCHEMA = "bfem:sweep-store:v1"
+
+ROW_FIELDS = (
+    "numPairs",
+    "vertTurns",
+    "wireWidth",
+    "wireGap",
+    "helix_length_m",
+    "rdc_ohm",
+    "c_proxy",
+    "cage_rdc_ohm",
+    "exit_rdc_ohm",
+)
+
+RECORD = struct.Struct("<" + "d" * len(ROW_FIELDS))
+
+FORMATS = (".csv", ".jsonl", ".bin")
+
+VariantKey = Tuple[int, float, float, float]
+
+
+class StoreMismatchError(ValueError):
+    """An existing store was recorded with different fixed parameters."""
+
+
+def row_key(row: Mapping[str, Any]) -> VariantKey:
+    return (int(row["numPairs"]), float(row["vertTurns"]), float(row["wireWidth"]), float(row["wireGap"]))
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(path.name + ".meta.json")
+
+
+def _normalize_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {k: float(row[k]) for k in ROW_FIELDS}
+    out["numPairs"] = int(out["numPairs"])
+    return out
+
+
+class SweepStore:
+    """Streams sweep rows to disk; safe to append from several threads."""
+
+    def __init__(self, path: Path, context: Mapping[str, Any], resume: bool) -> None:
+        if path.suffix not in FORMATS:
+            raise ValueError(f"unsupported sweep store suffix {path.suffix!r} (use one of {', '.join(FORMATS)})")
+        self.path = path
+        self.format = path.suffix
+        self.context = dict(context)
+        self._lock = threading.Lock()
+        self._recorded: Dict[VariantKey, Dict[str, Any]] = {}
+
+        if resume and path.exists():
+            self._check_meta()
+            self._recorded = {row_key(r): r for r in self._load_and_repair()}
+            self._f = open(path, "ab" if self.format == ".bin" else "a", **self._open_kwargs())
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_meta()
+            self._f = open(path, "wb" if self.format == ".bin" else "w", **self._open_kwargs())
+            if self.format == ".csv":
+                self._f.write(",".join(ROW_FIELDS) + "\n")
+                self._f.flush()
+
+    def _open_kwargs(self) -> Dict[str, Any]:
+        return {} if self.format == ".bin" else {"encoding": "utf-8", "newline": ""}
+
+    def _write_meta(self) -> None:
+        meta = {
+            "schema": STORE_SCHEMA,
+            "format": self.format.lstrip("."),
+            "fields": list(ROW_FIELDS),
+            "context": self.context,
+        }
+        if self.format == ".bin":
+            meta["record"] = {"struct": RECORD.format, "size": RECORD.size}
+        _meta_path(self.path).write_text(json.dumps(meta, indent=2, sort_keys=True), encoding="utf-8")
+
+    def _check_meta(self) -> None:
+        try:
+            meta = json.loads(_meta_path(self.path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise StoreMismatchError(f"{self.path}: cannot read store metadata ({e})") from e
+        if meta.get("schema") != STORE_SCHEMA or meta.get("fields") != list(ROW_FIELDS):
+            raise StoreMismatchError(f"{self.path}: store was written by an incompatible version")
+        if meta.get("context") != json.loads(json.dumps(self.context)):
+            diff = sorted(
+                k
+                for k in set(meta.get("context", {})) | set(self.context)
+                if meta.get("context", {}).get(k) != self.context.get(k)
+            )
+            raise StoreMismatchError(
+                f"{self.path}: store was recorded with different settings ({', '.join(diff)}); "
+                "start a new store instead of --resume"
+            )
+
+    def _load_and_repair(self) -> List[Dict[str, Any]]:
+        data = self.path.read_bytes()
+        good = _complete_length(data, self.format)
+        if good < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        if self.format == ".csv" and good == 0:
+            with open(self.path, "w", encoding="utf-8", newline="") as f:
+                f.write(",".join(ROW_FIELDS) + "\n")
+        return _parse_rows(data[:good], self.format)
+
+    def recorded(self) -> Dict[VariantKey, Dict[str, Any]]:
+        """Rows already in the store (from a resumed run), keyed by variant."""
+        return dict(self._recorded)
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        r = _normalize_row(row)
+        with self._lock:
+            if self.format == ".bin":
+                self._f.write(RECORD.pack(*(float(r[k]) for k in ROW_FIELDS)))
+            elif self.format == ".csv":
+                self._f.write(",".join(repr(r[k]) for k in ROW_FIELDS) + "\n")
+            else:
+                self._f.write(json.dumps(r) + "\n")
+            self._f.flush()
+            self._recorded[row_key(r)] = r
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+
+    def __enter__(self) -> "SweepStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _complete_length(data: bytes, fmt: str) -> int:
+    """Length of the prefix of `data` that holds only complete rows."""
+    if fmt == ".bin":
+        return len(data) // RECORD.size * RECORD.size
+    return data.rfind(b"\n") + 1
+
+
+def _parse_rows(data: bytes, fmt: str) -> List[Dict[str, Any]]:
+    if fmt == ".bin":
+        return [_normalize_row(dict(zip(ROW_FIELDS, values))) for values in RECORD.iter_unpack(data)]
+    text = data.decode("utf-8")
+    if fmt == ".csv":
+        return [_normalize_row(r) for r in csv.DictReader(io.StringIO(text))]
+    return [_normalize_row(json.loads(line)) for line in text.splitlines() if line.strip()]
+
+
+def read_rows(path: Path) -> List[Dict[str, Any]]:
+    """Read back a store's complete rows (ignoring a partial trailing row)."""
+    data = path.read_bytes()
+    return _parse_rows(data[: _complete_length(data, path.suffix)], path.suffix)
+
+
+T = TypeVar("T")
+
+
+class TopN(Generic[T]):
+    """Keeps the `n` smallest items under `key` in O(n) memory.
+
+    A heap holds the current best `n` with the *worst* of them at the root,
+    so each push is O(log n) and anything worse than the root is rejected
+    immediately. Ties keep the earlier item, matching a stable sort.
+    """
+
+    def __init__(self, n: int, key: Callable[[T], Tuple[float, ...]]) -> None:
+        self.n = max(0, n)
+        self.key = key
+        self._heap: List[Tuple[Tuple[float, ...], int, T]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, item: T) -> None:
+        if self.n == 0:
+            return
+        # Max-heap via negated keys; the negated sequence number makes the
+        # earliest of equal items the one that survives.
+        entry = (tuple(-x for x in self.key(item)), -next(self._counter), item)
+        with self._lock:
+            if len(self._heap) < self.n:
+                heapq.heappush(self._heap, entry)
+            elif entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List[T]:
+        """The kept items, best first."""
+        ordered = sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        return [item for _, _, item in ordered]
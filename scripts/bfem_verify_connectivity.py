@@ -10,42 +10,90 @@ verify that the resulting conductor network is:
 - one connected component, and
 - a single path graph (exactly two degree-1 nodes, all others degree-2)
 
+Endpoints are merged into one node when they lie within `--tol-mm` of each
+other in true Euclidean distance (pairs found with `close_pairs` from
+scripts/bfem_spatial.py, then joined by union-find), so points straddling a
+grid boundary still merge. Merging is transitive: the checker reports the
+largest merge distance and warns when chained merges put points of one node
+more than the tolerance apart.
+
 Usage:
   moon run --target native examples/12-bifilar-electromagnet -- \
         --export_centerlines /tmp/bfem_centerlines.json
 
   ./scripts/bfem_verify_connectivity.py /tmp/bfem_centerlines.json
+
+The binary sidecar from `--export_conductor_network_bin` is accepted as well
+(see scripts/bfem_network.py).
 """
 
 from __future__ import annotations
 
 import argparse
-import json
-import math
-from collections import defaultdict, deque
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, List
+
+from bfem_network import read_network
+from bfem_segments import norm3
+from bfem_spatial import close_pairs
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy not found.")
+    print("")
+    print("Install with uv:")
+    print("  uv pip install numpy")
+    sys.exit(1)
+
+# Offending nodes listed per failure reason.
+MAX_EXAMPLES = 5
 
 
 @dataclass(frozen=True)
-class Key3:
-    x: int
-    y: int
-    z: int
+class EndpointGraph:
+    """Path points merged into nodes; edges are consecutive points of a path."""
+
+    points: np.ndarray  # (P, 3) every path point, paths concatenated
+    node: np.ndarray  # (P,) node id of each point
+    coords: np.ndarray  # (nodes, 3) first point merged into each node
+    edge_a: np.ndarray  # (E,) point index of each edge start; the end is edge_a + 1
+    path_start: np.ndarray  # (paths + 1,) offsets of each path in `points`
+    path_names: List[str]
+    max_merge_mm: float  # largest distance between two directly merged points
+    max_spread_mm: float  # largest distance of a point from its node's coords
 
+    @property
+    def nodes(self) -> int:
+        return int(self.coords.shape[0])
 
-def _quantize_mm(p: List[float], tol_mm: float) -> Key3:
-    # Quantize to a grid so that points within tolerance collapse.
-    # This is robust to minor floating-point noise.
-    q = 1.0 / tol_mm
-    return Key3(int(round(p[0] * q)), int(round(p[1] * q)), int(round(p[2] * q)))
+    @property
+    def edges(self) -> int:
+        return int(self.edge_a.shape[0])
+
+    def degrees(self) -> np.ndarray:
+        ends = self.node[np.concatenate([self.edge_a, self.edge_a + 1])]
+        return np.bincount(ends, minlength=self.nodes)
+
+    def edge_name(self, e: int) -> str:
+        a = int(self.edge_a[e])
+        k = int(np.searchsorted(self.path_start, a, side="right")) - 1
+        i = a - int(self.path_start[k]) + 1
+        return f"{self.path_names[k]}[{i-1}->{i}]"
+
+    def node_edges(self, n: int) -> List[str]:
+        """Names of the edges touching node `n`; built on demand for diagnostics."""
+        pts = np.flatnonzero(self.node == n)
+        es = np.union1d(np.searchsorted(self.edge_a, pts), np.searchsorted(self.edge_a, pts - 1))
+        es = es[es < self.edges]
+        es = es[np.isin(self.edge_a[es], pts) | np.isin(self.edge_a[es] + 1, pts)]
+        return [self.edge_name(int(e)) for e in es]
 
 
 def _load(path: Path) -> Dict[str, Any]:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    if not isinstance(data, dict):
-        raise ValueError("JSON root must be an object")
+    data = read_network(path)
     schema = data.get("schema")
     if schema not in {"bfem:centerlines:v1", "bfem:conductor-network:v1"}:
         raise ValueError(f"Unexpected schema: {schema}")
@@ -54,17 +102,64 @@ def _load(path: Path) -> Dict[str, Any]:
     return data
 
 
-def _iter_segment_edges(
-    data: Dict[str, Any]
-) -> Iterable[Tuple[str, List[float], List[float]]]:
-    """Yield undirected edges for each consecutive point-pair in each path."""
+def build_graph(data: Dict[str, Any], tol_mm: float) -> EndpointGraph:
+    """Concatenate the paths and merge points within `tol_mm` of each other into nodes."""
+    arrays: List[np.ndarray] = []
+    names: List[str] = []
     for idx, path in enumerate(data.get("paths", [])):
-        name = str(path.get("name", f"path-{idx}"))
         pts = path.get("points")
-        if not isinstance(pts, list) or len(pts) < 2:
+        if pts is None or len(pts) < 2:
             continue
-        for i in range(1, len(pts)):
-            yield f"{name}[{i-1}->{i}]", pts[i - 1], pts[i]
+        arrays.append(np.asarray(pts, dtype=np.float64)[:, :3])
+        names.append(str(path.get("name", f"path-{idx}")))
+    path_start = np.zeros(len(arrays) + 1, dtype=np.int64)
+    path_start[1:] = np.cumsum([len(a) for a in arrays])
+    points = np.concatenate(arrays) if arrays else np.zeros((0, 3))
+
+    # Every point but the last of each path starts an edge.
+    is_last = np.zeros(len(points), dtype=bool)
+    is_last[path_start[1:] - 1] = True
+    edge_a = np.flatnonzero(~is_last)
+
+    i, j, dist = close_pairs(points, tol_mm)
+    labels = components(len(points), i, j)
+    # Labels are the smallest point index of each group, so `first` is each node's first point.
+    first, node = np.unique(labels, return_inverse=True)
+    coords = points[first]
+    spread = norm3(points - coords[node]) if len(points) else np.zeros(0)
+    return EndpointGraph(
+        points,
+        node,
+        coords,
+        edge_a,
+        path_start,
+        names,
+        max_merge_mm=float(dist.max()) if len(dist) else 0.0,
+        max_spread_mm=float(spread.max()) if len(spread) else 0.0,
+    )
+
+
+def components(n_nodes: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Component label (its smallest node id) of every node.
+
+    Array union-find: each round hooks the larger root of every edge onto the
+    smaller one, then compresses all parent chains by pointer jumping, so the
+    rounds needed grow with log(n), not with path length.
+    """
+    parent = np.arange(n_nodes, dtype=np.int64)
+    while True:
+        ra, rb = parent[a], parent[b]
+        split = ra != rb
+        if not split.any():
+            return parent
+        a, b = a[split], b[split]
+        lo, hi = np.minimum(ra[split], rb[split]), np.maximum(ra[split], rb[split])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
 
 
 def _terminals(data: Dict[str, Any]) -> Dict[str, List[float]]:
@@ -79,61 +174,48 @@ def _terminals(data: Dict[str, Any]) -> Dict[str, List[float]]:
     return out
 
 
+def _node_at(graph: EndpointGraph, p: List[float], tol_mm: float) -> int:
+    """Node of the path point nearest `p` if it lies within `tol_mm`, or -1."""
+    d = norm3(graph.points - np.asarray(p, dtype=np.float64))
+    k = int(np.argmin(d))
+    return int(graph.node[k]) if not d[k] > tol_mm else -1
+
+
+def _print_examples(graph: EndpointGraph, nodes: np.ndarray) -> None:
+    for n in nodes[:MAX_EXAMPLES].tolist():
+        x, y, z = graph.coords[n].tolist()
+        print(f"      ({x:.6g}, {y:.6g}, {z:.6g}) mm: {', '.join(graph.node_edges(n))}")
+    if len(nodes) > MAX_EXAMPLES:
+        print(f"      ... {len(nodes) - MAX_EXAMPLES} more")
+
+
 def analyze(data: Dict[str, Any], tol_mm: float) -> None:
-    # Build undirected endpoint graph.
-    adj: Dict[Key3, List[Key3]] = defaultdict(list)
-    edge_names: Dict[Tuple[Key3, Key3], List[str]] = defaultdict(list)
-
-    nodes: set[Key3] = set()
-    edges = 0
-    for name, a, b in _iter_segment_edges(data):
-        ka = _quantize_mm(a, tol_mm)
-        kb = _quantize_mm(b, tol_mm)
-        nodes.add(ka)
-        nodes.add(kb)
-        adj[ka].append(kb)
-        adj[kb].append(ka)
-        edge_names[(ka, kb)].append(name)
-        edge_names[(kb, ka)].append(name)
-        edges += 1
-
-    if not nodes:
+    graph = build_graph(data, tol_mm)
+    if not graph.edges:
         print("No paths found.")
         return
 
-    # Connected components
-    seen: set[Key3] = set()
-    comps: List[List[Key3]] = []
-    for n in nodes:
-        if n in seen:
-            continue
-        q = deque([n])
-        seen.add(n)
-        comp = []
-        while q:
-            cur = q.popleft()
-            comp.append(cur)
-            for nxt in adj.get(cur, []):
-                if nxt not in seen:
-                    seen.add(nxt)
-                    q.append(nxt)
-        comps.append(comp)
-
-    degs = [len(adj[n]) for n in nodes]
-    deg_hist: Dict[int, int] = defaultdict(int)
-    for d in degs:
-        deg_hist[d] += 1
-
-    print(f"endpoints: {len(nodes)}")
-    print(f"paths (edges): {edges}")
-    print(f"components: {len(comps)}")
+    labels = components(graph.nodes, graph.node[graph.edge_a], graph.node[graph.edge_a + 1])
+    n_comps = int(np.count_nonzero(labels == np.arange(graph.nodes)))
+    degs = graph.degrees()
+    deg_hist = np.bincount(degs)
+
+    print(f"endpoints: {graph.nodes}")
+    print(f"paths (edges): {graph.edges}")
+    print(f"largest merge distance: {graph.max_merge_mm:.3g} mm (tol {tol_mm:g} mm)")
+    print(f"components: {n_comps}")
     print("degree histogram:")
-    for d in sorted(deg_hist):
+    for d in np.flatnonzero(deg_hist).tolist():
         print(f"  deg {d}: {deg_hist[d]}")
 
-    deg1 = [n for n in nodes if len(adj[n]) == 1]
-    deg2 = [n for n in nodes if len(adj[n]) == 2]
-    deg_other = [n for n in nodes if len(adj[n]) not in (1, 2)]
+    if graph.max_spread_mm > tol_mm:
+        print(
+            f"warning: chained merges put points {graph.max_spread_mm:.3g} mm from their node "
+            f"(tol {tol_mm:g} mm); nearby endpoints may have been joined"
+        )
+
+    deg1 = np.flatnonzero(degs == 1)
+    deg_other = np.flatnonzero((degs != 1) & (degs != 2))
 
     terms = _terminals(data)
     term_ok = True
@@ -143,32 +225,37 @@ def analyze(data: Dict[str, Any], tol_mm: float) -> None:
             term_ok = False
             print(f"NOT OK: missing terminals in JSON: {missing}")
         else:
-            kin = _quantize_mm(terms["IN"], tol_mm)
-            kout = _quantize_mm(terms["OUT"], tol_mm)
-            if kin not in nodes or kout not in nodes:
+            kin = _node_at(graph, terms["IN"], tol_mm)
+            kout = _node_at(graph, terms["OUT"], tol_mm)
+            if kin < 0 or kout < 0:
                 term_ok = False
                 print("NOT OK: terminal points are not present on any path node")
             else:
                 # For a single series path, the two degree-1 nodes must be the terminals.
-                if set(deg1) != {kin, kout}:
+                if set(deg1.tolist()) != {kin, kout}:
                     term_ok = False
                     print("NOT OK: degree-1 nodes do not match IN/OUT terminals")
 
-    if len(comps) == 1 and len(deg1) == 2 and not deg_other and term_ok:
+    if n_comps == 1 and len(deg1) == 2 and not len(deg_other) and term_ok:
         print("OK: graph is a single path (IN/OUT are terminals; all internal nodes degree-2)")
     else:
         print("NOT a single series path yet (given current export)")
-        if len(comps) != 1:
+        if n_comps != 1:
             print("  - reason: multiple connected components")
+            # One node per component other than the one holding node 0.
+            roots = np.flatnonzero(labels == np.arange(graph.nodes))
+            _print_examples(graph, roots[roots != labels[0]])
         if len(deg1) != 2:
             print(f"  - reason: expected 2 degree-1 terminals, found {len(deg1)}")
-        if deg_other:
+            _print_examples(graph, deg1)
+        if len(deg_other):
             print(f"  - reason: found {len(deg_other)} nodes with degree not in {{1,2}}")
+            _print_examples(graph, deg_other)
 
 
 def main() -> None:
     ap = argparse.ArgumentParser(description="Verify exported BFEM conductor connectivity.")
-    ap.add_argument("json", type=Path, help="Centerlines JSON file")
+    ap.add_argument("json", type=Path, help="Centerlines JSON or conductor-network binary file")
     ap.add_argument("--tol-mm", type=float, default=1e-3, help="Endpoint match tolerance in mm")
     args = ap.parse_args()
 